@@ -1,5 +1,7 @@
 from sqlite3 import DatabaseError, OperationalError, IntegrityError
+from time import perf_counter
 
+from Backend.output import default_sink
 from Backend.settings import Settings
 from SQLLite3HelperClass import SQLlite3Helper
 from pathlib import Path
@@ -27,13 +29,31 @@ class PyBlackJackSQLLite(SQLlite3Helper):
     :type setup_database_script_path: Path
     :ivar setup_new_player_script_path: Path to the SQL script for adding a new player to the database.
     :type setup_new_player_script_path: Path
+    :ivar output: Where progress messages go. Defaults to ``default_sink()``.
+    :type output: OutputSink
+    :ivar on_commit: Optional callable taking the operation name and the commit's duration in
+        seconds, called after every commit (see ``PyBlackJack.metrics``).
+    :type on_commit: Callable[[str, float], object] | None
     """
     NEW_PLAYER_DICT_KEYS = ['fname', 'lname']
+    # also in InitializeNewDB.sql; repeated here so databases created before the ledger get the table
+    LEDGER_TABLE_SQL = """create table if not exists LedgerEntries(
+    id integer primary key autoincrement not null,
+    session_id integer not null,
+    hand_id integer not null,
+    seat integer not null,
+    kind integer not null,
+    amount integer not null,
+    stake integer not null,
+    account_id integer,
+    foreign key(account_id)
+        references BankAccounts(id))"""
 
     def __init__(self, db_file_path: str = None, **kwargs):
         self.settings = kwargs.get('settings', Settings())
         self._db_initialized = None
-
+        self.on_commit = kwargs.get('on_commit', None)
+        self.output = kwargs.get('output') or default_sink()
 
         self.db_file_path = db_file_path or Path(self.settings.db_file_path)
         self.setup_database_script_path = Path(self.settings.setup_database_script_path)
@@ -61,6 +81,14 @@ class PyBlackJackSQLLite(SQLlite3Helper):
                     self._db_initialized = False
         return self._db_initialized
 
+    def _commit(self, operation: str):
+        if self.on_commit is None:
+            self._connection.commit()
+            return
+        start = perf_counter()
+        self._connection.commit()
+        self.on_commit(operation, perf_counter() - start)
+
     def check_initialization(self):
         if not self.db_initialized:
             raise DatabaseError("Database not initialized. Please initialize the database first.")
@@ -85,8 +113,8 @@ class PyBlackJackSQLLite(SQLlite3Helper):
             sql_script = sql_file.read()
 
             self._cursor.executescript(sql_script)
-            self._connection.commit()
-            print("Database initialized successfully.")
+            self._commit('initialize')
+            self.output.info("Database initialized successfully.")
 
     def new_player_setup(self, new_player_dict: dict):
         """
@@ -109,7 +137,7 @@ class PyBlackJackSQLLite(SQLlite3Helper):
         """
         self.check_initialization()
         new_player_string = ' '.join(new_player_dict.values()).replace('\'', '')
-        print(f"Setting up new player '{new_player_string}'.")
+        self.output.info("Setting up new player '%s'.", new_player_string)
         try:
             with open(self.setup_new_player_script_path) as sql_file:
                 sql_script = sql_file.read()
@@ -119,16 +147,16 @@ class PyBlackJackSQLLite(SQLlite3Helper):
 
                 sql_script = sql_script.replace(f':{PyBlackJackSQLLite.NEW_PLAYER_DICT_KEYS[0]}', new_fname
                                                 ).replace(f':{PyBlackJackSQLLite.NEW_PLAYER_DICT_KEYS[1]}', new_lname)
-                print('SQL script ready.')
+                self.output.debug('SQL script ready.')
         except FileNotFoundError as e:
            raise e
         try:
             self._cursor.executescript(sql_script)
-            self._connection.commit()
+            self._commit('new_player')
 
             self.Query(f"SELECT id FROM Players WHERE player_first_name = {new_fname} AND player_last_name = {new_lname}")
             new_player_id = self.query_results[0][0]
-            print(f"New Player \'{new_player_string}\' added to database!")
+            self.output.info("New Player '%s' added to database!", new_player_string)
         except IntegrityError as e:
             if 'UNIQUE constraint failed' in str(e):
                 raise PlayerExistsError(f"Player \'{new_player_string}\' already exists in database.") from None
@@ -158,12 +186,12 @@ class PyBlackJackSQLLite(SQLlite3Helper):
         if self.query_results:
             return self.query_results[0][0]
         else:
-            print(f"Player {where_text} not found in database.")
+            self.output.warning("Player %s not found in database.", where_text)
             return None
 
     def PlayerInfoLookup(self, player_id):
         def _no_pid(pid):
-            print(f"Player with ID {pid} not found in database.")
+            self.output.warning("Player with ID %s not found in database.", pid)
             return None
         """
         Looks up player information in the database and retrieves corresponding player
@@ -208,15 +236,31 @@ class PyBlackJackSQLLite(SQLlite3Helper):
         self.check_initialization()
         sql_str = f"""update BankAccounts set account_balance = {new_balance} where id = {account_id}"""
         self.Query(sql_str)
-        self._connection.commit()
-        print(f'updated BankAccount ID {account_id} with new balance ({new_balance}).')
+        self._commit('account_balance')
+        self.output.info('updated BankAccount ID %s with new balance (%s).', account_id, new_balance)
+
+    def insert_ledger_entries(self, rows: list):
+        """
+        Bulk insert Cage ledger entries with a single executemany and commit.
+
+        :param rows: ``(session_id, hand_id, seat, kind, amount, stake, account_id)`` tuples,
+            as produced by ``Ledger.rows()``.
+        :type rows: list
+        :return: None
+        """
+        self.check_initialization()
+        self._cursor.execute(PyBlackJackSQLLite.LEDGER_TABLE_SQL)
+        self._cursor.executemany("insert into LedgerEntries"
+                                 "(session_id, hand_id, seat, kind, amount, stake, account_id) "
+                                 "values (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._commit('ledger')
 
     def add_bankruptcy(self, player_id: int):
         sql_query = f"""update PlayerBankruptcies 
                         set total_bankruptcies = (total_bankruptcies + 1) 
                         where player_id = {player_id}"""
         self.Query(sql_query)
-        self._connection.commit()
+        self._commit('bankruptcy')
         self._logger.debug(f'bankruptcy added to player {player_id}')
 
 # TODO: add to db (add player and bank account) and query for preexisting players
@@ -0,0 +1,67 @@
+"""
+Integer card codes.
+
+A card is stored in the deck as a ``(value, suit)`` tuple, where suit is either the
+unicode symbol or the plaintext name from ``CardSuits``. Hot paths (asset lookup,
+side bets, serialization) use a single int instead:
+
+    code = suit_index * 13 + (value - 1)        # 0..51
+
+with suit_index following ``CardSuits`` declaration order.
+"""
+from typing import Tuple
+
+from Backend.enum import CardSuits, CardValues, FaceCard
+
+RANKS_PER_SUIT = len(CardValues)
+SUIT_ORDER = tuple(CardSuits)
+# file-name style suit names used by the card image set, e.g. 'hearts'
+SUIT_FILE_NAMES = tuple(f"{s.name.lower()}s" for s in SUIT_ORDER)
+RANK_FILE_NAMES = {fc.value: fc.name.lower() for fc in FaceCard}
+
+# both unicode and plaintext suit representations map to the same index
+SUIT_INDEX = {**{s.value: i for i, s in enumerate(SUIT_ORDER)},
+              **{s.name: i for i, s in enumerate(SUIT_ORDER)},
+              **{name: i for i, name in enumerate(SUIT_FILE_NAMES)}}
+
+
+def encode(value: int, suit: str) -> int:
+    return SUIT_INDEX[suit] * RANKS_PER_SUIT + (value - 1)
+
+
+def decode(code: int) -> Tuple[int, int]:
+    """Return ``(value, suit_index)`` for a card code."""
+    suit_index, rank_index = divmod(code, RANKS_PER_SUIT)
+    return rank_index + 1, suit_index
+
+
+# (value, suit) tuple -> code, for every representation a Deck may hold
+CARD_CODES = {(v.value, suit): encode(v.value, suit) for v in CardValues for suit in SUIT_INDEX}
+
+
+def card_code(card: Tuple[int, str]) -> int:
+    return CARD_CODES[card]
+
+
+def asset_key(code: int) -> str:
+    """The card image key for a code, matching ``'<rank> <suit>'`` built from ``<rank>_of_<suit>.png``."""
+    value, suit_index = decode(code)
+    return f"{RANK_FILE_NAMES.get(value, value)} {SUIT_FILE_NAMES[suit_index]}"
+
+
+ASSET_KEY_CODES = {asset_key(c): c for c in range(RANKS_PER_SUIT * len(SUIT_ORDER))}
+
+_RANK_LABELS = {1: 'A', 11: 'J', 12: 'Q', 13: 'K'}
+
+
+def card_label(code: int) -> str:
+    """Short text form of a card, e.g. ``'AS'``, ``'10H'``, ``'QD'``."""
+    value, suit_index = decode(code)
+    return f"{_RANK_LABELS.get(value, value)}{SUIT_ORDER[suit_index].name[0]}"
+
+
+# blackjack points per code; aces count 1 here and are promoted to 11 by the hand total
+CARD_POINTS = tuple(min(decode(c)[0], 10) for c in range(RANKS_PER_SUIT * len(SUIT_ORDER)))
+
+# Hi-Lo count tag by card value (index 0 unused): 2-6 count +1, 7-9 count 0, tens and aces -1
+HI_LO_TAGS = (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1)
@@ -1,8 +1,12 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 class TurnChoices(Enum):
     HIT = 1
     STAY = 2
+    DOUBLE = 3
+    SPLIT = 4
+    SURRENDER = 5
+    INSURANCE = 6
 
     def __str__(self):
         return self.name
@@ -13,6 +17,16 @@ class FaceCard(Enum):
     QUEEN = 12
     KING = 13
 
+class HandOutcome(Enum):
+    WIN = 'win'
+    BLACKJACK = 'blackjack'
+    LOSE = 'lose'
+    PUSH = 'push'
+    SURRENDER = 'surrender'
+
+    def __str__(self):
+        return self.value
+
 class GameStates(Enum):
     START = "START"
     PLAYING = "PLAYING"
@@ -38,4 +52,26 @@ class CardSuits(Enum):
     HEART = '\u2661'
     DIAMOND = '\u2662'
     CLUB = '\u2667'
-    SPADE = '\u2664'
\ No newline at end of file
+    SPADE = '\u2664'
+
+class LedgerEntry(Enum):
+    BET = 1
+    PAYOUT = 2
+    PAY_IN = 3
+    INSURANCE = 4
+    ADJUST = 5
+    SIDE_BET = 6
+
+    def __str__(self):
+        return self.name
+
+
+class MessageLevel(IntEnum):
+    # the same numbers as the logging module's levels
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,158 @@
+"""
+Output sinks for game messages.
+
+Game, Deck, the players, the cage and the database write their messages
+("Player 1 Decided to hit!", "12 cards left to draw from.", ...) to an
+``OutputSink`` instead of calling ``print()``. Messages are logging-style
+templates with ``%`` arguments, and a sink formats one only if it will keep it;
+callers that build expensive arguments check ``enabled(level)`` first. A
+``NullSink`` keeps nothing, so headless and simulation games do no formatting
+work at all.
+
+* ``TerminalSink``: prints to stdout (the interactive default).
+* ``LoggingSink``: hands messages to a ``logging`` logger.
+* ``NullSink``: discards everything.
+* ``BufferedSink``: keeps messages in memory, e.g. to show or test them later.
+
+Objects created without a sink use ``default_sink()``, a TerminalSink unless
+replaced with ``set_default_sink()``.
+"""
+import logging
+import sys
+from collections import deque
+from typing import Deque, List, Optional, TextIO, Tuple
+
+from Backend.enum import MessageLevel
+
+DEBUG, INFO, WARNING, ERROR = MessageLevel.DEBUG, MessageLevel.INFO, MessageLevel.WARNING, MessageLevel.ERROR
+
+
+class OutputSink:
+    """
+    Receives game messages at or above ``level``.
+
+    Subclasses implement ``write(level, text)``, which gets the formatted message.
+
+    :ivar level: Least severe level kept.
+    :type level: MessageLevel
+    """
+    def __init__(self, level: MessageLevel = INFO):
+        self.level = level
+
+    def enabled(self, level: MessageLevel) -> bool:
+        return level >= self.level
+
+    def write(self, level: MessageLevel, text: str):
+        raise NotImplementedError
+
+    def message(self, level: MessageLevel, msg: str, *args):
+        if self.enabled(level):
+            self.write(level, msg % args if args else msg)
+
+    def debug(self, msg: str, *args):
+        self.message(DEBUG, msg, *args)
+
+    def info(self, msg: str, *args):
+        self.message(INFO, msg, *args)
+
+    def warning(self, msg: str, *args):
+        self.message(WARNING, msg, *args)
+
+    def error(self, msg: str, *args):
+        self.message(ERROR, msg, *args)
+
+
+class TerminalSink(OutputSink):
+    """
+    Prints messages, one per line.
+
+    :ivar stream: Where to print; None for whatever ``sys.stdout`` is at the time.
+    :type stream: TextIO | None
+    """
+    def __init__(self, level: MessageLevel = INFO, stream: Optional[TextIO] = None):
+        super().__init__(level)
+        self.stream = stream
+
+    def write(self, level: MessageLevel, text: str):
+        print(text, file=self.stream or sys.stdout)
+
+
+class LoggingSink(OutputSink):
+    """Passes messages to a logger, which also decides what is kept."""
+    DEFAULT_LOGGER_NAME = 'PyBlackJack'
+
+    def __init__(self, level: MessageLevel = DEBUG, logger: logging.Logger = None):
+        super().__init__(level)
+        self.logger = logger or logging.getLogger(self.__class__.DEFAULT_LOGGER_NAME)
+
+    def enabled(self, level: MessageLevel) -> bool:
+        return level >= self.level and self.logger.isEnabledFor(level)
+
+    def write(self, level: MessageLevel, text: str):
+        self.logger.log(level, text)
+
+
+class NullSink(OutputSink):
+    """Discards every message without formatting it."""
+    def __init__(self, level: MessageLevel = ERROR):
+        super().__init__(level)
+
+    def enabled(self, level: MessageLevel) -> bool:
+        return False
+
+    def write(self, level: MessageLevel, text: str):
+        pass
+
+    def message(self, level: MessageLevel, msg: str, *args):
+        pass
+
+    def debug(self, msg: str, *args):
+        pass
+
+    def info(self, msg: str, *args):
+        pass
+
+    def warning(self, msg: str, *args):
+        pass
+
+    def error(self, msg: str, *args):
+        pass
+
+
+class BufferedSink(OutputSink):
+    """
+    Keeps ``(level, text)`` messages in memory, the oldest dropped past ``maxlen``.
+
+    :ivar messages: The kept messages, oldest first.
+    :type messages: collections.deque
+    """
+    def __init__(self, level: MessageLevel = INFO, maxlen: Optional[int] = None):
+        super().__init__(level)
+        self.messages: Deque[Tuple[MessageLevel, str]] = deque(maxlen=maxlen)
+
+    def write(self, level: MessageLevel, text: str):
+        self.messages.append((level, text))
+
+    @property
+    def lines(self) -> List[str]:
+        return [text for _, text in self.messages]
+
+    def flush_to(self, sink: OutputSink):
+        """Write the kept messages to another sink, oldest first, and forget them."""
+        while self.messages:
+            level, text = self.messages.popleft()
+            if sink.enabled(level):
+                sink.write(level, text)
+
+
+_default_sink: OutputSink = TerminalSink()
+
+
+def default_sink() -> OutputSink:
+    return _default_sink
+
+
+def set_default_sink(sink: OutputSink):
+    """Use sink for objects created from now on without one of their own."""
+    global _default_sink
+    _default_sink = sink
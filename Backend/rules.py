@@ -0,0 +1,98 @@
+"""
+Table rules.
+
+The ``[RULES]`` config section is compiled once into a ``RuleSet``: an immutable
+tuple holding the raw rules plus the lookup tables the hot paths read, so a
+dealer decision or a payout is an index into a tuple rather than a config lookup.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
+from Backend.enum import HandOutcome
+
+# chips returned per chip bet as (numerator, denominator); blackjack is added per rule set
+EVEN_MONEY_PAYOUTS = {HandOutcome.WIN: (2, 1), HandOutcome.PUSH: (1, 1), HandOutcome.LOSE: (0, 1),
+                      HandOutcome.SURRENDER: (1, 2)}
+BLACKJACK_PAYOUTS = {'3:2': (5, 2), '6:5': (11, 5), '1:1': (2, 1)}
+# hand values a dealer policy table covers; a hard 16 plus a ten is the worst case
+MAX_DEALER_TOTAL = 26
+MAX_DECKS = 8
+# the RuleSet fields set by config; the rest are compiled from these
+RAW_RULES = ('decks', 'dealer_hits_soft_17', 'blackjack_payout', 'double_after_split', 'surrender', 'penetration')
+
+
+class RuleSet(NamedTuple):
+    """
+    One table's rules and the tables compiled from them.
+
+    :ivar dealer_hits: ``dealer_hits[soft][total]`` is True when the dealer draws.
+    :ivar payouts: Chips returned per chip bet as (numerator, denominator), by HandOutcome.
+    :ivar cut_card: Cards left in a full shoe when the cut card comes out.
+    """
+    decks: int
+    dealer_hits_soft_17: bool
+    blackjack_payout: str
+    double_after_split: bool
+    surrender: bool
+    penetration: float
+    dealer_hits: Tuple[Tuple[bool, ...], Tuple[bool, ...]]
+    payouts: Mapping[HandOutcome, Tuple[int, int]]
+    cut_card: int
+
+    @classmethod
+    def compile(cls, decks: int = 1, dealer_hits_soft_17: bool = False, blackjack_payout: str = '3:2',
+                double_after_split: bool = True, surrender: bool = True, penetration: float = 0.75):
+        """
+        :raises ValueError: If a rule is out of range or the blackjack payout is not one of BLACKJACK_PAYOUTS.
+        """
+        if not 1 <= decks <= MAX_DECKS:
+            raise ValueError(f"decks must be 1 to {MAX_DECKS}, not {decks}.")
+        if not 0 < penetration < 1:
+            raise ValueError(f"penetration must be between 0 and 1, not {penetration}.")
+        if blackjack_payout not in BLACKJACK_PAYOUTS:
+            raise ValueError(f"blackjack_payout must be one of {', '.join(BLACKJACK_PAYOUTS)}, "
+                             f"not '{blackjack_payout}'.")
+
+        hard = tuple(total < 17 for total in range(MAX_DEALER_TOTAL + 1))
+        soft = tuple(total < 17 or (total == 17 and dealer_hits_soft_17) for total in range(MAX_DEALER_TOTAL + 1))
+        payouts = MappingProxyType({**EVEN_MONEY_PAYOUTS,
+                                    HandOutcome.BLACKJACK: BLACKJACK_PAYOUTS[blackjack_payout]})
+        shoe_size = 52 * decks
+        return cls(decks, dealer_hits_soft_17, blackjack_payout, double_after_split, surrender, penetration,
+                   (hard, soft), payouts, shoe_size - int(shoe_size * penetration))
+
+    @property
+    def raw(self) -> tuple:
+        """The raw rules in RAW_RULES order; hashable, unlike the compiled tables."""
+        return tuple(getattr(self, field) for field in RAW_RULES)
+
+    def derive(self, **changes) -> 'RuleSet':
+        """A new RuleSet with some raw rules changed and its tables recompiled."""
+        raw = dict(zip(RAW_RULES, self.raw))
+        raw.update(changes)
+        return self.__class__.compile(**raw)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls.compile(
+            decks=config.getint('RULES', 'decks', fallback=1),
+            dealer_hits_soft_17=config.getboolean('RULES', 'dealer_hits_soft_17', fallback=False),
+            blackjack_payout=config.get('RULES', 'blackjack_payout', fallback='3:2'),
+            double_after_split=config.getboolean('RULES', 'double_after_split', fallback=True),
+            surrender=config.getboolean('RULES', 'surrender', fallback=True),
+            penetration=config.getfloat('RULES', 'penetration', fallback=0.75))
+
+
+def parse_rule_value(text: str):
+    """A raw rule value from text: true/false, an int, a float, or the text itself (e.g. '6:5')."""
+    lowered = text.lower()
+    if lowered in ('true', 'yes', 'on'):
+        return True
+    if lowered in ('false', 'no', 'off'):
+        return False
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
@@ -1,9 +1,17 @@
+import json
+import os
 from logging import Logger
-from typing import List
+from typing import List, Dict, Tuple
 from pathlib import Path
 from BetterConfigAJM import BetterConfigAJM
+
+# pygame prints a banner on import, even in headless and simulation runs that only need its fonts here
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
 from pygame import font
 
+from Backend.card_codes import ASSET_KEY_CODES
+from Backend.rules import RuleSet
+
 class Settings:
     GAME_ROOT_FOLDER = Path(__file__).parent.parent
     DEFAULT_CONFIG_LOCATION = Path(GAME_ROOT_FOLDER, 'cfg/PyBlackjackConfig.ini')
@@ -21,8 +29,13 @@ class Settings:
                                                                  'setup_new_player_script_path'))
         self.use_unicode_cards = self.config.getboolean('CARD', 'use_unicode')
         self.shoe_runout_warning_threshold = self.config.getint('DECK', 'shoe_runout_warning_threshold')
+        # cut_card, continuous, or a number of hands; see PyBlackJack.Deck.ShufflePolicies
+        self.reshuffle = self.config.get('DECK', 'reshuffle', fallback='cut_card')
         self.use_database = self.config.getboolean('DEFAULT', 'use_database')
         self.player_name = self.config.get('DEFAULT', 'player_name')
+        self.seats = self.config.getint('DEFAULT', 'seats', fallback=1)
+        # compiled once; game code reads its tables instead of the config
+        self.rules = RuleSet.from_config(self.config)
 
 
 class PyGameSettings(Settings):
@@ -33,6 +46,10 @@ class PyGameSettings(Settings):
     LIGHT_RED = (255, 80, 80)
     LIGHTER_RED = (255, 180, 180)
 
+    CARD_MANIFEST_PATH = Path(Settings.DEFAULT_CONFIG_LOCATION.parent, 'card_manifest.json')
+    # card_dir -> (mtime_ns, key map, code map), shared by every instance in the process
+    _card_map_cache = {}
+
     def __init__(self, config=None):
         super().__init__(config)
         self.game_screen_bg_color = self.parse_tuple_from_config(self.config.get('PYGAME', 'game_screen_bg_color'))
@@ -46,6 +63,9 @@ class PyGameSettings(Settings):
         self.screen_size = (self.config.getint('PYGAME', 'screen_size_width'),
                             self.config.getint('PYGAME', 'screen_size_height'))
         self.font = font.Font(None, 36)
+        self.show_frame_stats = self.config.getboolean('PYGAME', 'show_frame_stats', fallback=False)
+        self.frame_stats_csv_path = self.config.get('PYGAME', 'frame_stats_csv_path', fallback='') or None
+        self.enable_animations = self.config.getboolean('PYGAME', 'enable_animations', fallback=True)
 
         # Resolve card asset locations, preferring the project's PNG-Cards when available
         cfg_dir = Path(self.config.get('PYGAME', 'card_dir_location'))
@@ -58,24 +78,76 @@ class PyGameSettings(Settings):
         # Pick configured back if it exists; otherwise fall back to default
         self.card_back_location = (cfg_back if cfg_back.exists() and cfg_back.is_file() else default_back).resolve()
 
-        def _build_map(from_dir: Path):
-            try:
-                return {
-                    ' '.join(x.stem.split('_of_')): x.resolve()
-                    for x in from_dir.iterdir()
-                    if x.suffix.lower() == '.png'
-                    and not x.stem.endswith('2')
-                    and not x.stem.endswith('_joker')
-                }
-            except Exception:
-                return {}
-
-        self.card_image_path_list = _build_map(self.card_dir_location)
+        self.card_image_path_list, self.card_image_paths_by_code = self.load_card_map(self.card_dir_location)
         # If the configured directory didn't yield any cards, try default path as a fallback
         if not self.card_image_path_list and default_dir.exists():
-            self.card_image_path_list = _build_map(default_dir.resolve())
+            self.card_image_path_list, self.card_image_paths_by_code = self.load_card_map(default_dir.resolve())
             self.card_dir_location = default_dir.resolve()
 
+    @classmethod
+    def load_card_map(cls, card_dir: Path) -> Tuple[Dict[str, Path], Dict[int, Path]]:
+        """
+        Return the card image maps for card_dir: ``{'ace spades': path}`` and ``{card_code: path}``.
+
+        The maps are kept per process and in CARD_MANIFEST_PATH, both validated
+        against the directory's mtime, so the directory is only scanned when its
+        contents change. A warm lookup costs a single stat call.
+        """
+        try:
+            mtime_ns = card_dir.stat().st_mtime_ns
+        except OSError:
+            return {}, {}
+
+        cached = cls._card_map_cache.get(card_dir)
+        if cached and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+
+        cards = cls._read_card_manifest(card_dir, mtime_ns)
+        if cards is None:
+            cards = cls._scan_card_dir(card_dir)
+            if cards:
+                cls._write_card_manifest(card_dir, mtime_ns, cards)
+
+        by_key = {key: Path(path) for key, (path, _) in cards.items()}
+        by_code = {code: by_key[key] for key, (_, code) in cards.items() if code is not None}
+        cls._card_map_cache[card_dir] = (mtime_ns, by_key, by_code)
+        return by_key, by_code
+
+    @staticmethod
+    def _scan_card_dir(from_dir: Path):
+        try:
+            cards = {}
+            for x in from_dir.iterdir():
+                if (x.suffix.lower() == '.png'
+                        and not x.stem.endswith('2')
+                        and not x.stem.endswith('_joker')):
+                    key = ' '.join(x.stem.split('_of_'))
+                    cards[key] = (str(x.resolve()), ASSET_KEY_CODES.get(key))
+            return cards
+        except Exception:
+            return {}
+
+    @classmethod
+    def _read_card_manifest(cls, card_dir: Path, mtime_ns: int):
+        try:
+            with open(cls.CARD_MANIFEST_PATH) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('card_dir') != str(card_dir) or manifest.get('mtime_ns') != mtime_ns:
+            return None
+        return manifest.get('cards')
+
+    @classmethod
+    def _write_card_manifest(cls, card_dir: Path, mtime_ns: int, cards):
+        try:
+            cls.CARD_MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(cls.CARD_MANIFEST_PATH, 'w') as f:
+                json.dump({'card_dir': str(card_dir), 'mtime_ns': mtime_ns, 'cards': cards}, f)
+        except OSError:
+            # a read-only install just rescans next time
+            pass
+
     @staticmethod
     def parse_tuple_from_config(config_value):
         # Removing parentheses and splitting the string by commas
@@ -93,6 +165,7 @@ class PyBlackJackConfig(BetterConfigAJM):
     CARD_PNG_DEFAULT_PATH = CARD_SVG_DEFAULT_PATH.parent / 'PNG-cards'
     CARD_BACK_SVG_DEFAULT_PATH = CARD_SVG_DEFAULT_PATH.parent / 'card_back.svg'
     CARD_BACK_PNG_DEFAULT_PATH = CARD_PNG_DEFAULT_PATH / 'card_back.png'
+    CARD_BUILD_DEFAULT_PATH = CARD_SVG_DEFAULT_PATH.parent / 'PNG-cards-built'
 
     DEFAULT_SCREEN_SIZE = (800, 600)
 
@@ -106,14 +179,27 @@ class PyBlackJackConfig(BetterConfigAJM):
                         'setup_database_script_path': PyBlackJackConfig.SETUP_DATABASE_SCRIPT_PATH,
                         'setup_new_player_script_path': PyBlackJackConfig.SETUP_NEW_PLAYER_SCRIPT_PATH,
                         'use_database': 'False',
-                        'player_name': ''
+                        'player_name': '',
+                        'seats': '1'
                     },
                 'CARD':
                     {
                         'use_unicode': 'True',
                     },
                 'DECK':
-                    {'shoe_runout_warning_threshold': '15'},
+                    {
+                        'shoe_runout_warning_threshold': '15',
+                        'reshuffle': 'cut_card'
+                    },
+                'RULES':
+                    {
+                        'decks': '1',
+                        'dealer_hits_soft_17': 'False',
+                        'blackjack_payout': '3:2',
+                        'double_after_split': 'True',
+                        'surrender': 'True',
+                        'penetration': '0.75'
+                    },
                 'PYGAME':
                     {
                         'game_screen_bg_color': PyGameSettings.GREEN_RGB,
@@ -126,7 +212,10 @@ class PyBlackJackConfig(BetterConfigAJM):
                         'screen_size_width': PyBlackJackConfig.DEFAULT_SCREEN_SIZE[0],
                         'screen_size_height': PyBlackJackConfig.DEFAULT_SCREEN_SIZE[1],
                         'card_dir_location': PyBlackJackConfig.CARD_PNG_DEFAULT_PATH,
-                        'card_back_location': PyBlackJackConfig.CARD_BACK_PNG_DEFAULT_PATH
+                        'card_back_location': PyBlackJackConfig.CARD_BACK_PNG_DEFAULT_PATH,
+                        'show_frame_stats': 'False',
+                        'frame_stats_csv_path': '',
+                        'enable_animations': 'True'
                     }
              }
         ]
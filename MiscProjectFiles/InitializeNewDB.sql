@@ -53,4 +53,16 @@ create table PlayerBankruptcies(
     player_id integer not null,
     total_bankruptcies integer not null default 0,
     foreign key(player_id)
-        references Players(id));
\ No newline at end of file
+        references Players(id));
+
+create table if not exists LedgerEntries(
+    id integer primary key autoincrement not null,
+    session_id integer not null,
+    hand_id integer not null,
+    seat integer not null,
+    kind integer not null,
+    amount integer not null,
+    stake integer not null,
+    account_id integer,
+    foreign key(account_id)
+        references BankAccounts(id));
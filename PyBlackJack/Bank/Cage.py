@@ -1,4 +1,9 @@
+from typing import Iterable, Optional, Sequence, Tuple
+
+from Backend.enum import HandOutcome, LedgerEntry
+from Backend.output import default_sink
 from Backend.settings import Settings
+from PyBlackJack.Bank.Ledger import Ledger
 
 
 class Cage:
@@ -8,45 +13,211 @@ class Cage:
 
     This class handles chips-related operations specific to a card game. It includes mechanisms
     to set initial chip values for players, manage bets, and calculate and distribute winnings.
+    Bets are tracked per seat so one cage can bank a whole table, and every chip movement
+    is recorded in a Ledger so chip conservation can be checked at any time.
 
-    :ivar hand_value: The total value of chips collected from all bets during a hand.
-    :type hand_value: int
+    :ivar seat_bets: The chips bet at each seat during the current hand, across all of its split hands.
+    :type seat_bets: list[int]
+    :ivar seat_insurance: The chips staked on insurance at each seat.
+    :type seat_insurance: list[int]
+    :ivar payout_ratios: Chips returned per chip bet as (numerator, denominator), by hand
+        outcome, from the table's compiled rules.
+    :type payout_ratios: Mapping[HandOutcome, tuple[int, int]]
+    :ivar ledger: Bet, payout and pay-in entries for every seat.
+    :type ledger: Ledger
+    :ivar output: Where balance messages go. Defaults to ``default_sink()``.
+    :type output: OutputSink
     :cvar CHIP_VALUES: The list of predefined chip values available in the game.
+    :cvar INSURANCE_PAYOUT: Chips returned per chip of insurance when the dealer has blackjack.
     """
     CHIP_VALUES = [5, 15, 25, 50]
+    INSURANCE_PAYOUT = 3
+
     def __init__(self, **kwargs):
-        self.hand_value: int = 0
+        self.seat_bets = [0] * kwargs.get('seats', 1)
+        self.seat_insurance = [0] * kwargs.get('seats', 1)
         self.settings = kwargs.get('settings', Settings())
+        self.payout_ratios = self.settings.rules.payouts
+        self.ledger = kwargs.get('ledger') or Ledger(seats=len(self.seat_bets))
+        self.output = kwargs.get('output') or default_sink()
+
+    @property
+    def hand_value(self) -> int:
+        """The total value of chips collected from all bets during a hand."""
+        return sum(self.seat_bets)
+
+    @property
+    def chips_held(self) -> int:
+        return sum(self.seat_bets) + sum(self.seat_insurance)
 
-    def pay_in(self, player: 'Player'):
+    def begin_hand(self):
+        return self.ledger.next_hand()
+
+    def pay_in(self, player: 'Player', seat: Optional[int] = 0):
+        """Reset player to the starting chips; seat None (the dealer) is not ledgered."""
+        if seat is not None:
+            self.ledger.record(seat, LedgerEntry.PAY_IN, self.settings.starting_chips - self.ledger.balances[seat],
+                               account_id=getattr(player, 'account_id', None))
         player.chips = self.settings.starting_chips
         return player
 
-    def take_bet(self, player: 'Player'):
+    def adjust_balance(self, player: 'Player', chips: int, seat: int = 0):
+        """Set a seat's chips from outside the game (e.g. a database balance), keeping the ledger in step."""
+        delta = chips - self.ledger.balances[seat]
+        if delta:
+            self.ledger.record(seat, LedgerEntry.ADJUST, delta, account_id=getattr(player, 'account_id', None))
+        player.chips = chips
+        return player
+
+    def _stake(self, player: 'Player', amount: int, seat: int, kind: LedgerEntry):
+        player.chips -= amount
+        self.ledger.record(seat, kind, -amount, amount, getattr(player, 'account_id', None))
+
+    def take_bet(self, player: 'Player', seat: int = 0):
         if player.chips <= 0:
             player.bankrupt()
+            # bankrupt() buys back in on the player's side
+            self.adjust_balance(player, player.chips, seat)
         if 0 < player.bet_amount <= player.chips:
-            self.hand_value += player.bet_amount
-            player.chips -= player.bet_amount
+            self.seat_bets[seat] += player.bet_amount
+            self._stake(player, player.bet_amount, seat, LedgerEntry.BET)
             return player
         else:
             raise ValueError("Bet amount cannot exceed players available chips, or be zero.")
 
-    def award_hand_value(self, player: 'Player'):
-        player.chips += (self.hand_value * 2)
-        self.hand_value = 0
+    def raise_bet(self, player: 'Player', amount: int, seat: int = 0):
+        """Take a further stake for a double or a split hand at seat."""
+        if not 0 < amount <= player.chips:
+            raise ValueError("Not enough chips to double or split.")
+        self.seat_bets[seat] += amount
+        self._stake(player, amount, seat, LedgerEntry.BET)
         return player
 
+    def take_insurance(self, player: 'Player', amount: int, seat: int = 0):
+        if not 0 < amount <= player.chips:
+            raise ValueError("Not enough chips for insurance.")
+        self.seat_insurance[seat] += amount
+        self._stake(player, amount, seat, LedgerEntry.INSURANCE)
+        return player
+
+    def settle_insurance(self, player: 'Player', dealer_blackjack: bool, seat: int = 0):
+        """Pay insurance at 2 to 1 if the dealer has blackjack, otherwise keep it."""
+        stake = self.seat_insurance[seat]
+        self.seat_insurance[seat] = 0
+        paid = stake * self.__class__.INSURANCE_PAYOUT if dealer_blackjack else 0
+        player.chips += paid
+        self.ledger.record(seat, LedgerEntry.INSURANCE, paid, -stake, getattr(player, 'account_id', None))
+        return paid - stake
+
+    def settle_side_bet(self, player: 'Player', side_bet: 'SideBet', stake: int, outcome: int, seat: int = 0):
+        """
+        Take a side bet of stake and pay it on outcome at once.
+
+        The bet is decided by cards already dealt, so the cage never holds it; the
+        ledger gets one entry for the net.
+
+        :return: Net chips the player won (negative when the bet lost).
+        """
+        if not 0 < stake <= player.chips:
+            raise ValueError("Not enough chips for the side bet.")
+        net = side_bet.payout(stake, outcome) - stake
+        player.chips += net
+        self.ledger.record(seat, LedgerEntry.SIDE_BET, net, account_id=getattr(player, 'account_id', None))
+        return net
+
+    def _release(self, player: 'Player', seat: int, paid: int):
+        stake = self.seat_bets[seat]
+        player.chips += paid
+        self.seat_bets[seat] = 0
+        self.ledger.record(seat, LedgerEntry.PAYOUT, paid, -stake, getattr(player, 'account_id', None))
+        return player
+
+    def award_hand_value(self, player: 'Player', seat: int = 0):
+        numerator, denominator = self.payout_ratios[HandOutcome.WIN]
+        return self._release(player, seat, self.seat_bets[seat] * numerator // denominator)
+
+    def return_hand_value(self, player: 'Player', seat: int = 0):
+        """Push: hand the bet back to the player."""
+        return self._release(player, seat, self.seat_bets[seat])
+
+    def collect_hand_value(self, player: 'Player' = None, seat: int = 0):
+        """House win: the bet stays with the cage."""
+        collected = self.seat_bets[seat]
+        self.seat_bets[seat] = 0
+        self.ledger.record(seat, LedgerEntry.PAYOUT, 0, -collected, getattr(player, 'account_id', None))
+        return collected
+
+    def settle_seats(self, results: Iterable[Tuple[int, 'Player', HandOutcome]]):
+        """
+        Settle every seat of a hand in one pass.
+
+        :param results: (seat, player, outcome) for each seat that played the hand.
+        :return: Net chips the cage paid out (negative when the house won overall).
+        """
+        return self.settle([(seat, player, outcome, self.seat_bets[seat]) for seat, player, outcome in results])
+
+    def settle(self, results: Sequence[Tuple[int, 'Player', HandOutcome, int]]):
+        """
+        Settle a batch of hands, several of which may share a seat after a split.
+
+        Payouts are computed for the whole batch first and written to the ledger
+        with one append per column.
+
+        :param results: (seat, player, outcome, bet) for each hand, bet being that hand's
+            stake including any double.
+        :return: Net chips the cage paid out (negative when the house won overall).
+        """
+        ratios = self.payout_ratios
+        seat_bets = self.seat_bets
+        seats, paid_out, released, account_ids = [], [], [], []
+        for seat, player, outcome, bet in results:
+            numerator, denominator = ratios[outcome]
+            paid = bet * numerator // denominator
+            player.chips += paid
+            seat_bets[seat] -= bet
+            seats.append(seat)
+            paid_out.append(paid)
+            released.append(-bet)
+            account_ids.append(getattr(player, 'account_id', None))
+        self.ledger.record_many(seats, LedgerEntry.PAYOUT, paid_out, released, account_ids)
+        return sum(paid_out) + sum(released)
+
+    def check_conservation(self, players: Iterable['Player']):
+        """
+        :raises ChipConservationError: If any seat's chips or the held stakes disagree with the ledger.
+        """
+        return self.ledger.check(players, self.chips_held)
+
 
 class DatabaseCage(Cage):
     def __init__(self, db:'PyBlackJackSQLLite', **kwargs):
         super().__init__(**kwargs)
         self.db = db
+        # entries not yet written to the database must survive max_entries
+        self.ledger.keep_unflushed = True
 
     def write_new_account_balance(self, player: 'Player'):
         if player.chips != player.account_balance:
             self.db.update_player_account_balance(player.chips, player.account_id)
             player.account_balance = player.chips
-            print(f"New balance: {player.account_balance}")
+            self.output.info("New balance: %s", player.account_balance)
         else:
-            print("No change in balance")
+            self.output.info("No change in balance")
+
+    def flush_ledger(self):
+        """
+        Write the ledger entries recorded since the last flush in one batch.
+
+        Entries are only marked flushed once the insert has committed, and are then
+        dropped from memory; the ledger's running totals still include them.
+
+        :return: The number of entries written.
+        """
+        start = self.ledger.flushed
+        rows = self.ledger.rows(start)
+        if rows:
+            self.db.insert_ledger_entries(rows)
+            self.ledger.flushed = start + len(rows)
+            self.ledger.drop_flushed()
+        return len(rows)
+
@@ -0,0 +1,143 @@
+from array import array
+from time import time_ns
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from Backend.enum import LedgerEntry
+
+
+class ChipConservationError(Exception):
+    """Raised when player balances or the cage's held stakes disagree with the ledger."""
+    ...
+
+
+class Ledger:
+    """
+    Append-only record of every chip movement between a Cage and its seats.
+
+    Entries are stored column-wise in typed arrays (hand id, seat, kind, amount,
+    stake, account id), so a million-hand simulation costs a few bytes per entry
+    and no per-entry objects. Each entry records two signed amounts:
+
+    * ``amount`` -- chips the player at the seat gained (negative for a bet),
+    * ``stake`` -- chips the cage started holding for the seat (negative when a
+      stake is released at settlement).
+
+    Running per-seat balances and the total held stake are kept as entries are
+    added, which makes ``check()`` O(seats) regardless of ledger length.
+
+    :ivar session_id: Identifies this ledger's hand ids when flushed to the database.
+    :type session_id: int
+    :ivar hand_id: The current hand, advanced by ``next_hand()``.
+    :type hand_id: int
+    :ivar max_entries: If set, the oldest entries are discarded past this length; running
+        totals still include them.
+    :type max_entries: int | None
+    :ivar keep_unflushed: Only discard entries that were flushed, for a cage that writes
+        its ledger out; entries still to be written are kept past max_entries.
+    :type keep_unflushed: bool
+    """
+    NO_ACCOUNT = -1
+
+    def __init__(self, seats: int = 1, max_entries: Optional[int] = None):
+        self.session_id = time_ns()
+        self.hand_id = 0
+        self.max_entries = max_entries
+        self.keep_unflushed = False
+
+        self.hand_ids = array('q')
+        self.seats = array('b')
+        self.kinds = array('b')
+        self.amounts = array('q')
+        self.stakes = array('q')
+        self.account_ids = array('q')
+
+        # expected chips per seat, and chips the cage holds in open bets
+        self.balances = array('q', [0]) * seats
+        self.stakes_held = 0
+        self.house_net = 0
+        # entries before this index were flushed or discarded
+        self.flushed = 0
+        self.discarded = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def next_hand(self):
+        self.hand_id += 1
+        return self.hand_id
+
+    def record(self, seat: int, kind: LedgerEntry, amount: int, stake: int = 0, account_id: int = None):
+        self.hand_ids.append(self.hand_id)
+        self.seats.append(seat)
+        self.kinds.append(kind.value)
+        self.amounts.append(amount)
+        self.stakes.append(stake)
+        self.account_ids.append(self.__class__.NO_ACCOUNT if account_id is None else account_id)
+        self.balances[seat] += amount
+        self.stakes_held += stake
+        if kind is not LedgerEntry.PAY_IN and kind is not LedgerEntry.ADJUST:
+            self.house_net -= amount + stake
+        if self.max_entries is not None and len(self.kinds) > self.max_entries:
+            self._discard(len(self.kinds) // 2)
+
+    def record_many(self, seats: Sequence[int], kind: LedgerEntry, amounts: Sequence[int],
+                    stakes: Sequence[int], account_ids: Sequence[int]):
+        """Append one entry of kind per seat in a single extend per column."""
+        n = len(seats)
+        self.hand_ids.extend([self.hand_id] * n)
+        self.seats.extend(seats)
+        self.kinds.extend([kind.value] * n)
+        self.amounts.extend(amounts)
+        self.stakes.extend(stakes)
+        self.account_ids.extend(self.__class__.NO_ACCOUNT if a is None else a for a in account_ids)
+        balances = self.balances
+        for seat, amount in zip(seats, amounts):
+            balances[seat] += amount
+        total_amount, total_stake = sum(amounts), sum(stakes)
+        self.stakes_held += total_stake
+        if kind is not LedgerEntry.PAY_IN and kind is not LedgerEntry.ADJUST:
+            self.house_net -= total_amount + total_stake
+        if self.max_entries is not None and len(self.kinds) > self.max_entries:
+            self._discard(len(self.kinds) // 2)
+
+    def _discard(self, count: int):
+        if self.keep_unflushed:
+            count = min(count, self.flushed)
+            if not count:
+                return
+        for column in (self.hand_ids, self.seats, self.kinds, self.amounts, self.stakes, self.account_ids):
+            del column[:count]
+        self.discarded += count
+        self.flushed = max(0, self.flushed - count)
+
+    def drop_flushed(self):
+        """Discard the entries already flushed; the running totals still include them."""
+        if self.flushed:
+            self._discard(self.flushed)
+
+    def check(self, players: Iterable['Player'], held: int):
+        """
+        Verify that every seat's chips and the cage's held stakes match the ledger.
+
+        :param players: The players in seat order.
+        :param held: Chips the cage currently holds in bets and insurance.
+        :raises ChipConservationError: On the first mismatch.
+        :return: True
+        """
+        for seat, player in enumerate(players):
+            if (player.chips or 0) != self.balances[seat]:
+                raise ChipConservationError(f"Seat {seat} holds {player.chips} chips, "
+                                            f"the ledger expects {self.balances[seat]}.")
+        if held != self.stakes_held:
+            raise ChipConservationError(f"Cage holds {held} chips in open bets, "
+                                        f"the ledger expects {self.stakes_held}.")
+        return True
+
+    def rows(self, start: int = 0) -> List[Tuple[int, int, int, int, int, int, Optional[int]]]:
+        """``(session_id, hand_id, seat, kind, amount, stake, account_id)`` for entries from start."""
+        no_account = self.__class__.NO_ACCOUNT
+        session_id = self.session_id
+        return [(session_id, h, s, k, a, st, None if acc == no_account else acc)
+                for h, s, k, a, st, acc in zip(self.hand_ids[start:], self.seats[start:], self.kinds[start:],
+                                                self.amounts[start:], self.stakes[start:],
+                                                self.account_ids[start:])]
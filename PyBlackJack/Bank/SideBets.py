@@ -0,0 +1,211 @@
+"""
+Side bets decided by the first cards of a hand.
+
+* ``TwentyOnePlusThree`` (21+3): the player's first two cards and the dealer's
+  upcard as a three-card poker hand: flush, straight, three of a kind, straight
+  flush or suited trips.
+* ``PerfectPairs``: the player's first two cards as a mixed pair (same rank, one
+  red and one black), a coloured pair (same colour, different suits) or a perfect
+  pair (same card).
+
+A hand is classified by one index into a table precomputed over card codes
+(52 x 52 entries for Perfect Pairs, 52 x 52 x 52 for 21+3), built the first time
+it is used, so settling a side bet costs the same whatever the cards.
+``odds()`` works out each outcome's exact chance for the next deal from the
+shoe's composition (card-code counts, see ``code_counts()``) by counting
+combinations, and ``expected_value()`` prices the bet from them.
+
+A ``HeadlessGame`` takes side bets with ``start_hand(bets, side_wagers=...)``;
+the Cage settles them as soon as the cards are dealt, before insurance and the
+dealer's peek.
+"""
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from Backend.card_codes import RANKS_PER_SUIT, SUIT_ORDER
+from Backend.enum import CardSuits
+
+CODES = RANKS_PER_SUIT * len(SUIT_ORDER)
+# outcome 0 of every side bet is a loss
+LOSE = 0
+# red suits by suit index, following CardSuits order
+RED_SUITS = frozenset(i for i, suit in enumerate(SUIT_ORDER) if suit in (CardSuits.HEART, CardSuits.DIAMOND))
+# three-card straights by rank index (ace 0, king 12); the ace plays low (A-2-3) or high (Q-K-A)
+STRAIGHTS = tuple((low, low + 1, low + 2) for low in range(RANKS_PER_SUIT - 2)) + ((0, 11, 12),)
+
+
+def code_counts(codes: Iterable[int]) -> Tuple[int, ...]:
+    """How many of each of the 52 card codes there are in codes."""
+    counts = [0] * CODES
+    for code in codes:
+        counts[code] += 1
+    return tuple(counts)
+
+
+class SideBet:
+    """
+    A side bet settled on the first cards dealt.
+
+    Subclasses set ``NAME``, ``OUTCOMES`` (outcome names, ``LOSE`` first) and
+    ``PAYS`` (what each outcome pays, to 1), and implement ``classify()``,
+    ``_build_table()`` and ``_combinations()``.
+
+    :ivar pays: What each outcome pays, to 1; the class's PAYS unless given.
+    :type pays: tuple[int, ...]
+    """
+    NAME = ''
+    OUTCOMES: Tuple[str, ...] = ('lose',)
+    PAYS: Tuple[int, ...] = (0,)
+    # cards the bet is decided on, and so drawn from the shoe in odds()
+    CARDS = 2
+
+    def __init__(self, pays: Optional[Sequence[int]] = None):
+        self.pays = tuple(pays) if pays is not None else self.__class__.PAYS
+        if len(self.pays) != len(self.__class__.OUTCOMES) or self.pays[LOSE] != 0:
+            raise ValueError(f"{self.__class__.NAME} pays one amount per outcome of "
+                             f"{', '.join(self.__class__.OUTCOMES)}, the first 0.")
+        self._table: Optional[bytes] = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(pays={self.pays})"
+
+    @property
+    def table(self) -> bytes:
+        """Outcome index per combination of card codes, built on first use."""
+        if self._table is None:
+            self._table = self._build_table()
+        return self._table
+
+    def _build_table(self) -> bytes:
+        raise NotImplementedError
+
+    def classify(self, player_codes: Sequence[int], upcard: int) -> int:
+        """The outcome index of a hand's first two card codes and the dealer's upcard code."""
+        raise NotImplementedError
+
+    def payout(self, stake: int, outcome: int) -> int:
+        """Chips returned for stake on outcome, the stake included; 0 when it lost."""
+        pays = self.pays[outcome]
+        return stake * (pays + 1) if pays else 0
+
+    def _combinations(self, counts: Sequence[int]) -> Sequence[int]:
+        """Ordered deals of CARDS cards from counts that make each winning outcome, by outcome index."""
+        raise NotImplementedError
+
+    def odds(self, counts: Sequence[int]) -> Dict[str, float]:
+        """
+        The chance of each outcome on the next deal from a shoe of counts.
+
+        :param counts: Cards left per card code, see ``code_counts()``.
+        :rtype: dict[str, float]
+        """
+        n = sum(counts)
+        deals = 1
+        for i in range(self.__class__.CARDS):
+            deals *= n - i
+        if deals <= 0:
+            raise ValueError(f"{self.__class__.NAME} needs {self.__class__.CARDS} cards, the shoe has {n}.")
+        winning = self._combinations(counts)
+        chances = {name: ways / deals for name, ways in zip(self.__class__.OUTCOMES[1:], winning[1:])}
+        return {self.__class__.OUTCOMES[LOSE]: 1.0 - sum(chances.values()), **chances}
+
+    def expected_value(self, counts: Sequence[int]) -> float:
+        """Expected chips won per chip staked on the next deal from a shoe of counts."""
+        odds = self.odds(counts)
+        lost = odds[self.__class__.OUTCOMES[LOSE]]
+        return sum(chance * pays for chance, pays in zip(odds.values(), self.pays)) - lost
+
+
+class PerfectPairs(SideBet):
+    NAME = 'perfect_pairs'
+    OUTCOMES = ('lose', 'mixed_pair', 'coloured_pair', 'perfect_pair')
+    PAYS = (0, 6, 12, 25)
+    MIXED_PAIR, COLOURED_PAIR, PERFECT_PAIR = 1, 2, 3
+
+    def _build_table(self) -> bytes:
+        cls = self.__class__
+        table = bytearray(CODES * CODES)
+        for first in range(CODES):
+            first_suit, first_rank = divmod(first, RANKS_PER_SUIT)
+            for second in range(CODES):
+                second_suit, second_rank = divmod(second, RANKS_PER_SUIT)
+                if first_rank != second_rank:
+                    continue
+                if first_suit == second_suit:
+                    table[first * CODES + second] = cls.PERFECT_PAIR
+                elif (first_suit in RED_SUITS) == (second_suit in RED_SUITS):
+                    table[first * CODES + second] = cls.COLOURED_PAIR
+                else:
+                    table[first * CODES + second] = cls.MIXED_PAIR
+        return bytes(table)
+
+    def classify(self, player_codes: Sequence[int], upcard: int = None) -> int:
+        return self.table[player_codes[0] * CODES + player_codes[1]]
+
+    def _combinations(self, counts: Sequence[int]) -> Sequence[int]:
+        perfect = coloured = same_rank = 0
+        for rank in range(RANKS_PER_SUIT):
+            by_suit = [counts[suit * RANKS_PER_SUIT + rank] for suit in range(len(SUIT_ORDER))]
+            total = sum(by_suit)
+            same_rank += total * (total - 1)
+            perfect += sum(n * (n - 1) for n in by_suit)
+            for red in (True, False):
+                colour = [n for suit, n in enumerate(by_suit) if (suit in RED_SUITS) == red]
+                coloured += sum(colour) ** 2 - sum(n * n for n in colour)
+        return 0, same_rank - perfect - coloured, coloured, perfect
+
+
+class TwentyOnePlusThree(SideBet):
+    NAME = '21+3'
+    OUTCOMES = ('lose', 'flush', 'straight', 'three_of_a_kind', 'straight_flush', 'suited_trips')
+    PAYS = (0, 5, 10, 30, 40, 100)
+    FLUSH, STRAIGHT, THREE_OF_A_KIND, STRAIGHT_FLUSH, SUITED_TRIPS = 1, 2, 3, 4, 5
+    CARDS = 3
+
+    def _build_table(self) -> bytes:
+        cls = self.__class__
+        straights = {tuple(sorted(ranks)) for ranks in STRAIGHTS}
+        # kinds worked out so far, by the three ranks and whether the suits match
+        rank_kinds = {}
+        table = bytearray(CODES ** 3)
+        index = 0
+        for a in range(CODES):
+            a_suit, a_rank = divmod(a, RANKS_PER_SUIT)
+            for b in range(CODES):
+                b_suit, b_rank = divmod(b, RANKS_PER_SUIT)
+                for c in range(CODES):
+                    c_suit, c_rank = divmod(c, RANKS_PER_SUIT)
+                    suited = a_suit == b_suit == c_suit
+                    key = (a_rank, b_rank, c_rank, suited)
+                    kind = rank_kinds.get(key)
+                    if kind is None:
+                        ranks = tuple(sorted((a_rank, b_rank, c_rank)))
+                        if ranks[0] == ranks[2]:
+                            kind = cls.SUITED_TRIPS if suited else cls.THREE_OF_A_KIND
+                        elif ranks in straights:
+                            kind = cls.STRAIGHT_FLUSH if suited else cls.STRAIGHT
+                        else:
+                            kind = cls.FLUSH if suited else LOSE
+                        rank_kinds[key] = kind
+                    table[index] = kind
+                    index += 1
+        return bytes(table)
+
+    def classify(self, player_codes: Sequence[int], upcard: int) -> int:
+        return self.table[(player_codes[0] * CODES + player_codes[1]) * CODES + upcard]
+
+    def _combinations(self, counts: Sequence[int]) -> Sequence[int]:
+        suits = range(len(SUIT_ORDER))
+        by_rank = [[counts[suit * RANKS_PER_SUIT + rank] for suit in suits] for rank in range(RANKS_PER_SUIT)]
+        suited_trips = sum(n * (n - 1) * (n - 2) for ranks in by_rank for n in ranks)
+        trips = sum(t * (t - 1) * (t - 2) for t in map(sum, by_rank)) - suited_trips
+        # three different ranks can be dealt in 3! orders
+        straight_flush = sum(6 * by_rank[a][suit] * by_rank[b][suit] * by_rank[c][suit]
+                             for a, b, c in STRAIGHTS for suit in suits)
+        rank_totals = [sum(ranks) for ranks in by_rank]
+        straight = sum(6 * rank_totals[a] * rank_totals[b] * rank_totals[c] for a, b, c in STRAIGHTS) - straight_flush
+        suit_totals = [sum(counts[suit * RANKS_PER_SUIT:(suit + 1) * RANKS_PER_SUIT]) for suit in suits]
+        flush = sum(f * (f - 1) * (f - 2) for f in suit_totals) - straight_flush - suited_trips
+        return 0, flush, straight, trips, straight_flush, suited_trips
+
+
+SIDE_BETS = {bet.NAME: bet for bet in (TwentyOnePlusThree(), PerfectPairs())}
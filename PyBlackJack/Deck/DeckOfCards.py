@@ -1,7 +1,13 @@
 import itertools
 import random
+from typing import Iterable
+
+from Backend.card_codes import HI_LO_TAGS, card_code, decode
 from Backend.enum import CardSuits, CardValues
+from Backend.output import default_sink
 from Backend.settings import Settings
+from PyBlackJack.Deck.ShufflePolicies import ReshufflePolicy, parse_reshuffle_policy
+from PyBlackJack.rng import StreamRNG
 
 
 # TODO: use settings class
@@ -54,7 +60,8 @@ class Cards:
     PLAINTEXT_CARD_BACK = 'xxxx'
 
     def __init__(self, ** kwargs):#, use_unicode=True, card_back: str = None):
-        self.settings = kwargs.pop('settings', Settings())
+        # only build a Settings (and re-read the config) when none was passed
+        self.settings = kwargs.pop('settings', None) or Settings()
         # noinspection PyTypeChecker
         self.card_back = kwargs.get('card_back', None)
         self.suit = []
@@ -92,26 +99,70 @@ class Deck(Cards):
 
     This class is designed to create, manage, and manipulate a deck of cards.
     It provides functionality to shuffle, draw, and reload the deck, ensuring
-    that the deck's state and integrity are properly maintained.
+    that the deck's state and integrity are properly maintained. Between hands
+    the ``reshuffle_policy`` decides when the shoe is refilled in place and
+    reshuffled; nothing prompts for it.
 
     :ivar deck: A list representing the current deck of cards, created as
-        combinations of card values and suits.
+        combinations of card values and suits, once per deck in the shoe.
     :type deck: list
+    :ivar cut_card: Cards left in the shoe when the cut card comes out.
+    :type cut_card: int
+    :ivar running_count: Hi-Lo running count of the cards drawn since the shoe was built.
+    :type running_count: int
+    :ivar rng: Source of shuffles; pass ``rng`` (a ``random.Random``, e.g. one stream of a
+        ``StreamRNG``) or ``seed`` (for a StreamRNG of its own) to make shuffles repeatable.
+        Defaults to the ``random`` module.
+    :ivar output: Where the low-shoe warning goes. Defaults to ``default_sink()``.
+    :type output: OutputSink
+    :ivar reshuffle_policy: When to reshuffle between hands; pass ``reshuffle`` to override
+        the ``[DECK] reshuffle`` setting.
+    :type reshuffle_policy: ReshufflePolicy
+    :ivar hands_since_shuffle: Hands started on the shoe since it was last shuffled or loaded.
+    :type hands_since_shuffle: int
     """
 
     DEFAULT_SHOE_RUNOUT_WARNING_THRESHOLD = 15
     def __init__(self, **kwargs):
-        self.settings = kwargs.pop('settings', Settings())
+        self.settings = kwargs.pop('settings', None) or Settings()
         self.shoe_runout_warning_threshold = kwargs.pop('shoe_runout_warning_threshold',
                                                         self.settings.shoe_runout_warning_threshold)
                                                         #Deck.DEFAULT_SHOE_RUNOUT_WARNING_THRESHOLD)
-        super().__init__(**kwargs)
-        self.deck = list(itertools.product(self.value, self.suit))
+        self.output = kwargs.pop('output', None) or getattr(self, 'output', None) or default_sink()
+        seed = kwargs.pop('seed', None)
+        # kept across reload_deck's re-init so a seeded shoe stays on its sequence
+        self.rng = (kwargs.pop('rng', None) or (StreamRNG(seed) if seed is not None else None)
+                    or getattr(self, 'rng', random))
+        self.reshuffle_policy: ReshufflePolicy = (kwargs.pop('reshuffle', None)
+                                                  or getattr(self, 'reshuffle_policy', None)
+                                                  or parse_reshuffle_policy(self.settings.reshuffle))
+        rules = self.settings.rules
+        self.decks = kwargs.pop('decks', rules.decks)
+        super().__init__(settings=self.settings, **kwargs)
+        # the unshuffled full shoe, copied back into deck by refill()
+        self._full_shoe = tuple(itertools.product(self.value, self.suit)) * self.decks
+        self.deck = list(self._full_shoe)
+        # card code -> (value, suit) in this deck's suit representation
+        self._cards_by_code = tuple((value, self.suit[suit_index])
+                                    for value, suit_index in map(decode, range(len(self.value) * len(self.suit))))
+        self.cut_card = (rules.cut_card if self.decks == rules.decks
+                         else len(self.deck) - int(len(self.deck) * rules.penetration))
+        self.running_count = 0
+        self.hands_since_shuffle = 0
 
     @property
     def is_running_low(self):
         return len(self.deck) <= self.shoe_runout_warning_threshold
 
+    @property
+    def true_count(self) -> float:
+        """Running count per deck left in the shoe."""
+        return self.running_count * 52 / len(self.deck) if self.deck else float(self.running_count)
+
+    @property
+    def is_past_cut_card(self):
+        return len(self.deck) <= self.cut_card
+
     @property
     def is_empty(self):
         return len(self.deck) <= 0
@@ -128,9 +179,32 @@ class Deck(Cards):
         :return: The shuffled list of cards.
         :rtype: list
         """
-        random.shuffle(self.deck)
+        self.rng.shuffle(self.deck)
+        return self.deck
+
+    def codes(self) -> bytes:
+        """The cards left in the shoe as card codes, top card first."""
+        return bytes(map(card_code, self.deck))
+
+    def load_codes(self, codes: Iterable[int]):
+        """
+        Replace the shoe with the given card codes, top card first, and reset the count.
+
+        Lets several tables be dealt the exact same shoe, e.g. one pre-generated by ``codes()``.
+
+        :return: The loaded deck of cards.
+        :rtype: list
+        """
+        self.deck[:] = self.cards_for(codes)
+        self.running_count = 0
+        self.hands_since_shuffle = 0
         return self.deck
 
+    def cards_for(self, codes: Iterable[int]) -> list:
+        """The ``(value, suit)`` cards for card codes, in this deck's suit representation."""
+        cards = self._cards_by_code
+        return [cards[code] for code in codes]
+
     def draw(self):
         """
         Draws the top card from the deck.
@@ -144,33 +218,51 @@ class Deck(Cards):
         :return: The top card of the deck.
         """
         if self.is_running_low:
-            print(f"{len(self.deck)} cards left to draw from.")
+            self.output.warning("%d cards left to draw from.", len(self.deck))
         if self.is_empty:
             raise EmptyShoeError("Deck has run out of cards")
         else:
-            return self.deck.pop(0)
+            card = self.deck.pop(0)
+            self.running_count += HI_LO_TAGS[card[0]]
+            return card
 
-    def reload_deck(self):
+    def refill(self):
         """
-        Reloads the deck of cards by reinitializing and shuffling it, or raises an
-        exception if the user indicates not to reload the deck.
+        Put every card back into the shoe and shuffle it, resetting the count.
 
-        This method keeps prompting the user to choose whether to reload the deck
-        or not. If the user chooses to reload the deck, the deck is reinitialized
-        and shuffled. If the user chooses not to reload, an EmptyShoeError is raised.
-        Invalid inputs are ignored, and the prompt repeats until a valid response
-        is provided.
+        The shoe's list is refilled in place from the full shoe built with the deck,
+        so nothing is rebuilt from the settings.
+
+        :return: The refilled and shuffled deck of cards.
+        :rtype: list
+        """
+        self.deck[:] = self._full_shoe
+        self.running_count = 0
+        self.hands_since_shuffle = 0
+        return self.shuffle_deck()
+
+    def reshuffle_due(self, reserve: int = 0) -> bool:
+        """
+        Whether the shoe should be reshuffled before the next hand: the policy says so,
+        or no more than ``reserve`` cards are left to deal it from.
+        """
+        return len(self.deck) <= reserve or self.reshuffle_policy.should_reshuffle(self)
+
+    def reshuffle_if_due(self, reserve: int = 0) -> bool:
+        """Refill and shuffle the shoe if ``reshuffle_due(reserve)``; True if it was."""
+        if not self.reshuffle_due(reserve):
+            return False
+        self.refill()
+        return True
+
+    def hand_started(self):
+        """Called as each hand is dealt from the shoe, for policies that count hands."""
+        self.hands_since_shuffle += 1
+
+    def reload_deck(self):
+        """
+        Refills and reshuffles the shoe in place; see ``refill()``.
 
-        :raises EmptyShoeError: If the user declines to reload the deck.
         :return: The reloaded and shuffled deck of cards.
         """
-        while True:
-            r = input("Would you like to reload the deck? (y/n): ").lower()
-            if r == 'y':
-                self.__init__()
-                self.shuffle_deck()
-                return self.deck
-            elif r == 'n':
-                raise EmptyShoeError("Deck has run out of cards")
-            else:
-                pass
\ No newline at end of file
+        return self.refill()
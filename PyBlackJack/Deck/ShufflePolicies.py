@@ -0,0 +1,72 @@
+"""
+When a shoe is refilled and reshuffled between hands.
+
+A ``Deck`` asks its ``reshuffle_policy`` before each hand; when it says so the
+deck refills itself in place from the full shoe it was built with and shuffles
+(see ``Deck.refill()``). The policy is set with the ``[DECK] reshuffle`` config
+key, read by ``parse_reshuffle_policy()``:
+
+* ``cut_card`` (the default): once the cut card has come out.
+* ``continuous``: before every hand, like a continuous shuffling machine that gets
+  the discards back after each round.
+* a number of hands, e.g. ``5``: after that many hands, or earlier at the cut card.
+"""
+
+
+class ReshufflePolicy:
+    """
+    Decides whether a shoe is reshuffled before the next hand.
+
+    Subclasses implement ``should_reshuffle()``; it is only asked between hands,
+    so it may be asked more than once before the same hand.
+    """
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def should_reshuffle(self, deck) -> bool:
+        raise NotImplementedError
+
+
+class CutCardReshuffle(ReshufflePolicy):
+    def should_reshuffle(self, deck) -> bool:
+        return deck.is_past_cut_card
+
+
+class ContinuousShuffle(ReshufflePolicy):
+    def should_reshuffle(self, deck) -> bool:
+        # a fresh shoe needs no second shuffle before its first hand
+        return deck.hands_since_shuffle > 0
+
+
+class EveryNHands(ReshufflePolicy):
+    """Reshuffles every ``hands`` hands, or at the cut card if that comes first."""
+    def __init__(self, hands: int):
+        if hands < 1:
+            raise ValueError(f"A shoe is reshuffled every 1 or more hands, not {hands}.")
+        self.hands = hands
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.hands})"
+
+    def should_reshuffle(self, deck) -> bool:
+        return deck.hands_since_shuffle >= self.hands or deck.is_past_cut_card
+
+
+RESHUFFLE_POLICIES = {'cut_card': CutCardReshuffle, 'continuous': ContinuousShuffle}
+
+
+def parse_reshuffle_policy(text: str) -> ReshufflePolicy:
+    """
+    A policy from its config value: ``cut_card``, ``continuous`` or a number of hands.
+
+    :raises ValueError: If text is none of those.
+    """
+    text = text.strip().lower()
+    if text in RESHUFFLE_POLICIES:
+        return RESHUFFLE_POLICIES[text]()
+    try:
+        hands = int(text)
+    except ValueError:
+        raise ValueError(f"reshuffle must be one of {', '.join(RESHUFFLE_POLICIES)} or a number of hands, "
+                         f"not '{text}'.") from None
+    return EveryNHands(hands)
@@ -0,0 +1,161 @@
+from array import array
+from typing import List
+
+from Backend.card_codes import CARD_POINTS
+
+
+class HandLimitError(Exception):
+    """Raised when a split would need more hands than a HandTree has slots for."""
+    ...
+
+
+class HandTree:
+    """
+    All of one seat's hands for a round, stored in preallocated flat arrays.
+
+    Hand 0 is the hand that was dealt. Splitting hand ``i`` moves its second card
+    into the next free slot and records ``i`` as that slot's parent, so resplits
+    grow a tree without allocating: cards are integer card codes in one
+    ``MAX_HANDS * MAX_CARDS`` array and every per-hand field (card count, bet,
+    flags, running total) is a fixed-size array indexed by hand. ``reset()``
+    reuses the same arrays for the next round.
+
+    :cvar MAX_HANDS: Hand slots per seat, i.e. the original hand plus three resplits.
+    :cvar MAX_CARDS: Card slots per hand; a hand busts before it can hold more.
+    :ivar n_hands: Number of hand slots in use this round.
+    :type n_hands: int
+    :ivar insurance: Chips staked on insurance this round.
+    :type insurance: int
+    """
+    MAX_HANDS = 4
+    # twenty-one aces is still 21, the next card busts
+    MAX_CARDS = 22
+
+    DOUBLED = 1
+    SURRENDERED = 2
+    SPLIT_ACES = 4
+    DONE = 8
+
+    def __init__(self):
+        cls = self.__class__
+        self.cards = array('b', [-1]) * (cls.MAX_HANDS * cls.MAX_CARDS)
+        self.counts = array('B', [0]) * cls.MAX_HANDS
+        self.bets = array('q', [0]) * cls.MAX_HANDS
+        self.flags = array('B', [0]) * cls.MAX_HANDS
+        self.parents = array('b', [-1]) * cls.MAX_HANDS
+        # hard total (aces as 1) and ace count, kept up to date on every card
+        self.hard_totals = array('B', [0]) * cls.MAX_HANDS
+        self.aces = array('B', [0]) * cls.MAX_HANDS
+        self.n_hands = 0
+        self.insurance = 0
+
+    def reset(self):
+        for hand in range(self.n_hands):
+            self.counts[hand] = self.bets[hand] = self.flags[hand] = 0
+            self.hard_totals[hand] = self.aces[hand] = 0
+            self.parents[hand] = -1
+        self.n_hands = 0
+        self.insurance = 0
+
+    def new_hand(self, bet: int, parent: int = -1) -> int:
+        hand = self.n_hands
+        if hand >= self.__class__.MAX_HANDS:
+            raise HandLimitError(f"No more than {self.__class__.MAX_HANDS} hands per seat.")
+        self.bets[hand] = bet
+        self.parents[hand] = parent
+        self.n_hands += 1
+        return hand
+
+    def add(self, hand: int, code: int):
+        count = self.counts[hand]
+        self.cards[hand * self.__class__.MAX_CARDS + count] = code
+        self.counts[hand] = count + 1
+        points = CARD_POINTS[code]
+        self.hard_totals[hand] += points
+        if points == 1:
+            self.aces[hand] += 1
+
+    def codes(self, hand: int) -> List[int]:
+        base = hand * self.__class__.MAX_CARDS
+        return self.cards[base:base + self.counts[hand]].tolist()
+
+    def total(self, hand: int) -> int:
+        hard = self.hard_totals[hand]
+        return hard + 10 if self.aces[hand] and hard <= 11 else hard
+
+    def is_soft(self, hand: int) -> bool:
+        return bool(self.aces[hand]) and self.hard_totals[hand] <= 11
+
+    def is_busted(self, hand: int) -> bool:
+        return self.hard_totals[hand] > 21
+
+    def is_blackjack(self, hand: int) -> bool:
+        """A two-card 21 on the dealt hand; 21 on a split hand is not a natural."""
+        return self.n_hands == 1 and self.counts[hand] == 2 and self.total(hand) == 21
+
+    def is_done(self, hand: int) -> bool:
+        return bool(self.flags[hand] & self.__class__.DONE)
+
+    def finish(self, hand: int):
+        self.flags[hand] |= self.__class__.DONE
+
+    def next_open(self, start: int = 0) -> int:
+        """The first hand at or after start still to be played, or -1."""
+        for hand in range(start, self.n_hands):
+            if not self.flags[hand] & self.__class__.DONE:
+                return hand
+        return -1
+
+    def _first_two_points(self, hand: int):
+        base = hand * self.__class__.MAX_CARDS
+        return CARD_POINTS[self.cards[base]], CARD_POINTS[self.cards[base + 1]]
+
+    def can_split(self, hand: int) -> bool:
+        if self.counts[hand] != 2 or self.n_hands >= self.__class__.MAX_HANDS:
+            return False
+        if self.flags[hand] & self.__class__.SPLIT_ACES:
+            return False
+        first, second = self._first_two_points(hand)
+        return first == second
+
+    def can_double(self, hand: int) -> bool:
+        return self.counts[hand] == 2 and not self.flags[hand] & self.__class__.SPLIT_ACES
+
+    def can_surrender(self, hand: int) -> bool:
+        return self.n_hands == 1 and self.counts[hand] == 2
+
+    def split(self, hand: int) -> int:
+        """
+        Move the second card of hand into a new hand with the same bet.
+
+        :return: The index of the new hand. Both hands hold one card until dealt to.
+        """
+        if not self.can_split(hand):
+            raise ValueError("Only an unsplit-aces pair can be split.")
+        new = self.new_hand(self.bets[hand], parent=hand)
+        max_cards = self.__class__.MAX_CARDS
+        code = self.cards[hand * max_cards + 1]
+        self.counts[hand] = 1
+        self.hard_totals[hand] -= CARD_POINTS[code]
+        if CARD_POINTS[code] == 1:
+            self.aces[hand] -= 1
+            self.flags[hand] |= self.__class__.SPLIT_ACES
+            self.flags[new] |= self.__class__.SPLIT_ACES
+        self.add(new, code)
+        return new
+
+    def double(self, hand: int):
+        self.bets[hand] *= 2
+        self.flags[hand] |= self.__class__.DOUBLED
+
+    def surrender(self, hand: int):
+        self.flags[hand] |= self.__class__.SURRENDERED | self.__class__.DONE
+
+    def is_doubled(self, hand: int) -> bool:
+        return bool(self.flags[hand] & self.__class__.DOUBLED)
+
+    def is_surrendered(self, hand: int) -> bool:
+        return bool(self.flags[hand] & self.__class__.SURRENDERED)
+
+    def is_split_aces(self, hand: int) -> bool:
+        return bool(self.flags[hand] & self.__class__.SPLIT_ACES)
@@ -2,13 +2,15 @@ from pathlib import Path
 from typing import List, Tuple
 
 import unicodedata
-import random
 from os import system
 
 from Backend import yes_no
 from Backend.settings import Settings, PyGameSettings
 from Backend.PlayerCashRecordDB import PyBlackJackSQLLite, PlayerDoesNotExistError
 from Backend.enum import FaceCard
+from Backend.output import INFO, default_sink
+from Backend.card_codes import card_code
+from PyBlackJack.Players.Hands import HandTree
 
 class Player:
     """
@@ -31,13 +33,19 @@ class Player:
     :type has_bet: bool
     :ivar chips: The total chips the player currently has.
     :type chips: int
+    :ivar hands: The seat's hands for the round, including splits, as used by the headless engine.
+    :type hands: HandTree
+    :ivar output: Where the hand and bankruptcy messages go. Defaults to ``default_sink()``.
+    :type output: OutputSink
     """
 
     BANKRUPT_BUY_IN_TEXT = "Player is bankrupt. Would you like to buy back in and play again?"
 
     def __init__(self, player_chips: int = None, **kwargs):
         # TODO: implement more?
-        self.settings = kwargs.get('settings', Settings())
+        # re-initializing between hands keeps the existing settings instead of re-reading the config
+        self.settings = kwargs.get('settings') or getattr(self, 'settings', None) or Settings()
+        self.output = kwargs.get('output') or getattr(self, 'output', None) or default_sink()
         self.hand = []
         self.chips = player_chips
         self.last_move = None
@@ -45,6 +53,9 @@ class Player:
         self.bet_amount: int = 0
         self.has_bet = False
         self.needs_pay_in = False
+        # preallocated once per player and cleared for every hand
+        self.hands = getattr(self, 'hands', None) or HandTree()
+        self.hands.reset()
 
     def bankrupt(self):
         """
@@ -66,7 +77,7 @@ class Player:
                 self.needs_pay_in = True
                 return self.needs_pay_in
 
-        print(f"Player {self.player_display_name} is bankrupt! goodbye!")
+        self.output.info("Player %s is bankrupt! goodbye!", self.player_display_name)
         system("pause")
         exit(0)
 
@@ -140,8 +151,11 @@ class Player:
 
         :return: None
         """
+        if not self.output.enabled(INFO):
+            return
         print_hand = self.get_print_hand(self.hand)
-        print(f"Player {self.player_display_name}: {print_hand} {self.get_hand_total_value_string()}")
+        self.output.info("Player %s: %s %s", self.player_display_name, print_hand,
+                         self.get_hand_total_value_string())
 
     @staticmethod
     def _ace_eval(value_list: list):
@@ -178,6 +192,11 @@ class Player:
         value = self._ace_eval(value)
         return sum(value)
 
+    def is_soft_hand(self):
+        """True if the hand holds an ace that is counted as 11."""
+        hard = sum(min(c[0], 10) for c in self.hand)
+        return hard <= 11 and any(c[0] == 1 for c in self.hand)
+
 
 class Dealer(Player):
     """
@@ -194,8 +213,8 @@ class Dealer(Player):
     :type hidden_hand: list
     """
 
-    def __init__(self, chosen_card_back, player_chips: int = None):
-        super().__init__(player_chips)
+    def __init__(self, chosen_card_back, player_chips: int = None, **kwargs):
+        super().__init__(player_chips, **kwargs)
         self.hidden_hand = []
         self.chosen_card_back = chosen_card_back
 
@@ -213,8 +232,10 @@ class Dealer(Player):
         :return: None
         :rtype: None
         """
+        if not self.output.enabled(INFO):
+            return
         print_hand = self.get_print_hand(self.hidden_hand)
-        print(f"{self.player_display_name}: {print_hand}")
+        self.output.info("%s: %s", self.player_display_name, print_hand)
 
     def hidden_hand_setup(self):
         """
@@ -254,36 +275,25 @@ class Dealer(Player):
         :return: None
         :rtype: NoneType
         """
+        if not self.output.enabled(INFO):
+            return
         print_hand = self.get_print_hand(self.hand)
-        print(f"{self.player_display_name}: {print_hand} {self.get_hand_total_value_string()}")
+        self.output.info("%s: %s %s", self.player_display_name, print_hand, self.get_hand_total_value_string())
 
     def should_stay(self):
         """
-        Determines whether the player should stay based on the current hand value and
-        a degree of randomness.
-
-        This method evaluates the player's hand value and decides if the player should
-        stay in the current game. When the hand value is greater than or equal to 15,
-        a randomized decision-making element is introduced with an approximately 50/50
-        chance. Similarly, if the hand value is less than or equal to 16, the decision
-        is randomized but more likely false. Otherwise, when the hand value doesn't
-        fall within these ranges, the decision will default to staying in the game.
+        Determines whether the dealer should stay, following the table rules.
 
-        :raises TypeError: If the hand value or randomness has unexpected types.
+        The decision is a lookup in the compiled dealer policy table of the
+        settings' RuleSet, indexed by whether the hand is soft and its value,
+        so it honours the configured S17/H17 rule.
 
-        :return: A boolean value indicating whether the player should stay in the game.
-                 True to stay, False otherwise. The decision may include elements of
-                 randomness.
+        :return: True to stay, False to hit.
         :rtype: bool
         """
-        if self.get_hand_value() >= 15:
-            # this should be True without randomness
-            return bool(random.Random().randint(1, 100) % 2)
-        elif self.get_hand_value() <= 16:
-            # this should be False without randomness
-            return bool(random.Random().randint(1, 100) % 2)
-        else:
-            return True
+        dealer_hits = self.settings.rules.dealer_hits
+        value = self.get_hand_value()
+        return value >= len(dealer_hits[0]) or not dealer_hits[self.is_soft_hand()][value]
 
 
 class DatabasePlayer(Player):
@@ -308,7 +318,8 @@ class DatabasePlayer(Player):
     """
 
     def __init__(self, player_id=None, player_name=None, **kwargs):
-        self.settings = kwargs.get('settings', Settings())
+        self.settings = kwargs.get('settings') or getattr(self, 'settings', None) or Settings()
+        self.output = kwargs.get('output') or getattr(self, 'output', None) or default_sink()
         self.account_balance = None
         self.player_name = player_name
         self.account_id = None
@@ -316,7 +327,7 @@ class DatabasePlayer(Player):
         if all([self.player_id, self.player_name]):
             raise AttributeError("Cannot initialize with both player_id and player_name.")
 
-        self.db = PyBlackJackSQLLite()
+        self.db = PyBlackJackSQLLite(output=self.output)
         self.db.GetConnectionAndCursor()
 
         self.get_player()
@@ -367,7 +378,7 @@ class DatabasePlayer(Player):
             if name.isalpha():
                 return name
             else:
-                print("Please enter a valid name.")
+                default_sink().info("Please enter a valid name.")
 
     def build_player_dict(self):
         if yes_no("Player does not exist in database. Would you like to create a new player?"):
@@ -380,8 +391,10 @@ class DatabasePlayer(Player):
 
 class PyGamePlayer(Player):
     def __init__(self, player_chips: int = None, **kwargs):
-        super().__init__(player_chips)
-        self.settings = kwargs.get('settings', PyGameSettings())
+        settings = kwargs.get('settings') or getattr(self, 'settings', None)
+        if not isinstance(settings, PyGameSettings):
+            settings = PyGameSettings()
+        super().__init__(player_chips, settings=settings, output=kwargs.get('output'))
 
     @staticmethod
     def extract_suit_name(unicode_char):
@@ -396,17 +409,19 @@ class PyGamePlayer(Player):
         except Exception:
             return  None # If renderer cannot be imported, silently do nothing
 
-    def print_hand(self, screen=None, start_xy=(10, 10), target_height: int = 180, x_spacing: int = 28):
+    def print_hand(self, screen=None, start_xy=(10, 10), target_height: int = 180, x_spacing: int = 28,
+                   skip_cards=()):
         """Draw this player's hand to the provided pygame screen.
 
         This uses the PNG card renderer to draw the player's current hand.
-        Public API mirrors prior draw_hand usage.
+        Public API mirrors prior draw_hand usage; skip_cards leaves those slots empty.
         """
         _draw_hand = self._import_card_renderer()
         try:
             card_paths = self.get_translated_hand()
             if screen is not None:
-                _draw_hand(screen, card_paths, start_xy, target_height=target_height, x_spacing=x_spacing)
+                _draw_hand(screen, card_paths, start_xy, target_height=target_height, x_spacing=x_spacing,
+                           skip_cards=skip_cards)
         except Exception:
             # Fail-safe: don't let rendering issues crash gameplay
             pass
@@ -423,10 +438,7 @@ class PyGamePlayer(Player):
 
     def translate_card(self, card: tuple) -> Path:
         """Translate a single card into its corresponding image path."""
-        value, suit_unicode = card
-        suit_name = self.extract_suit_name(suit_unicode)
-        card_path_key = self._get_card_tuple((value, suit_name))
-        return self.settings.card_image_path_list[card_path_key]
+        return self.settings.card_image_paths_by_code[card_code(card)]
 
 
 class PyGameDealer(Dealer, PyGamePlayer):
@@ -448,22 +460,26 @@ class PyGameDealer(Dealer, PyGamePlayer):
             paths = lead + [self.translate_card(c) for c in remaining]
         return paths
 
+    def get_hand_card_paths(self, reveal_all: bool = True, card_back_path: Path = None) -> List[Path]:
+        return self._get_hand_card_paths(reveal_all, self._get_cardback_path(card_back_path))
+
     def print_hand(self, screen=None, start_xy=(10, 10), target_height: int = 180, x_spacing: int = 28,
-                   reveal_all: bool = True, card_back_path: Path = None):
+                   reveal_all: bool = True, card_back_path: Path = None, skip_cards=()):
         """Draw the dealer's hand, optionally hiding the first card.
 
         Parameters:
         - reveal_all: if False, the first card is drawn as a card back image.
         - card_back_path: optional explicit path to the card back image; if not provided,
           will try to use self.settings.card_back_location if available.
+        - skip_cards: indices whose slots are left empty (cards still being animated in).
         """
         _draw_hand = self._import_card_renderer()
         try:
-            card_back_path = self._get_cardback_path(card_back_path)
-            paths = self._get_hand_card_paths(reveal_all, card_back_path)
+            paths = self.get_hand_card_paths(reveal_all, card_back_path)
 
             if screen is not None:
-                _draw_hand(screen, paths, start_xy, target_height=target_height, x_spacing=x_spacing)
+                _draw_hand(screen, paths, start_xy, target_height=target_height, x_spacing=x_spacing,
+                           skip_cards=skip_cards)
         except Exception:
             pass
 
@@ -0,0 +1,214 @@
+"""
+Streaming statistics for simulations.
+
+Every accumulator here takes one value at a time in constant memory and has a
+``merge()`` that folds in another accumulator of the same shape, so each worker
+process can keep its own and the parent combines them. Counts, extremes and
+histogram bins merge exactly; means and variances merge with Chan's pairwise
+update, which equals one pass over all values up to float rounding.
+"""
+import math
+from array import array
+from typing import Iterable, Optional
+
+from Backend.enum import HandOutcome
+
+# hand outcomes in a fixed order, so counts are one array index
+OUTCOME_ORDER = tuple(HandOutcome)
+OUTCOME_INDEX = {outcome: i for i, outcome in enumerate(OUTCOME_ORDER)}
+
+
+class RunningStats:
+    """
+    Count, mean, variance (Welford's update), min and max of a stream of numbers.
+
+    :ivar count: Values added.
+    :type count: int
+    :ivar mean: Mean of the values added.
+    :type mean: float
+    """
+    __slots__ = ('count', 'mean', 'm2', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # sum of squared differences from the mean
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(count={self.count}, mean={self.mean:.6g}, "
+                f"stdev={self.stdev:.6g}, min={self.minimum}, max={self.maximum})")
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def extend(self, values: Iterable):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Sample variance; 0 with fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def standard_error(self) -> float:
+        return self.stdev / math.sqrt(self.count) if self.count else 0.0
+
+
+class Histogram:
+    """
+    Counts of values in ``bins`` equal-width bins over ``[low, high)``.
+
+    Values below ``low`` or at/above ``high`` are counted in ``underflow`` and
+    ``overflow`` rather than dropped.
+
+    :ivar counts: Count per bin.
+    :type counts: array
+    """
+    __slots__ = ('low', 'high', 'bins', 'width', 'counts', 'underflow', 'overflow')
+
+    def __init__(self, low: float, high: float, bins: int):
+        if not high > low or bins < 1:
+            raise ValueError(f"A histogram needs high > low and at least one bin, not [{low}, {high}) in {bins}.")
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.width = (high - low) / bins
+        self.counts = array('q', [0]) * bins
+        self.underflow = 0
+        self.overflow = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(low={self.low}, high={self.high}, bins={self.bins}, total={self.total})"
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts) + self.underflow + self.overflow
+
+    def add(self, value):
+        if value < self.low:
+            self.underflow += 1
+        elif value >= self.high:
+            self.overflow += 1
+        else:
+            self.counts[min(int((value - self.low) / self.width), self.bins - 1)] += 1
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        if (other.low, other.high, other.bins) != (self.low, self.high, self.bins):
+            raise ValueError(f"Can't merge {other!r} into {self!r}: the bins differ.")
+        counts = self.counts
+        for i, count in enumerate(other.counts):
+            counts[i] += count
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def edges(self):
+        """``(low, high)`` of each bin."""
+        return [(self.low + i * self.width, self.low + (i + 1) * self.width) for i in range(self.bins)]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the q-quantile, interpolating linearly within its bin.
+
+        Quantiles that fall in the underflow or overflow are reported as ``low`` or ``high``.
+        """
+        total = self.total
+        if not total:
+            return None
+        target = q * total
+        seen = self.underflow
+        if target <= seen:
+            return self.low
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                return self.low + (i + (target - seen) / count) * self.width
+            seen += count
+        return self.high
+
+
+class HandStats:
+    """
+    Per-hand results of one seat: net chips, outcome counts, and final totals.
+
+    Fed from a HeadlessGame after each settled hand with ``record(game, seat)``.
+
+    :ivar net: Chips won or lost per round.
+    :type net: RunningStats
+    :ivar outcomes: Count per outcome, in OUTCOME_ORDER; a split round counts each hand.
+    :type outcomes: array
+    :ivar player_totals: Final totals of the seat's hands (busts land above 21).
+    :type player_totals: Histogram
+    :ivar dealer_totals: The dealer's final totals.
+    :type dealer_totals: Histogram
+    :ivar bankroll: The seat's chips after each round.
+    :type bankroll: Histogram
+    """
+    # totals 2..30; a hard 20 plus a ten is the largest bust
+    TOTAL_RANGE = (2, 31)
+
+    def __init__(self, bankroll_range=(0, 2000), bankroll_bins: int = 40):
+        low, high = self.__class__.TOTAL_RANGE
+        self.net = RunningStats()
+        self.outcomes = array('q', [0]) * len(OUTCOME_ORDER)
+        self.player_totals = Histogram(low, high, high - low)
+        self.dealer_totals = Histogram(low, high, high - low)
+        self.bankroll = Histogram(bankroll_range[0], bankroll_range[1], bankroll_bins)
+
+    def record(self, game, seat: int = 0):
+        """Add the last settled round of ``seat``; rounds the seat sat out are skipped."""
+        outcomes = game.outcomes[seat]
+        if not outcomes:
+            return
+        player = game.players[seat]
+        hands = player.hands
+        self.net.add(game.seat_nets[seat])
+        for hand, outcome in enumerate(outcomes):
+            self.outcomes[OUTCOME_INDEX[outcome]] += 1
+            self.player_totals.add(hands.total(hand))
+        self.dealer_totals.add(game.dealer.get_hand_value())
+        self.bankroll.add(player.chips)
+
+    def merge(self, other: 'HandStats') -> 'HandStats':
+        self.net.merge(other.net)
+        for i, count in enumerate(other.outcomes):
+            self.outcomes[i] += count
+        self.player_totals.merge(other.player_totals)
+        self.dealer_totals.merge(other.dealer_totals)
+        self.bankroll.merge(other.bankroll)
+        return self
+
+    def outcome_rates(self):
+        """Share of hands per outcome."""
+        total = sum(self.outcomes)
+        return {outcome: (self.outcomes[i] / total if total else 0.0) for i, outcome in enumerate(OUTCOME_ORDER)}
@@ -0,0 +1,201 @@
+#! python3
+"""
+Evaluate several bet policies over the same shoes in one pass.
+
+How a hand is played does not depend on how much is bet on it, so each hand is
+dealt and played once at a base bet, and every policy's bankroll is then moved
+by its own bet times that hand's result. All policies see the same shoes and
+counts, and the deal work is shared instead of repeated per policy.
+
+Usage:
+    python -m PyBlackJack.Simulation.BatchRunner [--hands 100000] [--bankroll 1000] [--decide ev] [--metrics-port 9108]
+"""
+import argparse
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from Backend.settings import Settings
+from PyBlackJack.events import EventBus
+from PyBlackJack.headless import HeadlessGame
+from PyBlackJack.metrics import add_metrics_arguments, exporter_from_args, track_cache
+from PyBlackJack.Strategy.BetPolicies import BetContext, BetPolicy, CountSpread, FlatBet, KellyBet, Martingale
+from PyBlackJack.Strategy.ExpectedValue import EVStrategy
+
+
+# keeps a simulated seat from ever needing a pay-in
+SEAT_FLOAT = 10 ** 9
+LEDGER_MAX_ENTRIES = 100_000
+
+
+def hit_below_17(game: HeadlessGame) -> bool:
+    """Play like the dealer: the default playing decision for simulations."""
+    return game.current_total < 17
+
+
+def hit_below_12(game: HeadlessGame) -> bool:
+    """Never risk a bust: hit only when no card can take the hand over 21."""
+    return game.current_total < 12
+
+
+def simulation_game(game_settings: Settings, **kwargs) -> HeadlessGame:
+    """A one-seat HeadlessGame with a bounded ledger, for long unattended runs."""
+    game = HeadlessGame(game_settings=game_settings, seats=1, **kwargs)
+    game.banker.ledger.max_entries = LEDGER_MAX_ENTRIES
+    return game
+
+
+def top_up(game: HeadlessGame):
+    """Float seat 0 so a run never stops on a bankrupt seat; results are read from seat_nets."""
+    if game.player.chips < SEAT_FLOAT // 2:
+        game.banker.adjust_balance(game.player, SEAT_FLOAT)
+
+
+class PolicyResult(NamedTuple):
+    name: str
+    hands_played: int
+    final_bankroll: int
+    net: int
+    wagered: int
+    peak: int
+    max_drawdown: int
+    ruined_at: Optional[int]
+
+    @property
+    def edge(self) -> float:
+        return self.net / self.wagered if self.wagered else 0.0
+
+
+class _PolicyState:
+    __slots__ = ('policy', 'bankroll', 'wagered', 'peak', 'max_drawdown', 'last_net', 'hands', 'ruined_at')
+
+    def __init__(self, policy: BetPolicy, bankroll: int):
+        self.policy = policy
+        self.bankroll = bankroll
+        self.wagered = 0
+        self.peak = bankroll
+        self.max_drawdown = 0
+        self.last_net = 0
+        self.hands = 0
+        self.ruined_at = None
+
+
+class BetPolicyRunner:
+    """
+    Plays ``hands`` hands at one seat and applies each to every policy's bankroll.
+
+    Each hand is played at BASE_BET (a multiple of 10, so 3:2, 6:5 and surrender
+    payouts are whole chips) and scaled to a policy betting ``b``: it stakes
+    ``b * staked // BASE_BET`` and is paid back ``b * (staked + net) // BASE_BET``,
+    the payout rounded down like the cage does (a 15-chip surrender gets 7 back and
+    loses 8). Doubles and splits are
+    assumed affordable. A policy is ruined once it can no longer cover its minimum
+    bet and plays no further hands.
+
+    :ivar decide: Playing decision, as for ``HeadlessGame.play_hand``.
+    :ivar events: Event bus the simulated game reports to, e.g. for metrics.
+    :type events: EventBus | None
+    """
+    BASE_BET = 10
+
+    def __init__(self, policies: Dict[str, BetPolicy], hands: int = 100_000, starting_bankroll: int = None,
+                 decide: Callable[[HeadlessGame], object] = hit_below_17, game_settings: Settings = None,
+                 events: EventBus = None):
+        self.game_settings = game_settings or Settings()
+        self.events = events
+        self.policies = policies
+        self.hands = hands
+        self.starting_bankroll = starting_bankroll or self.game_settings.starting_chips
+        self.decide = decide
+
+    def run(self) -> List[PolicyResult]:
+        base = self.__class__.BASE_BET
+        game = simulation_game(self.game_settings, events=self.events)
+        states = [_PolicyState(policy, self.starting_bankroll) for policy in self.policies.values()]
+        for policy in self.policies.values():
+            policy.reset()
+
+        for hand in range(self.hands):
+            live = [s for s in states if s.ruined_at is None]
+            if not live:
+                break
+            top_up(game)
+            shoe = game.bet_context(0)
+            bets = [s.policy.bet(BetContext(s.bankroll, shoe.running_count, shoe.true_count, s.last_net, s.hands))
+                    for s in live]
+
+            game.play_hand(base, self.decide)
+            net = game.seat_nets[0]
+            hands = game.player.hands
+            staked = sum(hands.bets[h] for h in range(hands.n_hands)) + hands.insurance
+
+            for state, bet in zip(live, bets):
+                if bet <= 0:
+                    state.ruined_at = hand
+                    continue
+                wagered = bet * staked // base
+                state.last_net = bet * (staked + net) // base - wagered
+                state.bankroll += state.last_net
+                state.wagered += wagered
+                state.hands += 1
+                if state.bankroll > state.peak:
+                    state.peak = state.bankroll
+                elif state.peak - state.bankroll > state.max_drawdown:
+                    state.max_drawdown = state.peak - state.bankroll
+
+        return [PolicyResult(name, s.hands, s.bankroll, s.bankroll - self.starting_bankroll, s.wagered,
+                             s.peak, s.max_drawdown, s.ruined_at)
+                for name, s in zip(self.policies, states)]
+
+
+def default_policies(unit: int = 10) -> Dict[str, BetPolicy]:
+    return {
+        'flat': FlatBet(unit),
+        'kelly_half': KellyBet(0.5, min_bet=unit),
+        'count_1-8': CountSpread(unit),
+        'martingale': Martingale(unit, max_bet=unit * 64),
+    }
+
+
+def default_decisions() -> Dict[str, Callable[[HeadlessGame], object]]:
+    """Playing strategies selectable from the command line."""
+    return {
+        'dealer': hit_below_17,
+        'no_bust': hit_below_12,
+        'ev': EVStrategy(),
+    }
+
+
+def format_results(results: List[PolicyResult]) -> str:
+    lines = [f"{'policy':<12} {'hands':>8} {'bankroll':>10} {'net':>10} {'wagered':>12} {'edge':>8} "
+             f"{'drawdown':>9} {'ruined':>8}"]
+    for r in results:
+        lines.append(f"{r.name:<12} {r.hands_played:>8} {r.final_bankroll:>10} {r.net:>10} {r.wagered:>12} "
+                     f"{r.edge:>8.2%} {r.max_drawdown:>9} {'' if r.ruined_at is None else r.ruined_at:>8}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare bet policies over the same shoes.")
+    parser.add_argument('--hands', type=int, default=100_000)
+    parser.add_argument('--bankroll', type=int, default=None, help="starting bankroll per policy")
+    parser.add_argument('--unit', type=int, default=10, help="betting unit")
+    parser.add_argument('--decide', default='dealer', choices=list(default_decisions()), help="playing strategy")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    exporter = exporter_from_args(args)
+    decide = default_decisions()[args.decide]
+    events = None
+    if exporter is not None:
+        events = exporter.games.attach(EventBus(), 'simulation')
+        if isinstance(decide, EVStrategy):
+            track_cache(exporter.registry, 'ev', decide)
+    runner = BetPolicyRunner(default_policies(args.unit), hands=args.hands, starting_bankroll=args.bankroll,
+                             decide=decide, events=events)
+    try:
+        print(format_results(runner.run()))
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+#! python3
+"""
+Compare rule sets or playing strategies on common random numbers.
+
+Every variant plays the exact same pre-generated shoes, so the luck of the cards
+largely cancels out of the difference between two variants. Each shoe is played to
+its cut card by every variant and the per-shoe differences against the baseline
+(the first variant) give the estimate and its confidence interval. A question like
+"what does H17 cost us" then needs a fraction of the hands two independent runs would.
+
+The shoes are written once to a ShoeBank file and memory-mapped by each worker.
+
+Usage:
+    python -m PyBlackJack.Simulation.PairedComparison --shoes 5000 --seed 1 \
+        --variant h17:dealer_hits_soft_17=true --variant 6to5:blackjack_payout=6:5
+"""
+import argparse
+import copy
+import math
+import os
+import statistics
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from time import time_ns
+
+from Backend.rules import RAW_RULES, RuleSet, parse_rule_value
+from Backend.settings import Settings
+from PyBlackJack.headless import HeadlessGame
+from PyBlackJack.Simulation.BatchRunner import default_decisions, hit_below_17, simulation_game, top_up
+from PyBlackJack.Simulation.ShoeBank import ShoeBank
+
+# two-sided 95% normal quantile
+Z_95 = 1.959964
+
+
+# playing strategies selectable from the command line
+DECISIONS = default_decisions()
+
+
+class Variant(NamedTuple):
+    """
+    One side of a comparison.
+
+    :ivar rules: Raw rules changed from the configured ones, see ``RuleSet.derive``; None
+        plays the configured rules.
+    :ivar decide: Playing decision, as for ``HeadlessGame.play_hand``; must be picklable
+        (a module-level function or e.g. an EVStrategy) when workers are used.
+    """
+    name: str
+    rules: Optional[Dict[str, object]] = None
+    decide: Callable[[HeadlessGame], object] = hit_below_17
+
+
+class PairedResult(NamedTuple):
+    """
+    A variant's edge and its paired difference from the baseline.
+
+    Edges are chips won per chip of initial bet. ``edge_diff`` is the variant's edge
+    minus the baseline's and ``ci`` the half-width of its 95% confidence interval.
+    ``variance_ratio`` is how many times more shoes two independent runs would need
+    for the same interval.
+    """
+    name: str
+    shoes: int
+    hands: int
+    edge: float
+    edge_diff: float
+    ci: float
+    variance_ratio: float
+
+
+def _variant_settings(game_settings: Settings, variant: Variant) -> Settings:
+    if not variant.rules:
+        return game_settings
+    settings = copy.copy(game_settings)
+    settings.rules = game_settings.rules.derive(**variant.rules)
+    return settings
+
+
+def _play_shoes(bank_path: str, start: int, stop: int, variants: List[Variant], base_bet: int,
+                raw_rules: tuple, reshuffle: str) -> List[Tuple[array, array]]:
+    """
+    Play shoes ``start:stop`` of the bank with every variant.
+
+    Settings can't be pickled for a worker, so the comparison's rules (as
+    ``RuleSet.raw``) and reshuffle policy are passed and applied to a fresh Settings.
+
+    :return: Per variant, the net chips and the hands played on each shoe.
+    """
+    game_settings = Settings()
+    game_settings.rules = RuleSet.compile(**dict(zip(RAW_RULES, raw_rules)))
+    game_settings.reshuffle = reshuffle
+    results = []
+    with ShoeBank(bank_path) as bank:
+        for variant in variants:
+            settings = _variant_settings(game_settings, variant)
+            game = simulation_game(settings)
+            nets, hands = array('q'), array('q')
+            for codes in bank.iter_shoes(start, stop):
+                game.load_shoe(codes)
+                net, played = 0, game.hands_played
+                while not game.needs_new_shoe:
+                    top_up(game)
+                    game.play_hand(base_bet, variant.decide)
+                    net += game.seat_nets[0]
+                nets.append(net)
+                hands.append(game.hands_played - played)
+            results.append((nets, hands))
+    return results
+
+
+class PairedComparison:
+    """
+    Plays every variant over the same shoes and compares each with the first.
+
+    :ivar bank: The shoes, shared by every variant (and every worker).
+    :type bank: ShoeBank
+    :ivar workers: Processes to spread the shoes over; 1 plays them in this process.
+    :type workers: int
+    """
+    BASE_BET = 10
+
+    def __init__(self, variants: List[Variant], bank: ShoeBank, workers: int = 1, game_settings: Settings = None):
+        if len(variants) < 2:
+            raise ValueError("A comparison needs a baseline and at least one other variant.")
+        if len(bank) < 2:
+            raise ValueError("A comparison needs at least two shoes.")
+        self.game_settings = game_settings or Settings()
+        for variant in variants:
+            decks = _variant_settings(self.game_settings, variant).rules.decks
+            if decks != bank.decks:
+                raise ValueError(f"Variant '{variant.name}' plays {decks} decks, the shoes hold {bank.decks}.")
+        self.variants = variants
+        self.bank = bank
+        self.workers = max(1, workers)
+
+    def _chunks(self):
+        size = math.ceil(len(self.bank) / self.workers)
+        return [(start, min(start + size, len(self.bank))) for start in range(0, len(self.bank), size)]
+
+    def play(self) -> List[Tuple[array, array]]:
+        """Per variant, the net chips and the hands played on every shoe, in shoe order."""
+        base = self.__class__.BASE_BET
+        path = str(self.bank.path)
+        settings = (self.game_settings.rules.raw, self.game_settings.reshuffle)
+        if self.workers == 1:
+            return _play_shoes(path, 0, len(self.bank), self.variants, base, *settings)
+        merged = [(array('q'), array('q')) for _ in self.variants]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(_play_shoes, path, start, stop, self.variants, base, *settings)
+                       for start, stop in self._chunks()]
+            for future in futures:
+                for (nets, hands), (chunk_nets, chunk_hands) in zip(merged, future.result()):
+                    nets.extend(chunk_nets)
+                    hands.extend(chunk_hands)
+        return merged
+
+    def run(self) -> List[PairedResult]:
+        base = self.__class__.BASE_BET
+        played = self.play()
+        base_nets, base_hands = played[0]
+        shoes = len(base_nets)
+        # per-shoe differences are in chips; scaling by the baseline's initial bets per shoe gives edge
+        base_wagered_per_shoe = base * statistics.fmean(base_hands)
+        base_variance = statistics.variance(base_nets)
+
+        results = []
+        for variant, (nets, hands) in zip(self.variants, played):
+            diffs = [n - b for n, b in zip(nets, base_nets)]
+            diff_variance = statistics.variance(diffs)
+            independent_variance = statistics.variance(nets) + base_variance
+            results.append(PairedResult(
+                name=variant.name,
+                shoes=shoes,
+                hands=sum(hands),
+                edge=sum(nets) / (base * sum(hands)),
+                edge_diff=statistics.fmean(diffs) / base_wagered_per_shoe,
+                ci=Z_95 * math.sqrt(diff_variance / shoes) / base_wagered_per_shoe,
+                variance_ratio=independent_variance / diff_variance if diff_variance else math.inf))
+        return results
+
+
+def format_results(results: List[PairedResult]) -> str:
+    lines = [f"{'variant':<14} {'shoes':>7} {'hands':>9} {'edge':>8} {'vs base':>9} {'95% CI':>9} {'CRN gain':>9}"]
+    for i, r in enumerate(results):
+        if i == 0:
+            lines.append(f"{r.name:<14} {r.shoes:>7} {r.hands:>9} {r.edge:>8.2%} {'(base)':>9}")
+            continue
+        lines.append(f"{r.name:<14} {r.shoes:>7} {r.hands:>9} {r.edge:>8.2%} {r.edge_diff:>+9.3%} "
+                     f"{'±':>1}{r.ci:>8.3%} {r.variance_ratio:>8.1f}x")
+    return '\n'.join(lines)
+
+
+def parse_variant(spec: str) -> Variant:
+    """
+    ``name[:key=value,...]``; keys are raw rules (e.g. ``dealer_hits_soft_17=true``)
+    or ``decide=`` one of DECISIONS.
+    """
+    name, _, changes = spec.partition(':')
+    rules, decide = {}, hit_below_17
+    for change in filter(None, changes.split(',')):
+        key, sep, value = change.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected key=value, got '{change}'")
+        if key == 'decide':
+            if value not in DECISIONS:
+                raise argparse.ArgumentTypeError(f"decide must be one of {', '.join(DECISIONS)}")
+            decide = DECISIONS[value]
+        else:
+            rules[key] = parse_rule_value(value)
+    return Variant(name, rules, decide)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare rule sets or strategies on the same shoes.")
+    parser.add_argument('--variant', type=parse_variant, action='append', default=[],
+                        help="name[:key=value,...], compared with the configured rules; repeatable")
+    parser.add_argument('--shoes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=None, help="defaults to a new seed, which is printed")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shoe-file', default=None,
+                        help="shoe bank to reuse, or to create if missing; a temporary file otherwise")
+    args = parser.parse_args(argv)
+    if not args.variant:
+        parser.error("give at least one --variant to compare with the configured rules")
+
+    settings = Settings()
+    variants = [Variant('base')] + args.variant
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.shoe_file) if args.shoe_file else Path(tmp, 'shoes.bin')
+        if path.exists():
+            bank = ShoeBank(path)
+        else:
+            seed = args.seed if args.seed is not None else time_ns() % 2 ** 63
+            bank = ShoeBank.generate(path, args.shoes, settings.rules.decks, seed, settings=settings)
+        with bank:
+            print(f"{len(bank)} shoes of {bank.decks} deck(s), seed {bank.seed}")
+            comparison = PairedComparison(variants, bank, workers=args.workers, game_settings=settings)
+            print(format_results(comparison.run()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#! python3
+"""
+Risk of ruin and bankroll trajectories for a bet policy.
+
+Plays many sessions of up to ``hands`` hands, each starting from the same
+bankroll with the chips really at stake, and stops a session once its policy can
+no longer cover the minimum bet. The bankroll is sampled at evenly spaced
+checkpoints into streaming accumulators, so memory does not grow with the number
+of sessions or hands, and each worker's accumulators merge into one report.
+
+Usage:
+    python -m PyBlackJack.Simulation.RiskOfRuin [--sessions 2000] [--hands 1000] [--bankroll 500] [--policy flat] [--decide ev]
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import time_ns
+from typing import Callable
+
+from Backend.settings import Settings
+from PyBlackJack.headless import HeadlessGame
+from PyBlackJack.rng import StreamRNG
+from PyBlackJack.Simulation.Accumulators import HandStats, Histogram, RunningStats
+from PyBlackJack.Simulation.BatchRunner import default_decisions, default_policies, hit_below_17, simulation_game
+from PyBlackJack.Strategy.BetPolicies import BetPolicy
+
+
+class TrajectoryStats:
+    """
+    Bankroll distribution at each checkpoint, ruin counts and per-hand results.
+
+    :ivar checkpoints: The hand numbers the bankroll is sampled at.
+    :type checkpoints: list[int]
+    :ivar bankrolls: Bankroll stats per checkpoint; ruined sessions keep what they had left.
+    :type bankrolls: list[RunningStats]
+    :ivar histograms: Bankroll histogram per checkpoint.
+    :type histograms: list[Histogram]
+    :ivar ruined: Sessions ruined by each checkpoint.
+    :type ruined: list[int]
+    :ivar ruin_hand: The hand sessions were ruined on.
+    :type ruin_hand: RunningStats
+    :ivar hands: Per-hand results over every session.
+    :type hands: HandStats
+    """
+    BANKROLL_BINS = 80
+    # histograms cover up to this many times the starting bankroll
+    BANKROLL_SPAN = 4
+
+    def __init__(self, bankroll: int, hands: int, checkpoints: int = 10):
+        step = max(1, hands // checkpoints)
+        self.bankroll = bankroll
+        self.checkpoints = list(range(step, hands + 1, step))
+        if self.checkpoints[-1] != hands:
+            self.checkpoints.append(hands)
+        span = (0, bankroll * self.__class__.BANKROLL_SPAN)
+        self.sessions = 0
+        self.bankrolls = [RunningStats() for _ in self.checkpoints]
+        self.histograms = [Histogram(span[0], span[1], self.__class__.BANKROLL_BINS) for _ in self.checkpoints]
+        self.ruined = [0] * len(self.checkpoints)
+        self.ruin_hand = RunningStats()
+        self.hands = HandStats(bankroll_range=span, bankroll_bins=self.__class__.BANKROLL_BINS)
+
+    def record_checkpoint(self, index: int, chips: int, ruined: bool):
+        self.bankrolls[index].add(chips)
+        self.histograms[index].add(chips)
+        if ruined:
+            self.ruined[index] += 1
+
+    def merge(self, other: 'TrajectoryStats') -> 'TrajectoryStats':
+        if other.checkpoints != self.checkpoints or other.bankroll != self.bankroll:
+            raise ValueError("Can't merge trajectories sampled at different hands or bankrolls.")
+        self.sessions += other.sessions
+        for mine, theirs in zip(self.bankrolls, other.bankrolls):
+            mine.merge(theirs)
+        for mine, theirs in zip(self.histograms, other.histograms):
+            mine.merge(theirs)
+        self.ruined = [a + b for a, b in zip(self.ruined, other.ruined)]
+        self.ruin_hand.merge(other.ruin_hand)
+        self.hands.merge(other.hands)
+        return self
+
+    @property
+    def risk_of_ruin(self) -> float:
+        return self.ruined[-1] / self.sessions if self.sessions else 0.0
+
+
+def _play_sessions(sessions: int, bankroll: int, hands: int, checkpoints: int, policy: BetPolicy,
+                   decide: Callable[[HeadlessGame], object], rng: StreamRNG, game_settings: Settings = None):
+    stats = TrajectoryStats(bankroll, hands, checkpoints)
+    game = simulation_game(game_settings or Settings(), rng=rng)
+    marks = stats.checkpoints
+    for _ in range(sessions):
+        game.banker.adjust_balance(game.player, bankroll)
+        policy.reset()
+        last_net, ruined, next_mark = 0, False, 0
+        for hand in range(1, hands + 1):
+            context = game.bet_context(0)._replace(last_net=last_net, hands_played=hand - 1)
+            bet = policy.bet(context)
+            if not bet:
+                ruined = True
+                stats.ruin_hand.add(hand)
+                break
+            game.play_hand(bet, decide)
+            stats.hands.record(game)
+            last_net = game.seat_nets[0]
+            if hand == marks[next_mark]:
+                stats.record_checkpoint(next_mark, game.player.chips, False)
+                next_mark += 1
+        # a ruined session keeps its leftover chips at every checkpoint it didn't reach
+        for index in range(next_mark, len(marks)):
+            stats.record_checkpoint(index, game.player.chips, ruined)
+        stats.sessions += 1
+    return stats
+
+
+class RiskOfRuin:
+    """
+    Runs ``sessions`` sessions of ``policy`` across ``workers`` processes.
+
+    Worker ``i`` deals from child stream ``i`` of ``seed``'s StreamRNG, so a run can be
+    repeated and no two workers deal from overlapping sequences.
+    ``decide`` must not double or split beyond the seat's chips.
+    """
+    def __init__(self, policy: BetPolicy, bankroll: int, sessions: int = 2000, hands: int = 1000,
+                 checkpoints: int = 10, decide: Callable[[HeadlessGame], object] = hit_below_17,
+                 workers: int = 1, seed: int = None):
+        self.policy = policy
+        self.bankroll = bankroll
+        self.sessions = sessions
+        self.hands = hands
+        self.checkpoints = checkpoints
+        self.decide = decide
+        self.workers = max(1, min(workers, sessions))
+        self.seed = seed if seed is not None else time_ns() % 2 ** 63
+
+    def run(self) -> TrajectoryStats:
+        share, extra = divmod(self.sessions, self.workers)
+        shares = [share + (i < extra) for i in range(self.workers)]
+        args = (self.bankroll, self.hands, self.checkpoints, self.policy, self.decide)
+        streams = StreamRNG(self.seed)
+        if self.workers == 1:
+            return _play_sessions(shares[0], *args, streams.child(0))
+        stats = TrajectoryStats(self.bankroll, self.hands, self.checkpoints)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(_play_sessions, count, *args, streams.child(i)) for i, count in enumerate(shares)]
+            for future in futures:
+                stats.merge(future.result())
+        return stats
+
+
+def format_report(stats: TrajectoryStats) -> str:
+    net = stats.hands.net
+    lines = [f"{stats.sessions} sessions from {stats.bankroll} chips, {net.count} hands played",
+             f"net per hand {net.mean:+.3f} ± {1.96 * net.standard_error:.3f} chips (stdev {net.stdev:.2f})",
+             "outcomes " + ', '.join(f"{o.value} {rate:.1%}" for o, rate in stats.hands.outcome_rates().items()),
+             f"risk of ruin {stats.risk_of_ruin:.2%}"
+             + (f", at hand {stats.ruin_hand.mean:.0f} on average" if stats.ruin_hand.count else ''),
+             '',
+             f"{'hand':>7} {'mean':>9} {'p5':>9} {'p50':>9} {'p95':>9} {'ruined':>8}"]
+    for mark, bankroll, histogram, ruined in zip(stats.checkpoints, stats.bankrolls, stats.histograms,
+                                                 stats.ruined):
+        p5, p50, p95 = (histogram.quantile(q) for q in (0.05, 0.5, 0.95))
+        lines.append(f"{mark:>7} {bankroll.mean:>9.1f} {p5:>9.0f} {p50:>9.0f} {p95:>9.0f} "
+                     f"{ruined / stats.sessions if stats.sessions else 0.0:>8.2%}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Risk of ruin and bankroll trajectories of a bet policy.")
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--hands', type=int, default=1000, help="hands per session")
+    parser.add_argument('--bankroll', type=int, default=500, help="starting bankroll per session")
+    parser.add_argument('--unit', type=int, default=10, help="betting unit")
+    parser.add_argument('--policy', default='flat', choices=list(default_policies()))
+    parser.add_argument('--decide', default='dealer', choices=list(default_decisions()), help="playing strategy")
+    parser.add_argument('--checkpoints', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    report = RiskOfRuin(default_policies(args.unit)[args.policy], args.bankroll, sessions=args.sessions,
+                        hands=args.hands, checkpoints=args.checkpoints, decide=default_decisions()[args.decide],
+                        workers=args.workers, seed=args.seed)
+    print(format_report(report.run()))
+
+
+if __name__ == '__main__':
+    main()
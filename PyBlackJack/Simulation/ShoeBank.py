@@ -0,0 +1,96 @@
+"""
+Pre-generated shoes in one memory-mapped file.
+
+A shoe bank is a short header followed by ``shoes`` shoes of ``52 * decks`` card
+codes, one byte per card, top card first. It is written once from a seed, each
+shoe shuffled by its own child stream of the seed's ``StreamRNG``, and then
+opened read-only by any number of processes, which share the same pages instead
+of each shuffling (or holding) their own copy.
+"""
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterator, Union
+
+from Backend.settings import Settings
+from PyBlackJack.Deck.DeckOfCards import Deck
+from PyBlackJack.rng import StreamRNG
+
+
+class ShoeBankError(Exception):
+    """Raised when a file is not a shoe bank."""
+    ...
+
+
+class ShoeBank:
+    """
+    Read-only view of a shoe bank file; ``bank[i]`` is shoe ``i``'s card codes.
+
+    :ivar decks: Decks per shoe.
+    :type decks: int
+    :ivar shoe_size: Cards per shoe.
+    :type shoe_size: int
+    :ivar seed: The seed the shoes were shuffled from.
+    :type seed: int
+    """
+    MAGIC = b'PBJS'
+    # magic, decks, cards per shoe, shoes, seed
+    HEADER = struct.Struct('<4sHHIq')
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < self.__class__.HEADER.size:
+            raise ShoeBankError(f"{self.path} is too short to be a shoe bank.")
+        magic, self.decks, self.shoe_size, self.shoes, self.seed = self.__class__.HEADER.unpack_from(self._map)
+        if magic != self.__class__.MAGIC:
+            raise ShoeBankError(f"{self.path} is not a shoe bank.")
+        if len(self._map) != self.__class__.HEADER.size + self.shoes * self.shoe_size:
+            raise ShoeBankError(f"{self.path} should hold {self.shoes} shoes of {self.shoe_size} cards.")
+
+    def __len__(self):
+        return self.shoes
+
+    def __getitem__(self, index: int) -> bytes:
+        if not 0 <= index < self.shoes:
+            raise IndexError(f"shoe {index} not in a bank of {self.shoes}")
+        start = self.__class__.HEADER.size + index * self.shoe_size
+        # a shoe is a few hundred bytes; copying it out keeps no pointer into the map
+        return self._map[start:start + self.shoe_size]
+
+    def iter_shoes(self, start: int = 0, stop: int = None) -> Iterator[bytes]:
+        for index in range(start, self.shoes if stop is None else stop):
+            yield self[index]
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @classmethod
+    def generate(cls, path: Union[str, Path], shoes: int, decks: int, seed: int,
+                 settings: Settings = None) -> 'ShoeBank':
+        """
+        Shuffle ``shoes`` shoes from ``seed`` and write them to path.
+
+        The same seed and decks always produce the same shoes; shoe ``i`` is the same
+        whatever the shoe count, so a bank can be extended or generated in parts.
+
+        :return: The new bank, opened.
+        """
+        streams = StreamRNG(seed)
+        deck = Deck(settings=settings, decks=decks, rng=streams)
+        ordered = deck.codes()
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, decks, len(ordered), shoes, seed))
+            for index in range(shoes):
+                deck.rng = streams.child(index)
+                deck.load_codes(ordered)
+                deck.shuffle_deck()
+                f.write(deck.codes())
+        return cls(path)
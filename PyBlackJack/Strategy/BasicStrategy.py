@@ -0,0 +1,332 @@
+#! python3
+"""
+Basic strategy solved for a rule set, and cached on disk.
+
+``solve()`` derives the total-dependent basic strategy for a ``RuleSet``: for
+every hard total, soft total and pair against every upcard, the decisions ranked
+by expected value. Each row's values are the average over the two-card hands
+that make it, weighted by how likely each is to be dealt, and each value comes
+from ``EVAnalyzer``'s dynamic program over the shoe's composition. With
+``infinite_deck`` the composition never changes, which gives the classic
+infinite-deck charts.
+
+Upcards are solved in parallel, one process per upcard up to ``workers`` (all
+cores by default). The result is a ``StrategyTable``: one 16-bit ranking per
+cell, a little over 700 bytes in all, written to the strategy cache directory
+under the hash of the rules that bear on play (see ``strategy_key()``).
+``load_or_solve()`` reads a cached table back instead of solving again.
+
+A table is also a playing decision for ``HeadlessGame.play_hand``: it takes the
+best ranked decision the hand allows.
+
+Usage:
+    python -m PyBlackJack.Strategy.BasicStrategy [--rule dealer_hits_soft_17=true] [--infinite-deck] [--workers 8]
+"""
+import argparse
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, Union
+
+from Backend.card_codes import CARD_POINTS, card_code
+from Backend.enum import TurnChoices
+from Backend.rules import RAW_RULES, RuleSet, parse_rule_value
+from Backend.settings import Settings
+from PyBlackJack.Strategy.ExpectedValue import ACE, RANKS, EVAnalyzer, RankCounts, allowed_choices
+
+if TYPE_CHECKING:
+    from PyBlackJack.headless import HeadlessGame
+
+# chart rows: hard 5-20, soft 13-20 (A,2 to A,9) and the ten pairs, each against the ten upcards
+HARD_TOTALS = range(5, 21)
+SOFT_TOTALS = range(13, 21)
+PAIR_ROW = len(HARD_TOTALS) + len(SOFT_TOTALS)
+ROWS = PAIR_ROW + RANKS
+# the raw rules a basic strategy depends on; penetration and the blackjack payout don't change a decision
+STRATEGY_RULES = ('decks', 'dealer_hits_soft_17', 'double_after_split', 'surrender')
+# a ranking packs up to five TurnChoices values, best first, three bits each
+_CHOICE_BITS = 3
+_CHOICE_MASK = (1 << _CHOICE_BITS) - 1
+# decks in the shoe that stands in for an infinite deck
+INFINITE_DECKS = 1_000_000
+DEFAULT_CACHE_DIR = Path(Settings.DEFAULT_CONFIG_LOCATION.parent, 'strategies')
+# chart letters, as printed on strategy cards
+CHART_LETTERS = {TurnChoices.HIT: 'H', TurnChoices.STAY: 'S', TurnChoices.DOUBLE: 'D', TurnChoices.SPLIT: 'P',
+                 TurnChoices.SURRENDER: 'R'}
+
+Ranking = Tuple[TurnChoices, ...]
+
+
+class StrategyTableError(Exception):
+    """Raised when a file is not a strategy table, or not the one expected."""
+    ...
+
+
+def _row_label(row: int) -> str:
+    if row < len(HARD_TOTALS):
+        return f"{HARD_TOTALS[row]}"
+    if row < PAIR_ROW:
+        return f"A,{SOFT_TOTALS[row - len(HARD_TOTALS)] - 11}"
+    rank = row - PAIR_ROW
+    name = 'A' if rank == ACE else 'T' if rank == RANKS - 1 else str(rank + 1)
+    return f"{name},{name}"
+
+
+def _row_hands(row: int) -> List[Tuple[int, int]]:
+    """The two-card hands, as rank index pairs, that make up a row."""
+    if row >= PAIR_ROW:
+        return [(row - PAIR_ROW,) * 2]
+    if row >= len(HARD_TOTALS):
+        # soft t is an ace and a card worth t - 11
+        return [(ACE, SOFT_TOTALS[row - len(HARD_TOTALS)] - 12)]
+    total = HARD_TOTALS[row]
+    hands = [(a, b) for a in range(1, RANKS) for b in range(a + 1, RANKS) if a + b + 2 == total]
+    # hard 20 is only ever a pair of tens
+    return hands or [(a, a) for a in range(1, RANKS) if 2 * a + 2 == total]
+
+
+def _pack(ranking: Sequence[TurnChoices]) -> int:
+    value = 0
+    for i, choice in enumerate(ranking):
+        value |= choice.value << (_CHOICE_BITS * i)
+    return value
+
+
+def _unpack(value: int) -> Ranking:
+    ranking = []
+    while value:
+        ranking.append(TurnChoices(value & _CHOICE_MASK))
+        value >>= _CHOICE_BITS
+    return tuple(ranking)
+
+
+def strategy_key(rules: RuleSet, infinite_deck: bool = False, removal_depth: Optional[int] = None) -> str:
+    """
+    Hex hash naming the table solved for these rules and options.
+
+    Only the STRATEGY_RULES are hashed, so tables whose rules differ in penetration
+    or the blackjack payout share one entry; an infinite deck hashes as zero decks.
+    """
+    raw = dict(zip(RAW_RULES, rules.raw))
+    if infinite_deck:
+        raw['decks'] = 0
+    text = repr(tuple(raw[name] for name in STRATEGY_RULES) + (removal_depth,))
+    return blake2b(text.encode('utf-8'), digest_size=StrategyTable.KEY_BYTES).hexdigest()
+
+
+class StrategyTable:
+    """
+    The decisions of a basic strategy, ranked best first, by chart row and upcard.
+
+    :ivar key: ``strategy_key()`` of the rules the table was solved for.
+    :type key: str
+    :ivar cells: One packed ranking per row and upcard, row-major with upcards ace to ten.
+    :type cells: array
+    """
+    MAGIC = b'PBJB'
+    VERSION = 1
+    KEY_BYTES = 8
+    # magic, version, rows, upcards, key
+    HEADER = struct.Struct(f'<4sBBB{KEY_BYTES}s')
+
+    def __init__(self, key: str, cells: Sequence[int]):
+        if len(cells) != ROWS * RANKS:
+            raise ValueError(f"A strategy table has {ROWS * RANKS} cells, not {len(cells)}.")
+        self.key = key
+        self.cells = array('H', cells)
+
+    def ranking(self, row: int, upcard: int) -> Ranking:
+        """The decisions for a chart row against an upcard rank index, best first."""
+        return _unpack(self.cells[row * RANKS + upcard])
+
+    def row_for(self, hand: Sequence[int], can_split: bool = True) -> Optional[int]:
+        """
+        The chart row a hand of card codes plays from, or None for a total of 21 or more.
+
+        A pair that can't be split plays from its total's row; a soft 12 plays like
+        a soft 13, and a hard 4 like a hard 5.
+        """
+        points = [CARD_POINTS[code] for code in hand]
+        if can_split and len(points) == 2 and points[0] == points[1]:
+            return PAIR_ROW + points[0] - 1
+        hard = sum(points)
+        if 1 in points and hard <= 11:
+            soft = hard + 10
+            if soft >= 21:
+                return None
+            return len(HARD_TOTALS) + max(soft, SOFT_TOTALS[0]) - SOFT_TOTALS[0]
+        if hard >= 21:
+            return None
+        return max(hard, HARD_TOTALS[0]) - HARD_TOTALS[0]
+
+    def decide(self, hand: Sequence[int], upcard: int, can_double: bool = True, can_split: bool = True,
+               can_surrender: bool = True) -> TurnChoices:
+        """
+        The best ranked decision a hand of card codes is allowed against the upcard's code.
+
+        Doubling and surrendering are only ever offered on the first two cards.
+        """
+        row = self.row_for(hand, can_split)
+        if row is None:
+            return TurnChoices.STAY
+        first_two = len(hand) == 2
+        for choice in self.ranking(row, CARD_POINTS[upcard] - 1):
+            if choice == TurnChoices.DOUBLE and not (can_double and first_two):
+                continue
+            if choice == TurnChoices.SURRENDER and not (can_surrender and first_two):
+                continue
+            if choice == TurnChoices.SPLIT and not can_split:
+                continue
+            return choice
+        return TurnChoices.STAY
+
+    def __call__(self, game: 'HeadlessGame') -> TurnChoices:
+        return self.decide(game.current_hands.codes(game.active_hand), card_code(game.dealer.hand[1]),
+                           **allowed_choices(game))
+
+    def format(self) -> str:
+        """The table as a chart of each cell's best decision, in CHART_LETTERS."""
+        lines = ["      " + ' '.join(f"{'A' if up == ACE else up + 1:>2}" for up in range(RANKS))]
+        for row in range(ROWS):
+            cells = [CHART_LETTERS[self.ranking(row, up)[0]] for up in range(RANKS)]
+            lines.append(f"{_row_label(row):>5} " + ' '.join(f"{cell:>2}" for cell in cells))
+        return '\n'.join(lines)
+
+    # persistence
+
+    def to_bytes(self) -> bytes:
+        cls = self.__class__
+        return cls.HEADER.pack(cls.MAGIC, cls.VERSION, ROWS, RANKS, bytes.fromhex(self.key)) + self.cells.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, key: str = None) -> 'StrategyTable':
+        """
+        :raises StrategyTableError: If data is not a table of this layout, or not the one for key.
+        """
+        if len(data) != cls.HEADER.size + ROWS * RANKS * 2:
+            raise StrategyTableError(f"A strategy table is {cls.HEADER.size + ROWS * RANKS * 2} bytes, "
+                                     f"not {len(data)}.")
+        magic, version, rows, upcards, raw_key = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION or (rows, upcards) != (ROWS, RANKS):
+            raise StrategyTableError("Not a strategy table of this version.")
+        if key is not None and raw_key.hex() != key:
+            raise StrategyTableError(f"The table is for rules {raw_key.hex()}, not {key}.")
+        cells = array('H')
+        cells.frombytes(data[cls.HEADER.size:])
+        return cls(raw_key.hex(), cells)
+
+    def save(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR) -> Path:
+        """Write the table to ``<cache_dir>/<key>.strategy``, replacing any file atomically."""
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        path = Path(cache_dir, f"{self.key}.strategy")
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(self.to_bytes())
+        os.replace(tmp, path)
+        return path
+
+
+def _upcard_rankings(raw_rules: tuple, upcard: int, infinite_deck: bool,
+                     removal_depth: Optional[int]) -> List[int]:
+    """Packed rankings of every row against one upcard; runs in a worker."""
+    rules = RuleSet.compile(**dict(zip(RAW_RULES, raw_rules)))
+    decks = INFINITE_DECKS if infinite_deck else rules.decks
+    full = [4 * decks] * (RANKS - 1) + [16 * decks]
+    full[upcard] -= 1
+    analyzer = EVAnalyzer(rules, removal_depth=0 if infinite_deck else removal_depth)
+    cells = []
+    for row in range(ROWS):
+        totals, weights = {}, 0
+        for a, b in _row_hands(row):
+            counts: RankCounts = tuple(full)
+            if a == b:
+                weight = counts[a] * (counts[a] - 1)
+            else:
+                weight = 2 * counts[a] * counts[b]
+            if not infinite_deck:
+                # the player's own cards are out of a finite shoe
+                remaining = list(full)
+                remaining[a] -= 1
+                remaining[b] -= 1
+                counts = tuple(remaining)
+            # rank index i is the card code of the i + 1 of the first suit
+            for choice, ev in analyzer.evs([a, b], upcard, counts).items():
+                totals[choice] = totals.get(choice, 0.0) + weight * ev
+            weights += weight
+        ranked = sorted(totals, key=lambda choice: -totals[choice] / weights)
+        cells.append(_pack(ranked))
+    return cells
+
+
+def solve(rules: RuleSet, infinite_deck: bool = False, removal_depth: Optional[int] = None,
+          workers: int = None) -> StrategyTable:
+    """
+    Solve the basic strategy for rules, one upcard per worker process.
+
+    :param infinite_deck: Solve with the composition never changing, ignoring ``rules.decks``.
+    :param removal_depth: As for ``EVAnalyzer``; None takes every card out of the shoe as it is drawn.
+    :param workers: Processes to use; defaults to one per core.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, RANKS))
+    args = (rules.raw, infinite_deck, removal_depth)
+    if workers == 1:
+        columns = [_upcard_rankings(args[0], upcard, *args[1:]) for upcard in range(RANKS)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # tens and aces take longest; start them first
+            order = sorted(range(RANKS), key=lambda up: up not in (ACE, RANKS - 1))
+            futures = {up: pool.submit(_upcard_rankings, args[0], up, *args[1:]) for up in order}
+            columns = [futures[upcard].result() for upcard in range(RANKS)]
+    cells = [columns[upcard][row] for row in range(ROWS) for upcard in range(RANKS)]
+    return StrategyTable(strategy_key(rules, infinite_deck, removal_depth), cells)
+
+
+def load_or_solve(rules: RuleSet, infinite_deck: bool = False, removal_depth: Optional[int] = None,
+                  workers: int = None, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR) -> StrategyTable:
+    """
+    The cached table for rules, solving and caching it first if there is none.
+
+    A cached file that can't be read as the expected table is solved again and replaced.
+    """
+    key = strategy_key(rules, infinite_deck, removal_depth)
+    path = Path(cache_dir, f"{key}.strategy")
+    try:
+        return StrategyTable.from_bytes(path.read_bytes(), key)
+    except (OSError, StrategyTableError):
+        pass
+    table = solve(rules, infinite_deck, removal_depth, workers)
+    table.save(cache_dir)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve (or load) the basic strategy for the configured rules.")
+    parser.add_argument('--rule', action='append', default=[], metavar='KEY=VALUE',
+                        help="change a raw rule, e.g. dealer_hits_soft_17=true or decks=6")
+    parser.add_argument('--infinite-deck', action='store_true')
+    parser.add_argument('--removal-depth', type=int, default=None,
+                        help="player draws taken out of the shoe before it is frozen (default: all)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument('--no-cache', action='store_true', help="solve even if a cached table exists")
+    args = parser.parse_args(argv)
+    changes = {}
+    for change in args.rule:
+        key, sep, value = change.partition('=')
+        if not sep or key not in RAW_RULES:
+            parser.error(f"--rule takes KEY=VALUE with KEY one of {', '.join(RAW_RULES)}, not '{change}'")
+        changes[key] = parse_rule_value(value)
+    rules = Settings().rules.derive(**changes)
+    if args.no_cache:
+        table = solve(rules, args.infinite_deck, args.removal_depth, args.workers)
+        table.save(args.cache_dir)
+    else:
+        table = load_or_solve(rules, args.infinite_deck, args.removal_depth, args.workers, args.cache_dir)
+    print(table.format())
+
+
+if __name__ == '__main__':
+    main()
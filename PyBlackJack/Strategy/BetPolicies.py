@@ -0,0 +1,145 @@
+#! python3
+"""
+Bet sizing policies.
+
+A ``BetPolicy`` picks the next hand's bet from a ``BetContext``: the seat's
+bankroll, the shoe's Hi-Lo running and true counts, the last hand's result and
+the hands played so far. ``HeadlessGame.play_hand`` takes one policy per seat in
+place of the bets, and ``BetPolicyRunner`` and the risk-of-ruin simulator compare
+policies over the same hands.
+"""
+from typing import Dict, NamedTuple, Optional
+
+
+class BetContext(NamedTuple):
+    """
+    What a bet policy may look at before a hand.
+
+    :ivar bankroll: Chips available to the seat.
+    :ivar running_count: Hi-Lo running count of the shoe the hand will be dealt from.
+    :ivar true_count: Running count per deck left in that shoe.
+    :ivar last_net: Chips won (negative if lost) on the seat's previous hand.
+    :ivar hands_played: Hands the seat has played so far.
+    """
+    bankroll: int
+    running_count: int
+    true_count: float
+    last_net: int
+    hands_played: int
+
+
+class BetPolicy:
+    """
+    Decides how much a seat bets on the next hand.
+
+    Subclasses implement ``wager()``; ``bet()`` clamps it to the table limits and
+    the bankroll and returns 0 when the bankroll can't cover the minimum bet.
+
+    :ivar min_bet: Table minimum.
+    :type min_bet: int
+    :ivar max_bet: Table maximum, or None for no limit.
+    :type max_bet: int | None
+    """
+    def __init__(self, min_bet: int = 5, max_bet: Optional[int] = None):
+        self.min_bet = min_bet
+        self.max_bet = max_bet
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(min_bet={self.min_bet}, max_bet={self.max_bet})"
+
+    def wager(self, context: BetContext) -> int:
+        raise NotImplementedError
+
+    def bet(self, context: BetContext) -> int:
+        if context.bankroll < self.min_bet:
+            return 0
+        amount = max(self.min_bet, int(self.wager(context)))
+        if self.max_bet is not None:
+            amount = min(amount, self.max_bet)
+        return min(amount, context.bankroll)
+
+    def reset(self):
+        """Forget any state carried between hands (e.g. a martingale progression)."""
+        pass
+
+
+class FlatBet(BetPolicy):
+    def __init__(self, unit: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.unit = unit
+
+    def wager(self, context: BetContext) -> int:
+        return self.unit
+
+
+class KellyBet(BetPolicy):
+    """
+    Bets a fraction of the Kelly stake, ``edge / variance * bankroll``.
+
+    The edge is estimated from the true count as ``base_edge + edge_per_true_count * true_count``;
+    with no positive edge the table minimum is bet.
+    """
+    def __init__(self, fraction: float = 0.5, base_edge: float = -0.005, edge_per_true_count: float = 0.005,
+                 variance: float = 1.3, **kwargs):
+        super().__init__(**kwargs)
+        self.fraction = fraction
+        self.base_edge = base_edge
+        self.edge_per_true_count = edge_per_true_count
+        self.variance = variance
+
+    def wager(self, context: BetContext) -> int:
+        edge = self.base_edge + self.edge_per_true_count * context.true_count
+        if edge <= 0:
+            return self.min_bet
+        return self.fraction * edge / self.variance * context.bankroll
+
+
+class CountSpread(BetPolicy):
+    """
+    Bets ``unit`` times the spread entry for the floored true count.
+
+    :ivar spread: True count -> units; counts below the lowest key bet one unit and
+        counts above the highest key use the highest key's units.
+    :type spread: dict[int, int]
+    """
+    DEFAULT_SPREAD = {1: 1, 2: 2, 3: 4, 4: 8}
+
+    def __init__(self, unit: int = 10, spread: Dict[int, int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.unit = unit
+        self.spread = dict(spread or self.__class__.DEFAULT_SPREAD)
+        # a dense table from the lowest to the highest key, so a bet is one index
+        low, high = min(self.spread), max(self.spread)
+        units, current = [], 1
+        for tc in range(low, high + 1):
+            current = self.spread.get(tc, current)
+            units.append(current)
+        self._low = low
+        self._units = tuple(units)
+
+    def wager(self, context: BetContext) -> int:
+        index = int(context.true_count // 1) - self._low
+        if index < 0:
+            return self.unit
+        return self.unit * self._units[min(index, len(self._units) - 1)]
+
+
+class Martingale(BetPolicy):
+    """Doubles the bet after every losing hand and returns to ``unit`` after a win or push."""
+    def __init__(self, unit: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.unit = unit
+        self.current = unit
+
+    def wager(self, context: BetContext) -> int:
+        if context.hands_played and context.last_net < 0:
+            self.current *= 2
+        else:
+            self.current = self.unit
+        if self.max_bet is not None and self.current > self.max_bet:
+            # table limit reached, the progression starts over
+            self.current = self.unit
+        return self.current
+
+    def reset(self):
+        self.current = self.unit
@@ -0,0 +1,446 @@
+"""
+Composition-dependent expected values of playing decisions.
+
+``EVAnalyzer`` computes, for a player hand, the dealer's upcard and the cards the
+player hasn't seen, the exact expected value of standing, hitting, doubling,
+splitting and surrendering, in units of the hand's bet. Every draw is taken from
+the actual remaining composition (a rank-count vector), not an infinite deck, so
+the numbers move with the shoe.
+
+The table rules come from a ``RuleSet``: the dealer's S17/H17 policy, double
+after split and late surrender. The dealer peeks with an ace or a ten up, so a
+decision is only ever made against a dealer without blackjack and the dealer's
+hole card is drawn conditioned on that.
+
+A few simplifications keep it tractable, as is usual for such engines:
+
+* after a hit the player only hits or stands;
+* a split is valued as twice one split hand, played without resplitting, each hand
+  drawing from the composition without the other's cards;
+* the player's own draws are not conditioned on the dealer not having blackjack.
+
+Dealer outcome distributions and the best hit/stand value of a hand are
+memoized on (hand state, rank-count vector) in a bounded LRU cache that can be
+saved to and loaded from disk, so a long session or simulation stops paying for
+states it has already seen.
+
+Exact values of multi-card hands against a six-deck shoe take seconds. With a
+``removal_depth`` the cards drawn after the first few are no longer taken out
+of the composition, which makes a hint take a fraction of a second and moves
+the values by about 1e-4 of a bet at depth 2; ``removal_depth=None`` keeps every
+draw exact.
+"""
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
+
+from Backend.card_codes import CARD_POINTS, card_code
+from Backend.enum import TurnChoices
+from Backend.rules import RuleSet
+
+if TYPE_CHECKING:
+    from PyBlackJack.headless import HeadlessGame
+    from PyBlackJack.py_blackjack import Game
+
+# a rank-count vector has one count per point value: index 0 is aces, 9 is ten-valued cards
+RANKS = 10
+ACE = 0
+TEN = 9
+# dealer outcome vectors hold the chances of finishing on 17, 18, 19, 20, 21, and of busting
+DEALER_OUTCOMES = 6
+BUST = 5
+
+RankCounts = Tuple[int, ...]
+DealerOutcomes = Tuple[float, ...]
+_STANDS_ON_17: DealerOutcomes = (1.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+_DRAWN_DIGITS = tuple(32 ** rank for rank in range(RANKS))
+
+# cache key tags
+_UPCARD, _HIT_STAND = 0, 1
+
+
+def rank_of(code: int) -> int:
+    """Rank-count index of a card code."""
+    return CARD_POINTS[code] - 1
+
+
+def rank_counts(codes: Iterable[int]) -> RankCounts:
+    counts = [0] * RANKS
+    for code in codes:
+        counts[CARD_POINTS[code] - 1] += 1
+    return tuple(counts)
+
+
+def _without(counts: RankCounts, rank: int) -> RankCounts:
+    return counts[:rank] + (counts[rank] - 1,) + counts[rank + 1:]
+
+
+def _best_total(hard: int, ace: bool) -> int:
+    return hard + 10 if ace and hard <= 11 else hard
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class BoundedCache:
+    """
+    A dict that forgets its least recently used entries past ``maxsize``.
+
+    ``cache_info()`` matches ``functools.lru_cache``'s, so ``metrics.track_cache``
+    can export it.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The value for key, or None (and a miss) if it isn't cached."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        entries = self._entries
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def items(self):
+        return self._entries.items()
+
+    def update(self, items: Iterable[tuple]):
+        for key, value in items:
+            self.put(key, value)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+class Hint(NamedTuple):
+    """
+    The best decision for a hand and the expected value of each one allowed.
+
+    :ivar choice: The decision with the highest expected value.
+    :ivar evs: Expected value per allowed decision, in units of the hand's bet.
+    """
+    choice: TurnChoices
+    evs: Dict[TurnChoices, float]
+
+    def describe(self) -> str:
+        ranked = sorted(self.evs.items(), key=lambda item: -item[1])
+        return f"{self.choice.name.title()} (" + ', '.join(f"{choice.name.lower()} {ev:+.3f}"
+                                                         for choice, ev in ranked) + ")"
+
+
+class EVAnalyzer:
+    """
+    Exact expected values of the player's decisions against the remaining shoe.
+
+    :ivar rules: The table rules the values are computed for.
+    :type rules: RuleSet
+    :ivar cache: Memoized dealer distributions and hand values.
+    :type cache: BoundedCache
+    :ivar cache_path: Where ``save()`` writes the cache by default, and where it was loaded from.
+    :type cache_path: Path | None
+    :ivar removal_depth: Player draws taken out of the composition before it is frozen; None for all of them.
+    :type removal_depth: int | None
+    """
+    DEFAULT_MAX_ENTRIES = 250_000
+    CACHE_FORMAT_VERSION = 1
+    # what hints in play and EVStrategy use, close to exact at a small fraction of the cost
+    HINT_REMOVAL_DEPTH = 2
+
+    def __init__(self, rules: RuleSet, max_entries: int = None, cache_path: Union[str, Path] = None,
+                 removal_depth: Optional[int] = None):
+        self.rules = rules
+        self.removal_depth = removal_depth
+        self.cache = BoundedCache(max_entries or self.__class__.DEFAULT_MAX_ENTRIES)
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        if self.cache_path is not None and self.cache_path.exists():
+            self.load(self.cache_path)
+
+    # dealer
+
+    def dealer_outcomes(self, counts: RankCounts, upcard: int) -> DealerOutcomes:
+        """
+        Chances of the dealer finishing on 17 to 21 or busting, given no dealer blackjack.
+
+        :param counts: Unseen cards, i.e. without the upcard and the player's cards.
+        :param upcard: The upcard's rank index.
+        """
+        key = (_UPCARD, counts, upcard)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        dealer_hits = self.rules.dealer_hits
+        shoe = list(counts)
+        # the dealer's outcomes from a hand depend only on which cards were drawn, not their order;
+        # a drawn multiset is keyed by its counts as base-32 digits
+        reached: Dict[int, DealerOutcomes] = {}
+
+        def outcomes_from(hard: int, ace: bool, n: int, drawn: int, excluded: int = None) -> DealerOutcomes:
+            known = reached.get(drawn)
+            if known is not None:
+                return known
+            available = n - shoe[excluded] if excluded is not None else n
+            if not available:
+                # an exhausted composition: the dealer can't draw, count it as the weakest standing total
+                return _STANDS_ON_17
+            outcomes = [0.0] * DEALER_OUTCOMES
+            for rank in range(RANKS):
+                count = shoe[rank]
+                if not count or rank == excluded:
+                    continue
+                p = count / available
+                card_hard, card_ace = hard + rank + 1, ace or rank == ACE
+                soft = card_ace and card_hard <= 11
+                total = card_hard + 10 if soft else card_hard
+                if total > 21:
+                    outcomes[BUST] += p
+                elif dealer_hits[soft][total]:
+                    shoe[rank] = count - 1
+                    after = outcomes_from(card_hard, card_ace, n - 1, drawn + _DRAWN_DIGITS[rank])
+                    shoe[rank] = count
+                    for i in range(DEALER_OUTCOMES):
+                        outcomes[i] += p * after[i]
+                else:
+                    outcomes[total - 17] += p
+            known = reached[drawn] = tuple(outcomes)
+            return known
+
+        # the dealer peeked: with an ace up the hole card is no ten, with a ten up no ace
+        result = outcomes_from(upcard + 1, upcard == ACE, sum(shoe), 0,
+                               TEN if upcard == ACE else ACE if upcard == TEN else None)
+        self.cache.put(key, result)
+        return result
+
+    # player
+
+    def stand_ev(self, counts: RankCounts, upcard: int, total: int) -> float:
+        if total > 21:
+            return -1.0
+        outcomes = self.dealer_outcomes(counts, upcard)
+        ev = outcomes[BUST]
+        for i in range(BUST):
+            dealer_total = 17 + i
+            if total > dealer_total:
+                ev += outcomes[i]
+            elif total < dealer_total:
+                ev -= outcomes[i]
+        return ev
+
+    def _hit_or_stand(self, counts: RankCounts, upcard: int, hard: int, ace: bool, depth: Optional[int]) -> float:
+        """The value of a hand played on by hitting or standing, whichever is better."""
+        total = _best_total(hard, ace)
+        if total > 21:
+            return -1.0
+        key = (_HIT_STAND, counts, upcard, hard, ace, depth)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        value = self.stand_ev(counts, upcard, total)
+        if total < 21:
+            value = max(value, self._hit(counts, upcard, hard, ace, depth))
+        self.cache.put(key, value)
+        return value
+
+    def _hit(self, counts: RankCounts, upcard: int, hard: int, ace: bool, depth: Optional[int]) -> float:
+        # drawn cards are taken out of the composition for depth more draws (None: every draw);
+        # past that the player draws from, and the dealer plays against, the composition as it was
+        n = sum(counts)
+        if not n:
+            return self.stand_ev(counts, upcard, _best_total(hard, ace))
+        frozen = depth == 0
+        next_depth = depth - 1 if depth else depth
+        ev = 0.0
+        for rank, count in enumerate(counts):
+            if count:
+                after = counts if frozen else _without(counts, rank)
+                ev += count / n * self._hit_or_stand(after, upcard, hard + rank + 1, ace or rank == ACE, next_depth)
+        return ev
+
+    def hit_ev(self, counts: RankCounts, upcard: int, hard: int, ace: bool) -> float:
+        """Take a card, then hit or stand, whichever is better."""
+        return self._hit(counts, upcard, hard, ace, self.removal_depth)
+
+    def double_ev(self, counts: RankCounts, upcard: int, hard: int, ace: bool) -> float:
+        """Double the bet and take exactly one card."""
+        n = sum(counts)
+        if not n:
+            return 2 * self.stand_ev(counts, upcard, _best_total(hard, ace))
+        ev = 0.0
+        for rank, count in enumerate(counts):
+            if count:
+                ev += count / n * self.stand_ev(_without(counts, rank), upcard,
+                                                 _best_total(hard + rank + 1, ace or rank == ACE))
+        return 2 * ev
+
+    def split_ev(self, counts: RankCounts, upcard: int, pair_rank: int) -> float:
+        """Split a pair of pair_rank: twice the value of one hand started from one of them."""
+        n = sum(counts)
+        if not n:
+            return 0.0
+        depth = self.removal_depth
+        ev = 0.0
+        for rank, count in enumerate(counts):
+            if not count:
+                continue
+            rest = _without(counts, rank)
+            hard, ace = pair_rank + rank + 2, pair_rank == ACE or rank == ACE
+            if pair_rank == ACE:
+                # split aces get one card each
+                value = self.stand_ev(rest, upcard, _best_total(hard, ace))
+            else:
+                value = self._hit_or_stand(rest, upcard, hard, ace, depth)
+                if self.rules.double_after_split:
+                    value = max(value, self.double_ev(rest, upcard, hard, ace))
+            ev += count / n * value
+        return 2 * ev
+
+    def evs(self, hand: Sequence[int], upcard: int, counts: RankCounts, can_double: bool = True,
+            can_split: bool = True, can_surrender: bool = True) -> Dict[TurnChoices, float]:
+        """
+        Expected value of each decision allowed for a hand.
+
+        Doubling, splitting and surrendering are offered when the hand allows them (its
+        first two cards, a pair) and the caller does; the rules are applied on top.
+
+        :param hand: The hand's card codes.
+        :param upcard: The dealer's upcard code.
+        :param counts: Rank counts of the cards the player hasn't seen, see ``unseen_counts``.
+        :rtype: dict[TurnChoices, float]
+        """
+        hard = sum(CARD_POINTS[code] for code in hand)
+        ace = any(CARD_POINTS[code] == 1 for code in hand)
+        up = rank_of(upcard)
+        total = _best_total(hard, ace)
+        evs = {TurnChoices.STAY: self.stand_ev(counts, up, total)}
+        if total < 21:
+            evs[TurnChoices.HIT] = self.hit_ev(counts, up, hard, ace)
+        if len(hand) == 2:
+            if can_double:
+                evs[TurnChoices.DOUBLE] = self.double_ev(counts, up, hard, ace)
+            if can_split and CARD_POINTS[hand[0]] == CARD_POINTS[hand[1]]:
+                evs[TurnChoices.SPLIT] = self.split_ev(counts, up, rank_of(hand[0]))
+            if can_surrender and self.rules.surrender:
+                evs[TurnChoices.SURRENDER] = -0.5
+        return evs
+
+    def hint(self, hand: Sequence[int], upcard: int, counts: RankCounts, **allowed) -> Hint:
+        """The best decision for a hand; takes the same arguments as ``evs()``."""
+        evs = self.evs(hand, upcard, counts, **allowed)
+        return Hint(max(evs, key=evs.get), evs)
+
+    def hint_for(self, game: 'HeadlessGame', affordable: bool = True) -> Hint:
+        """
+        The best decision for a HeadlessGame's active hand, among those the table allows.
+
+        :param affordable: Only offer doubling and splitting when the seat has the chips.
+        """
+        hands, hand = game.current_hands, game.active_hand
+        return self.hint(hands.codes(hand), card_code(game.dealer.hand[1]), unseen_counts(game),
+                         **allowed_choices(game, affordable))
+
+    # persistence
+
+    def save(self, path: Union[str, Path] = None):
+        """Write the cache to path (default ``cache_path``), replacing the file atomically."""
+        path = Path(path) if path is not None else self.cache_path
+        if path is None:
+            raise ValueError("No path to save the EV cache to.")
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump((self.__class__.CACHE_FORMAT_VERSION, self.rules.raw, list(self.cache.items())), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, path: Union[str, Path]) -> bool:
+        """
+        Add the entries of a cache saved by ``save()``, if it was computed for the same rules.
+
+        Only load files this program wrote; they are pickles.
+
+        :return: Whether the file's entries were loaded.
+        """
+        with open(path, 'rb') as f:
+            version, raw_rules, entries = pickle.load(f)
+        if version != self.__class__.CACHE_FORMAT_VERSION or tuple(raw_rules) != self.rules.raw:
+            return False
+        self.cache.update(entries)
+        return True
+
+
+def allowed_choices(game: 'HeadlessGame', affordable: bool = True) -> Dict[str, bool]:
+    """
+    Whether a HeadlessGame's active hand may double, split and surrender, as keyword
+    arguments for ``EVAnalyzer.evs()``.
+
+    :param affordable: Only allow doubling and splitting when the seat has the chips.
+    """
+    hands, hand, player = game.current_hands, game.active_hand, game.current_player
+    can_raise = not affordable or (player.chips or 0) >= hands.bets[hand]
+    return {'can_double': (can_raise and hands.can_double(hand)
+                           and (hands.n_hands == 1 or game.rules.double_after_split)),
+            'can_split': can_raise and hands.can_split(hand),
+            'can_surrender': hands.can_surrender(hand) and game.rules.surrender}
+
+
+def unseen_counts(game: 'Game') -> RankCounts:
+    """Rank counts of the cards the player hasn't seen: the shoe and the dealer's hole card."""
+    counts = list(rank_counts(map(card_code, game.game_deck.deck)))
+    if game.dealer.hand:
+        # hand[0] is the hole card, see Dealer.hidden_hand_setup
+        counts[rank_of(card_code(game.dealer.hand[0]))] += 1
+    return tuple(counts)
+
+
+class EVStrategy:
+    """
+    A playing decision for ``HeadlessGame.play_hand`` (and the simulators) that takes
+    the decision with the highest expected value against the remaining shoe.
+
+    An analyzer is built for each table's rules as they are met, so one EVStrategy
+    can play variants with different rules.
+
+    :ivar analyzers: Analyzer per raw rule set.
+    :type analyzers: dict[tuple, EVAnalyzer]
+    """
+    def __init__(self, analyzer: Optional[EVAnalyzer] = None,
+                 removal_depth: Optional[int] = EVAnalyzer.HINT_REMOVAL_DEPTH):
+        self.removal_depth = removal_depth
+        self.analyzers: Dict[tuple, EVAnalyzer] = {}
+        if analyzer is not None:
+            self.analyzers[analyzer.rules.raw] = analyzer
+
+    def analyzer_for(self, rules: RuleSet) -> EVAnalyzer:
+        analyzer = self.analyzers.get(rules.raw)
+        if analyzer is None:
+            analyzer = self.analyzers[rules.raw] = EVAnalyzer(rules, removal_depth=self.removal_depth)
+        return analyzer
+
+    def __call__(self, game: 'HeadlessGame') -> TurnChoices:
+        return self.analyzer_for(game.rules).hint_for(game).choice
+
+    def cache_info(self) -> CacheInfo:
+        """The analyzers' caches taken together, for ``metrics.track_cache``."""
+        infos = [analyzer.cache.cache_info() for analyzer in list(self.analyzers.values())]
+        return CacheInfo(*(sum(column) for column in zip(*infos))) if infos else CacheInfo(0, 0, 0, 0)
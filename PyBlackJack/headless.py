@@ -0,0 +1,621 @@
+"""
+PyBlackJack headless engine
+"""
+import random
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+from Backend.card_codes import CARD_POINTS, card_code, card_label
+from Backend.enum import HandOutcome, TurnChoices
+from Backend.output import NullSink
+from PyBlackJack import snapshot
+from PyBlackJack.Bank.SideBets import SIDE_BETS
+from PyBlackJack.history import LEAVE, HandHistoryWriter, HandLog
+from PyBlackJack.Players.Hands import HandTree
+from PyBlackJack.Players.Players import Player
+from PyBlackJack.Strategy.BetPolicies import BetContext, BetPolicy
+from PyBlackJack.events import CARD_DEALT, DECISION, HAND_START, NEW_SHOE, SETTLE
+from PyBlackJack.py_blackjack import Game
+
+
+class HandStateError(Exception):
+    """Raised when an action is not valid in the current phase of the hand."""
+    ...
+
+
+class HeadlessGame(Game):
+    """
+    A Game driven by method calls instead of ``input()``.
+
+    Used by the table server and by simulations. A hand is played as
+    ``start_hand(bets)`` followed by decisions (``player_hit()``, ``player_stay()``,
+    ``player_double()``, ``player_split()``, ``player_surrender()``, or ``act(choice)``)
+    for each seat's hands in turn; once every hand is done the dealer plays out and
+    the cage settles all hands in one pass. When the dealer shows an ace, each seat
+    is first offered insurance (``insure()``), then the dealer peeks for blackjack.
+    Nothing here blocks on the terminal: bankrupt players are paid back in and a
+    shoe is refilled and reshuffled in place when its ``reshuffle_policy`` says so
+    (by default once the cut card comes out) or too few cards are left for a hand.
+    Table rules (S17/H17, blackjack payout, double after split, surrender, decks,
+    penetration) come from ``game_settings.rules``.
+
+    Each seat's cards live in its player's ``hands`` (a HandTree of card codes);
+    ``player.hand`` is not used by this engine.
+
+    :ivar hand_over: True between hands (after settlement, before the next bet).
+    :type hand_over: bool
+    :ivar insurance_open: True while seats are being offered insurance.
+    :type insurance_open: bool
+    :ivar active_seat: The seat whose turn it is, or None between hands.
+    :type active_seat: int | None
+    :ivar active_hand: The hand of active_seat being played.
+    :type active_hand: int | None
+    :ivar outcomes: Outcome of each hand in the last settled round, per seat (None if the seat sat out).
+    :type outcomes: list[tuple[HandOutcome, ...] | None]
+    :ivar seat_nets: Chips each seat won (negative if lost) on its hands in the last settled round;
+        side bets are kept out of it and reported in side_results.
+    :type seat_nets: list[int]
+    :ivar side_bets: The side bets the table offers, by name; defaults to ``SideBets.SIDE_BETS``.
+    :type side_bets: dict[str, SideBet]
+    :ivar side_results: Per seat, each side bet of the last round as ``name: (outcome name, net chips)``.
+    :type side_results: list[dict[str, tuple[str, int]]]
+    :ivar history: Writer every settled round is recorded to, or None; see ``record_history()``.
+    :type history: HandHistoryWriter | None
+    :ivar shoe_source: Optional iterator of card-code sequences; each replacement shoe is
+        the next one from it instead of a fresh shuffle (see ``Deck.load_codes``).
+    :type shoe_source: Iterator[Iterable[int]] | None
+    """
+    def __init__(self, **kwargs):
+        # DatabasePlayer prompts on the terminal; callers that want a DB wire it up themselves
+        kwargs.setdefault('use_database', False)
+        # nobody reads the console messages of a game driven by method calls; don't even format them
+        kwargs.setdefault('output', NullSink())
+        super().__init__(**kwargs)
+        self.rules = self.game_settings.rules
+        self.shoe_source = kwargs.get('shoe_source', None)
+        self.side_bets = kwargs.get('side_bets', None) or SIDE_BETS
+        self.history = None
+        self.hand_log = None
+        if kwargs.get('history') is not None:
+            self.record_history(kwargs['history'])
+        self.hand_over = True
+        self.insurance_open = False
+        self.active_seat = None
+        self.active_hand = None
+        self.in_hand = [False] * self.seats
+        # seats that left mid-hand and are skipped when it's their turn
+        self.standing = [False] * self.seats
+        self.outcomes = [None] * self.seats
+        self.seat_nets = [0] * self.seats
+        self.side_results = [{} for _ in range(self.seats)]
+        self._chips_at_bet = [0] * self.seats
+        self.hands_played = 0
+        # the table_state-free implementations, so simulations don't build a state per decision
+        self._choices = {TurnChoices.HIT: self._hit,
+                         TurnChoices.STAY: self._stay,
+                         TurnChoices.DOUBLE: self._double,
+                         TurnChoices.SPLIT: self._split,
+                         TurnChoices.SURRENDER: self._surrender,
+                         TurnChoices.INSURANCE: self._insure}
+
+    @property
+    def current_player(self) -> Player:
+        return self.players[self.active_seat]
+
+    @property
+    def current_hands(self) -> HandTree:
+        return self.current_player.hands
+
+    @property
+    def current_total(self) -> int:
+        return self.current_hands.total(self.active_hand)
+
+    @property
+    def last_outcome(self):
+        """Outcome of seat 0's first hand in the last round."""
+        return self.outcomes[0][0] if self.outcomes[0] else None
+
+    @property
+    def dealer_upcard_points(self) -> int:
+        # hand[0] is the hole card, see Dealer.hidden_hand_setup
+        return CARD_POINTS[card_code(self.dealer.hand[1])]
+
+    @property
+    def shoe_reserve(self) -> int:
+        # enough for a long, resplit hand from every seat in it
+        return max(self.game_deck.shoe_runout_warning_threshold,
+                   self.__class__.SHOE_RESERVE_PER_HAND * (sum(self.in_hand) + 1))
+
+    @property
+    def needs_new_shoe(self) -> bool:
+        return self.game_deck.reshuffle_due(self.shoe_reserve)
+
+    def load_shoe(self, codes: Iterable[int]):
+        """Deal the following hands from the given card codes, top card first."""
+        self.game_deck.load_codes(codes)
+
+    def _ensure_shoe(self):
+        if not self.needs_new_shoe:
+            return
+        if self.shoe_source is not None:
+            self.load_shoe(next(self.shoe_source))
+        else:
+            self.game_deck.refill()
+        self.events.emit(NEW_SHOE, game=self, cards=len(self.game_deck.deck))
+
+    def _normalize_bets(self, bets: Union[int, Sequence[int]]):
+        if isinstance(bets, int):
+            bets = [bets]
+        bets = [b or 0 for b in bets] + [0] * (self.seats - len(bets))
+        if len(bets) > self.seats:
+            raise ValueError(f"{len(bets)} bets for {self.seats} seats.")
+        if not any(bets):
+            raise ValueError("At least one seat must bet.")
+        return bets
+
+    def _normalize_side_wagers(self, side_wagers, bets: Sequence[int]):
+        if isinstance(side_wagers, dict):
+            side_wagers = [side_wagers]
+        side_wagers = [w or {} for w in side_wagers] + [{}] * (self.seats - len(side_wagers))
+        if len(side_wagers) > self.seats:
+            raise ValueError(f"{len(side_wagers)} side wagers for {self.seats} seats.")
+        for seat, wagers in enumerate(side_wagers):
+            if wagers and not bets[seat]:
+                raise ValueError(f"Seat {seat} can't make a side bet without betting the hand.")
+            for name, stake in wagers.items():
+                if name not in self.side_bets:
+                    raise ValueError(f"No side bet '{name}' at this table; it offers {', '.join(self.side_bets)}.")
+                if stake <= 0:
+                    raise ValueError(f"A side bet is a positive number of chips, not {stake}.")
+        return side_wagers
+
+    def _settle_side_bets(self, seat: int, wagers: Dict[str, int]):
+        """Settle a seat's side bets on its first two cards and the dealer's upcard."""
+        player = self.players[seat]
+        codes = player.hands.codes(0)
+        upcard = card_code(self.dealer.hand[1])
+        results = self.side_results[seat]
+        for name, stake in wagers.items():
+            side_bet = self.side_bets[name]
+            outcome = side_bet.classify(codes, upcard)
+            results[name] = (side_bet.OUTCOMES[outcome],
+                             self.banker.settle_side_bet(player, side_bet, stake, outcome, seat))
+
+    def side_net(self, seat: int = 0) -> int:
+        """Chips seat won (negative if lost) on its side bets this round."""
+        return sum(net for _, net in self.side_results[seat].values())
+
+    def record_history(self, writer: Optional[HandHistoryWriter]):
+        """Record every card, decision and settlement from the next hand on to writer; None stops."""
+        self.history = writer
+        self.hand_log = HandLog() if writer is not None else None
+
+    def _draw(self):
+        card = self.game_deck.draw()
+        if self.hand_log is not None:
+            self.hand_log.cards.append(card_code(card))
+        return card
+
+    def _deal_to(self, seat: int, hand: int):
+        card = self._draw()
+        self.players[seat].hands.add(hand, card_code(card))
+        self.events.emit(CARD_DEALT, game=self, seat=seat, hand=hand, card=card)
+
+    def _deal_dealer(self):
+        card = self._draw()
+        self.dealer.hand.append(card)
+        self.events.emit(CARD_DEALT, game=self, seat=None, hand=0, card=card)
+
+    def _record_decision(self, choice: TurnChoices):
+        """Log and emit an accepted decision; call it only once the action's checks and bet have passed."""
+        if self.hand_log is not None:
+            self.hand_log.action(self.active_seat, self.active_hand, choice.value)
+        self.events.emit(DECISION, game=self, seat=self.active_seat, hand=self.active_hand, choice=choice)
+
+    def setup_new_hand(self):
+        """Reset every seat and the dealer and deal two rounds in seat order, dealer last."""
+        for player in self.players:
+            player.__init__(player.chips)
+        self.dealer.__init__(chosen_card_back=self.game_deck.card_back, player_chips=self.dealer.chips)
+        seated = [seat for seat, playing in enumerate(self.in_hand) if playing]
+        for seat in seated:
+            self.players[seat].hands.new_hand(0)
+        for _ in range(2):
+            for seat in seated:
+                self._deal_to(seat, 0)
+            self._deal_dealer()
+        self.dealer.hidden_hand_setup()
+
+    def start_hand(self, bets: Union[int, Sequence[int]],
+                   side_wagers: Union[Dict[str, int], Sequence[Optional[Dict[str, int]]]] = None):
+        """
+        Take each seat's bet and deal a new hand.
+
+        Side bets are settled as soon as the cards are out, before insurance and the
+        dealer's peek. Their results go to ``side_results`` and stay out of
+        ``seat_nets`` and the hand history, which record the hand itself.
+
+        :param bets: One bet per seat (0 or None sits the seat out); an int bets seat 0 only.
+        :param side_wagers: Per seat, chips on each side bet by name (e.g. ``{'21+3': 5}``);
+            one dict is seat 0's. Only seats that bet the hand may make side bets.
+        :raises HandStateError: If the previous hand has not been settled yet.
+        :raises ValueError: If no seat bets, a bet and its side bets exceed that player's chips,
+            or a side bet is not offered.
+        :return: The table state after the deal.
+        :rtype: dict
+        """
+        if not self.hand_over:
+            raise HandStateError("Hand already in progress.")
+        bets = self._normalize_bets(bets)
+        if side_wagers is not None:
+            side_wagers = self._normalize_side_wagers(side_wagers, bets)
+        for seat, (player, bet) in enumerate(zip(self.players, bets)):
+            if bet and player.chips <= 0:
+                self.banker.pay_in(player, seat)
+            staked = bet + (sum(side_wagers[seat].values()) if side_wagers is not None else 0)
+            if bet and not 0 < staked <= player.chips:
+                raise ValueError("Bet amount cannot exceed players available chips, or be zero.")
+
+        self.in_hand = [bool(b) for b in bets]
+        self.standing = [False] * self.seats
+        self._chips_at_bet = [p.chips for p in self.players]
+        self._ensure_shoe()
+        self.game_deck.hand_started()
+        self.banker.begin_hand()
+        if self.hand_log is not None:
+            self.hand_log.begin(bets, self._chips_at_bet)
+        self.events.emit(HAND_START, game=self, bets=bets)
+        self.setup_new_hand()
+        for seat, (player, bet) in enumerate(zip(self.players, bets)):
+            if bet:
+                player.bet_amount = bet
+                self.banker.take_bet(player, seat)
+                player.has_bet = True
+                player.hands.bets[0] = bet
+                if player.hands.is_blackjack(0):
+                    player.hands.finish(0)
+            self.side_results[seat] = {}
+            if side_wagers is not None and side_wagers[seat]:
+                self._settle_side_bets(seat, side_wagers[seat])
+        self.outcomes = [None] * self.seats
+        self.hand_over = False
+        self.active_seat = self.active_hand = None
+        if self.dealer_upcard_points == 1:
+            self.insurance_open = True
+            self._next_insurance_seat()
+        else:
+            self._peek()
+        return self.table_state()
+
+    def _next_insurance_seat(self):
+        start = 0 if self.active_seat is None else self.active_seat + 1
+        for seat in range(start, self.seats):
+            if self.in_hand[seat] and not self.standing[seat]:
+                self.active_seat = seat
+                return
+        self.insurance_open = False
+        self.active_seat = None
+        self._peek()
+
+    @property
+    def dealer_has_blackjack(self) -> bool:
+        return len(self.dealer.hand) == 2 and self.dealer.get_hand_value() == 21
+
+    def _peek(self):
+        """Settle insurance, then end the round on a dealer blackjack or start play."""
+        if self.dealer_upcard_points == 1:
+            for seat, player in enumerate(self.players):
+                if self.in_hand[seat] and player.hands.insurance:
+                    self.banker.settle_insurance(player, self.dealer_has_blackjack, seat)
+        if self.dealer_upcard_points in (1, 10) and self.dealer_has_blackjack:
+            self.settle()
+        else:
+            self._advance()
+
+    def _insure(self, seat: int = None, take: bool = True):
+        if not self.insurance_open:
+            raise HandStateError("Insurance is only offered when the dealer shows an ace.")
+        if seat is not None and seat != self.active_seat:
+            raise HandStateError(f"It is seat {self.active_seat}'s turn.")
+        player = self.current_player
+        if self.hand_log is not None:
+            self.hand_log.action(self.active_seat, int(take), TurnChoices.INSURANCE.value)
+        self.events.emit(DECISION, game=self, seat=self.active_seat, hand=0, choice=TurnChoices.INSURANCE, take=take)
+        # up to half the bet; a short stack insures what it can
+        amount = min(player.hands.bets[0] // 2, player.chips)
+        if take and amount:
+            self.banker.take_insurance(player, amount, self.active_seat)
+            player.hands.insurance = amount
+        self._next_insurance_seat()
+
+    def insure(self, seat: int = None, take: bool = True):
+        """
+        Accept or decline insurance for the seat being offered it, staking half its bet
+        (or the player's remaining chips, if fewer).
+
+        :raises HandStateError: If insurance is not being offered to this seat.
+        """
+        self._insure(seat, take)
+        return self.table_state()
+
+    def _check_turn(self, seat: int = None):
+        if self.hand_over:
+            raise HandStateError("No hand in progress, place a bet first.")
+        if self.insurance_open:
+            raise HandStateError("Insurance is being offered, INSURE or decline first.")
+        if seat is not None and seat != self.active_seat:
+            raise HandStateError(f"It is seat {self.active_seat}'s turn.")
+
+    def _advance(self):
+        """Move to the next hand still to be played, or play the dealer and settle if there is none."""
+        for seat in range(self.active_seat or 0, self.seats):
+            if not self.in_hand[seat] or self.standing[seat]:
+                continue
+            hands = self.players[seat].hands
+            hand = hands.next_open()
+            while hand != -1 and hands.counts[hand] == 1:
+                # a split hand gets its second card when it comes up
+                self._deal_to(seat, hand)
+                if hands.is_split_aces(hand) or hands.total(hand) == 21:
+                    hands.finish(hand)
+                    hand = hands.next_open()
+                else:
+                    break
+            if hand != -1:
+                self.active_seat, self.active_hand = seat, hand
+                return
+        self.active_seat = self.active_hand = None
+        if any(not hands.is_busted(h) and not hands.is_surrendered(h)
+               for hands in self._seated_hands() for h in range(hands.n_hands)):
+            self.dealer_turn()
+        self.settle()
+
+    def _seated_hands(self):
+        return (p.hands for p, playing in zip(self.players, self.in_hand) if playing)
+
+    def _finish_current(self):
+        self.current_hands.finish(self.active_hand)
+        self._advance()
+
+    def is_bust(self, player: Player):
+        # settlement is driven by the turn methods, not by the bust itself
+        player.busted = True
+        return player
+
+    def act(self, choice: TurnChoices, seat: int = None):
+        """Apply a TurnChoices decision for seat (or the active seat)."""
+        self._choices[choice](seat)
+        return self.table_state()
+
+    def _hit(self, seat: int = None):
+        self._check_turn(seat)
+        self._record_decision(TurnChoices.HIT)
+        self._deal_to(self.active_seat, self.active_hand)
+        self.current_player.last_move = 'hit'
+        if self.current_hands.total(self.active_hand) >= 21:
+            self._finish_current()
+
+    def player_hit(self, seat: int = None):
+        self._hit(seat)
+        return self.table_state()
+
+    def _stay(self, seat: int = None):
+        self._check_turn(seat)
+        self._record_decision(TurnChoices.STAY)
+        self.current_player.last_move = 'stay'
+        self._finish_current()
+
+    def player_stay(self, seat: int = None):
+        self._stay(seat)
+        return self.table_state()
+
+    def _double(self, seat: int = None):
+        self._check_turn(seat)
+        hands, hand = self.current_hands, self.active_hand
+        if not hands.can_double(hand):
+            raise HandStateError("Can only double on the first two cards.")
+        if hands.n_hands > 1 and not self.rules.double_after_split:
+            raise HandStateError("Doubling after a split is not allowed at this table.")
+        self.banker.raise_bet(self.current_player, hands.bets[hand], self.active_seat)
+        self._record_decision(TurnChoices.DOUBLE)
+        hands.double(hand)
+        self._deal_to(self.active_seat, hand)
+        self.current_player.last_move = 'double'
+        self._finish_current()
+
+    def player_double(self, seat: int = None):
+        """Double the bet, take exactly one more card and stand."""
+        self._double(seat)
+        return self.table_state()
+
+    def _split(self, seat: int = None):
+        self._check_turn(seat)
+        hands, hand = self.current_hands, self.active_hand
+        if not hands.can_split(hand):
+            raise HandStateError("Can only split a pair, up to "
+                                 f"{HandTree.MAX_HANDS} hands, and not resplit aces.")
+        self.banker.raise_bet(self.current_player, hands.bets[hand], self.active_seat)
+        self._record_decision(TurnChoices.SPLIT)
+        hands.split(hand)
+        self._deal_to(self.active_seat, hand)
+        self.current_player.last_move = 'split'
+        if hands.is_split_aces(hand) or hands.total(hand) == 21:
+            self._finish_current()
+
+    def player_split(self, seat: int = None):
+        """Split a pair into two hands with equal bets; split aces get one card each."""
+        self._split(seat)
+        return self.table_state()
+
+    def _surrender(self, seat: int = None):
+        self._check_turn(seat)
+        if not self.rules.surrender:
+            raise HandStateError("Surrender is not allowed at this table.")
+        if not self.current_hands.can_surrender(self.active_hand):
+            raise HandStateError("Can only surrender the first two cards of an unsplit hand.")
+        self._record_decision(TurnChoices.SURRENDER)
+        self.current_hands.surrender(self.active_hand)
+        self.current_player.last_move = 'surrender'
+        self._advance()
+
+    def player_surrender(self, seat: int = None):
+        """Late surrender: give up half the bet on the first two cards after the dealer peeked."""
+        self._surrender(seat)
+        return self.table_state()
+
+    def leave_seat(self, seat: int):
+        """Stand a seat that left mid-hand; its bets still play out against the dealer."""
+        if self.hand_over or not self.in_hand[seat]:
+            return
+        if self.hand_log is not None:
+            self.hand_log.action(seat, 0, LEAVE)
+        self.players[seat].last_move = 'stay'
+        self.standing[seat] = True
+        if seat == self.active_seat:
+            if self.insurance_open:
+                self._next_insurance_seat()
+            else:
+                self._advance()
+
+    def dealer_should_stand(self):
+        return self.dealer.should_stay()
+
+    def dealer_turn(self):
+        while not self.dealer_should_stand():
+            self._deal_dealer()
+        self.check_bust(self.dealer)
+        self.dealer.last_move = 'stay'
+
+    def get_outcome(self, player: Player = None, hand: int = 0) -> HandOutcome:
+        hands = (player or self.player).hands
+        if hands.is_surrendered(hand):
+            return HandOutcome.SURRENDER
+        if hands.is_busted(hand):
+            return HandOutcome.LOSE
+        if self.dealer_has_blackjack:
+            return HandOutcome.PUSH if hands.is_blackjack(hand) else HandOutcome.LOSE
+        if hands.is_blackjack(hand):
+            return HandOutcome.BLACKJACK
+        player_value = hands.total(hand)
+        dealer_value = self.dealer.get_hand_value()
+        if self.dealer.busted or player_value > dealer_value:
+            return HandOutcome.WIN
+        if player_value == dealer_value:
+            return HandOutcome.PUSH
+        return HandOutcome.LOSE
+
+    def settle(self):
+        with self.events.phase(SETTLE, game=self) as settlement:
+            results = [(seat, player, self.get_outcome(player, hand), player.hands.bets[hand])
+                       for seat, player in enumerate(self.players) if self.in_hand[seat]
+                       for hand in range(player.hands.n_hands)]
+            self.banker.settle(results)
+            for seat, player in enumerate(self.players):
+                if self.in_hand[seat]:
+                    self.outcomes[seat] = tuple(outcome for s, _, outcome, _ in results if s == seat)
+                self.seat_nets[seat] = (player.chips - self._chips_at_bet[seat] - self.side_net(seat)
+                                        if self.in_hand[seat] else 0)
+            self.hand_over = True
+            self.insurance_open = False
+            self.active_seat = self.active_hand = None
+            self.hands_played += 1
+            if self.history is not None:
+                self.history.write_hand(self, self.hand_log)
+            settlement['outcomes'] = self.outcomes
+        return self.outcomes
+
+    def bet_context(self, seat: int = 0) -> BetContext:
+        """What a BetPolicy sees before the next hand, counted on the shoe that hand will use."""
+        self._ensure_shoe()
+        return BetContext(bankroll=self.players[seat].chips,
+                          running_count=self.game_deck.running_count,
+                          true_count=self.game_deck.true_count,
+                          last_net=self.seat_nets[seat],
+                          hands_played=self.hands_played)
+
+    def policy_bets(self, policies: Sequence[Optional[BetPolicy]]):
+        """One bet per seat from its policy; None sits the seat out."""
+        return [policy.bet(self.bet_context(seat)) if policy is not None else 0
+                for seat, policy in enumerate(policies)]
+
+    def play_hand(self, bets, decide, should_insure=None, side_wagers=None):
+        """
+        Play a full hand without interaction.
+
+        :param bets: As for ``start_hand``, or one BetPolicy (or None) per seat.
+        :param decide: Callable taking this game and returning a TurnChoices for
+            ``current_hands[active_hand]``, or True to hit / False to stay.
+        :param should_insure: Optional callable taking this game and returning True to
+            insure ``current_player``; insurance is declined without it.
+        :param side_wagers: As for ``start_hand``.
+        :return: Outcomes per seat.
+        """
+        if not isinstance(bets, int) and any(isinstance(b, BetPolicy) for b in bets):
+            bets = self.policy_bets(bets)
+        self.start_hand(bets, side_wagers)
+        while not self.hand_over:
+            if self.insurance_open:
+                self._insure(take=bool(should_insure and should_insure(self)))
+                continue
+            choice = decide(self)
+            if choice is True or choice is False:
+                choice = TurnChoices.HIT if choice else TurnChoices.STAY
+            self._choices[choice]()
+        return self.outcomes
+
+    def snapshot(self) -> bytes:
+        """The table's full state as bytes, see ``PyBlackJack.snapshot``."""
+        return snapshot.snapshot(self)
+
+    def restore(self, data: bytes):
+        """
+        Return the table to a snapshot's state.
+
+        :raises SnapshotError: If data is not a snapshot of a table with this many seats.
+        """
+        snapshot.restore(self, data)
+        return self
+
+    def fork(self) -> 'HeadlessGame':
+        """
+        A new table in this one's current state, to play on without affecting this one.
+
+        The fork's shoe RNG starts as a copy of this one's, so both deal the same
+        shoes until one of them is played differently.
+        """
+        other = self.__class__(game_settings=self.game_settings, seats=self.seats, rng=random.Random(),
+                               output=self.output)
+        return other.restore(self.snapshot())
+
+    def seat_state(self, seat: int):
+        player = self.players[seat]
+        hands = player.hands
+        outcomes = self.outcomes[seat] or ()
+        return {
+            'seat': seat,
+            'hands': [{
+                'cards': [card_label(c) for c in hands.codes(hand)],
+                'total': hands.total(hand),
+                'bet': hands.bets[hand],
+                'doubled': hands.is_doubled(hand),
+                'surrendered': hands.is_surrendered(hand),
+                'outcome': outcomes[hand].value if hand < len(outcomes) else None,
+            } for hand in range(hands.n_hands)],
+            'insurance': hands.insurance,
+            'side_bets': {name: {'outcome': outcome, 'net': net}
+                          for name, (outcome, net) in self.side_results[seat].items()},
+            'chips': player.chips,
+        }
+
+    def table_state(self):
+        dealer_cards = [card_label(card_code(c)) for c in self.dealer.hand]
+        if not self.hand_over and dealer_cards:
+            dealer_cards[0] = '??'
+        return {
+            'seats': [self.seat_state(seat) for seat in range(self.seats)],
+            'dealer': dealer_cards,
+            'dealer_total': self.dealer.get_hand_value() if self.hand_over else None,
+            'active_seat': self.active_seat,
+            'active_hand': self.active_hand,
+            'insurance_open': self.insurance_open,
+            'hand_over': self.hand_over,
+        }
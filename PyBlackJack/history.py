@@ -0,0 +1,356 @@
+"""
+Append-only hand history.
+
+A history file starts with a header (magic, format version, the ledger's session
+id and the table rules as JSON) followed by one length-prefixed binary record per
+settled round. A record holds every card drawn in order, every decision, each
+seat's bet, chips, net and insurance, each hand's cards, flags, bet and outcome,
+the dealer's cards, and the next few undrawn cards so a round can be re-executed
+under rules that make the dealer draw more.
+
+``HandHistoryWriter`` buffers records and starts a new numbered file once the
+current one would pass ``max_bytes``; ``HandHistoryReader`` reads a file through
+``mmap``. ``export_jsonl`` writes a file's records as JSON lines for other tools.
+See ``PyBlackJack.replay`` for re-executing and re-scoring hands.
+
+Usage:
+    python -m PyBlackJack.history export hands-00000.pbjh [-o hands.jsonl]
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, Union
+
+from Backend.card_codes import card_code, card_label
+from Backend.enum import HandOutcome, TurnChoices
+from Backend.rules import RAW_RULES, RuleSet
+
+if TYPE_CHECKING:
+    from PyBlackJack.headless import HeadlessGame
+
+
+class HistoryFormatError(Exception):
+    """Raised when a file is not a hand history or a record is cut short."""
+    ...
+
+
+MAGIC = b'PBJH'
+VERSION = 1
+# magic, version, session id, rules JSON length
+FILE_HEADER_STRUCT = struct.Struct('<4sBqH')
+LENGTH_STRUCT = struct.Struct('<I')
+# hand id, seats, cards drawn, lookahead cards, dealer cards, decisions
+RECORD_STRUCT = struct.Struct('<qBHBBH')
+# bet, chips at bet, net, insurance, hands (0 if the seat sat out)
+SEAT_STRUCT = struct.Struct('<qqqqB')
+# outcome, flags, bet, cards
+HAND_STRUCT = struct.Struct('<BBqB')
+# seat, hand (for insurance: 1 taken, 0 declined), choice
+ACTION_STRUCT = struct.Struct('<BBB')
+
+OUTCOME_ORDER = tuple(HandOutcome)
+OUTCOME_INDEX = {outcome: i for i, outcome in enumerate(OUTCOME_ORDER)}
+# a seat leaving mid-hand, recorded alongside the TurnChoices values
+LEAVE = 0
+LOOKAHEAD = 8
+FILE_SUFFIX = '.pbjh'
+
+
+class HandLog:
+    """
+    The cards and decisions of the round in progress at one table.
+
+    A HeadlessGame recording history fills this as it deals and as seats act;
+    the writer encodes it when the round is settled.
+    """
+    __slots__ = ('bets', 'chips', 'cards', 'actions')
+
+    def __init__(self):
+        self.bets: Sequence[int] = ()
+        self.chips: Sequence[int] = ()
+        self.cards = array('B')
+        self.actions = bytearray()
+
+    def begin(self, bets: Sequence[int], chips: Sequence[int]):
+        self.bets = tuple(bets)
+        self.chips = tuple(chips)
+        del self.cards[:]
+        del self.actions[:]
+
+    def action(self, seat: int, hand: int, choice: int):
+        self.actions += ACTION_STRUCT.pack(seat, hand, choice)
+
+
+class HandResult(NamedTuple):
+    outcome: HandOutcome
+    flags: int
+    bet: int
+    cards: bytes
+
+
+class SeatRecord(NamedTuple):
+    bet: int
+    chips: int
+    net: int
+    insurance: int
+    hands: Tuple[HandResult, ...]
+
+
+class HandRecord(NamedTuple):
+    """
+    One settled round.
+
+    :ivar cards: Every card drawn in the round, in draw order.
+    :ivar lookahead: The cards that were next in the shoe when the round was settled.
+    :ivar actions: ``(seat, hand, choice)`` per decision, in order; choice is a TurnChoices
+        value or LEAVE, and for insurance hand is 1 if taken.
+    """
+    hand_id: int
+    seats: Tuple[SeatRecord, ...]
+    dealer: bytes
+    cards: bytes
+    lookahead: bytes
+    actions: Tuple[Tuple[int, int, int], ...]
+
+    @property
+    def bets(self) -> List[int]:
+        return [seat.bet for seat in self.seats]
+
+
+def encode_hand(game: 'HeadlessGame', log: HandLog) -> bytes:
+    """A settled round of game as a record, without its length prefix."""
+    deck = game.game_deck
+    lookahead = bytes(map(card_code, deck.deck[:LOOKAHEAD]))
+    dealer = bytes(map(card_code, game.dealer.hand))
+    parts = [RECORD_STRUCT.pack(game.banker.ledger.hand_id, game.seats, len(log.cards), len(lookahead), len(dealer),
+                          len(log.actions) // ACTION_STRUCT.size)]
+    for seat, player in enumerate(game.players):
+        hands = player.hands
+        n_hands = hands.n_hands if game.in_hand[seat] else 0
+        parts.append(SEAT_STRUCT.pack(log.bets[seat], log.chips[seat], game.seat_nets[seat], hands.insurance, n_hands))
+        outcomes = game.outcomes[seat]
+        for hand in range(n_hands):
+            codes = hands.codes(hand)
+            parts.append(HAND_STRUCT.pack(OUTCOME_INDEX[outcomes[hand]], hands.flags[hand], hands.bets[hand], len(codes)))
+            parts.append(bytes(codes))
+    parts += (dealer, log.cards.tobytes(), lookahead, bytes(log.actions))
+    return b''.join(parts)
+
+
+def decode_hand(buffer, offset: int = 0) -> HandRecord:
+    """Decode the record starting at offset (just past its length prefix)."""
+    hand_id, seats, n_cards, n_lookahead, n_dealer, n_actions = RECORD_STRUCT.unpack_from(buffer, offset)
+    offset += RECORD_STRUCT.size
+    seat_records = []
+    for _ in range(seats):
+        bet, chips, net, insurance, n_hands = SEAT_STRUCT.unpack_from(buffer, offset)
+        offset += SEAT_STRUCT.size
+        results = []
+        for _ in range(n_hands):
+            outcome, flags, hand_bet, n_codes = HAND_STRUCT.unpack_from(buffer, offset)
+            offset += HAND_STRUCT.size
+            results.append(HandResult(OUTCOME_ORDER[outcome], flags, hand_bet, bytes(buffer[offset:offset + n_codes])))
+            offset += n_codes
+        seat_records.append(SeatRecord(bet, chips, net, insurance, tuple(results)))
+    dealer = bytes(buffer[offset:offset + n_dealer])
+    offset += n_dealer
+    cards = bytes(buffer[offset:offset + n_cards])
+    offset += n_cards
+    lookahead = bytes(buffer[offset:offset + n_lookahead])
+    offset += n_lookahead
+    actions = tuple(ACTION_STRUCT.iter_unpack(buffer[offset:offset + n_actions * ACTION_STRUCT.size]))
+    return HandRecord(hand_id, tuple(seat_records), dealer, cards, lookahead, actions)
+
+
+def _rules_json(rules: RuleSet) -> bytes:
+    return json.dumps(dict(zip(RAW_RULES, rules.raw))).encode()
+
+
+class HandHistoryWriter:
+    """
+    Writes records to ``<directory>/<prefix>-00000.pbjh``, ``-00001``, and so on.
+
+    Records are collected in memory and written once ``buffer_size`` bytes are
+    pending; a record never spans two files.
+
+    :ivar paths: Every file written so far, oldest first.
+    :type paths: list[Path]
+    """
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    DEFAULT_BUFFER_SIZE = 256 * 1024
+
+    def __init__(self, directory: Union[str, Path], rules: RuleSet, session_id: int = 0, prefix: str = 'hands',
+                 max_bytes: int = DEFAULT_MAX_BYTES, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.session_id = session_id
+        self._header_rules = _rules_json(rules)
+        self._buffer = bytearray()
+        self._file = None
+        self._file_bytes = 0
+        self._header_size = FILE_HEADER_STRUCT.size + len(self._header_rules)
+        self.paths: List[Path] = []
+        self.records = 0
+        self._open_next()
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+        path = Path(self.directory, f"{self.prefix}-{len(self.paths):05d}{FILE_SUFFIX}")
+        self._file = open(path, 'wb')
+        self.paths.append(path)
+        header = FILE_HEADER_STRUCT.pack(MAGIC, VERSION, self.session_id, len(self._header_rules)) + self._header_rules
+        self._file.write(header)
+        self._file_bytes = len(header)
+
+    def write(self, record: bytes):
+        """Append one encoded record, rotating first if it would overflow the current file."""
+        pending = self._file_bytes + len(self._buffer)
+        # a record bigger than max_bytes still gets a file to itself
+        if pending + LENGTH_STRUCT.size + len(record) > self.max_bytes and pending > self._header_size:
+            self.flush()
+            self._open_next()
+        self._buffer += LENGTH_STRUCT.pack(len(record))
+        self._buffer += record
+        self.records += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_hand(self, game: 'HeadlessGame', log: HandLog):
+        self.write(encode_hand(game, log))
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file_bytes += len(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HandHistoryReader:
+    """
+    Reads one history file through ``mmap``.
+
+    :ivar rules: The table rules the hands were played under.
+    :type rules: RuleSet
+    :ivar session_id: The ledger session the hands belong to.
+    :type session_id: int
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.session_id, rules_length = FILE_HEADER_STRUCT.unpack_from(self._map)
+        except struct.error as e:
+            raise HistoryFormatError(f"{self.path} is too short to be a hand history.") from e
+        if magic != MAGIC or version != VERSION:
+            raise HistoryFormatError(f"{self.path} is not a version {VERSION} hand history.")
+        start = FILE_HEADER_STRUCT.size
+        self.rules = RuleSet.compile(**json.loads(self._map[start:start + rules_length]))
+        self.data_start = start + rules_length
+
+    def iter_offsets(self) -> Iterator[Tuple[int, int]]:
+        """``(offset, length)`` of each record's body, without decoding it."""
+        buffer, offset, end = self._map, self.data_start, len(self._map)
+        unpack = LENGTH_STRUCT.unpack_from
+        while offset < end:
+            if offset + LENGTH_STRUCT.size > end:
+                raise HistoryFormatError(f"{self.path}: record length cut short at byte {offset}.")
+            length, = unpack(buffer, offset)
+            offset += LENGTH_STRUCT.size
+            if offset + length > end:
+                raise HistoryFormatError(f"{self.path}: record at byte {offset} is cut short.")
+            yield offset, length
+            offset += length
+
+    def __iter__(self) -> Iterator[HandRecord]:
+        buffer = self._map
+        for offset, _ in self.iter_offsets():
+            yield decode_hand(buffer, offset)
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        return self._map
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _labels(codes: Iterable[int]) -> List[str]:
+    return [card_label(c) for c in codes]
+
+
+def record_to_dict(record: HandRecord) -> dict:
+    labels = _labels
+    return {
+        'hand_id': record.hand_id,
+        'seats': [{
+            'bet': seat.bet, 'chips': seat.chips, 'net': seat.net, 'insurance': seat.insurance,
+            'hands': [{'cards': labels(h.cards), 'bet': h.bet, 'outcome': h.outcome.value, 'flags': h.flags}
+                      for h in seat.hands],
+        } for seat in record.seats],
+        'dealer': labels(record.dealer),
+        'cards': labels(record.cards),
+        'actions': [{'seat': s, 'hand': h, 'choice': 'LEAVE' if c == LEAVE else TurnChoices(c).name}
+                    for s, h, c in record.actions],
+    }
+
+
+def export_jsonl(path: Union[str, Path], out) -> int:
+    """
+    Write a history file's records to the text stream out, one JSON object per line.
+
+    :return: Records written.
+    """
+    count = 0
+    with HandHistoryReader(path) as reader:
+        for record in reader:
+            out.write(json.dumps(record_to_dict(record)))
+            out.write('\n')
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hand history tools.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="write a history file as JSON lines")
+    export.add_argument('path')
+    export.add_argument('-o', '--output', default=None, help="defaults to stdout")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, 'w') as out:
+            export_jsonl(args.path, out)
+    else:
+        export_jsonl(args.path, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
 from Backend.PlayerCashRecordDB import PyBlackJackSQLLite
 from Backend.enum import CardSuits
+from Backend.output import default_sink
 from Backend.settings import Settings
 from PyBlackJack.Bank.Cage import Cage, DatabaseCage
 from PyBlackJack.Deck.DeckOfCards import Deck
+from PyBlackJack.events import EventBus
 from PyBlackJack.Players.Players import Player, Dealer, DatabasePlayer
 
 
@@ -13,10 +15,12 @@ class BlackJackInitializer:
     DATABASE_PLAYER_CLASS = DatabasePlayer
     DATABASE_CAGE_CLASS = DatabaseCage
     DATABASE_DEALER_CLASS = Dealer
+    MAX_SEATS = 7
 
     def __init__(self, **kwargs):
         self.banker = None
         self.player = None
+        self.players = []
         self.db = None
         self.dealer = None
         self.game_deck = None
@@ -26,6 +30,14 @@ class BlackJackInitializer:
         self.use_database = kwargs.get('use_database', self.game_settings.use_database)
         self.player_name = kwargs.get('player_name', self.game_settings.player_name)
         self.player_id = kwargs.get('player_id', None)
+        self.bet_policy = kwargs.get('bet_policy', None)
+        self.profiler = kwargs.get('profiler', None)
+        self.ev_analyzer = kwargs.get('ev_analyzer', None)
+        self.events = kwargs.get('events', None) or EventBus()
+        self.output = kwargs.get('output', None) or default_sink()
+        self.seats = kwargs.get('seats', self.game_settings.seats)
+        if not 1 <= self.seats <= self.__class__.MAX_SEATS:
+            raise ValueError(f"A table seats 1 to {self.__class__.MAX_SEATS} players, not {self.seats}.")
 
         self.initialize_game(**kwargs)
 
@@ -58,28 +70,38 @@ class BlackJackInitializer:
         return suits_string
 
     def _shared_initialization(self, **kwargs):
-        self.game_deck = Deck(settings=self.game_settings)
+        self.game_deck = Deck(settings=self.game_settings, seed=kwargs.get('seed', None),
+                              rng=kwargs.get('rng', None), reshuffle=kwargs.get('reshuffle', None),
+                              output=self.output)
         self.game_deck.shuffle_deck()
         dealer_class = kwargs.get('dealer_class', self.__class__.NON_DATABASE_DEALER_CLASS)
-        self.dealer = dealer_class(chosen_card_back=self.game_deck.card_back)
+        self.dealer = dealer_class(chosen_card_back=self.game_deck.card_back, settings=self.game_settings,
+                                   output=self.output)
 
     def _setup_non_database(self, **kwargs):
         non_database_player_class = kwargs.get('non_database_player_class', self.__class__.NON_DATABASE_PLAYER_CLASS)
         non_database_cage_class = kwargs.get('non_database_cage_class', self.__class__.NON_DATABASE_CAGE_CLASS)
-        self.player = non_database_player_class(settings=self.game_settings)
+        self.players = [non_database_player_class(settings=self.game_settings, output=self.output)
+                        for _ in range(self.seats)]
+        self.player = self.players[0]
 
-        self.banker = non_database_cage_class(settings=self.game_settings)
+        self.banker = non_database_cage_class(settings=self.game_settings, seats=self.seats, output=self.output)
 
     def _setup_database(self, **kwargs):
-        self.db = kwargs.get('db', PyBlackJackSQLLite(settings=self.game_settings))
+        self.db = kwargs.get('db', None) or PyBlackJackSQLLite(settings=self.game_settings, output=self.output)
 
         database_player_class = kwargs.get('database_player_class', self.__class__.DATABASE_PLAYER_CLASS)
         self.player = database_player_class(player_id=self.player_id,
                                          player_name=self.player_name,
-                                         settings=self.game_settings)
+                                         settings=self.game_settings,
+                                         output=self.output)
+        # only the first seat is looked up in the database; the rest play with table chips
+        non_database_player_class = kwargs.get('non_database_player_class', self.__class__.NON_DATABASE_PLAYER_CLASS)
+        self.players = [self.player] + [non_database_player_class(settings=self.game_settings, output=self.output)
+                                        for _ in range(self.seats - 1)]
 
         cage_class = kwargs.get('database_cage_class', self.__class__.DATABASE_CAGE_CLASS)
-        self.banker = cage_class(self.db, settings=self.game_settings)
+        self.banker = cage_class(self.db, settings=self.game_settings, seats=self.seats, output=self.output)
 
     def initialize_game(self, **kwargs):
         """
@@ -92,11 +114,25 @@ class BlackJackInitializer:
               value defined in game_settings.
             - ``player_name`` (str): The player's name. Defaults to the value defined in game_settings.
             - ``player_id`` (Optional[int]): The player's unique identifier. Defaults to None.
+            - ``seats`` (int): Number of players at the table (1-7), dealt from one shoe in
+              seat order. ``player`` is always seat 0. Defaults to the value defined in game_settings.
             - ``db`` (Optional[object]): The database instance if a custom database should be used.
               Required if ``use_database`` is True.
+            - ``bet_policy`` (Optional[BetPolicy]): Sizes seat 0's bets instead of asking. Defaults to None.
+            - ``seed`` (Optional[int]): Seeds the shoe's StreamRNG so a game can be replayed. Defaults to None.
+            - ``rng`` (Optional[random.Random]): Shuffles the shoe instead of a seeded or the global RNG,
+              e.g. a ``StreamRNG.child()`` per table.
+            - ``ev_analyzer`` (Optional[EVAnalyzer]): Computes hints, e.g. one with a cache saved to disk.
+              Defaults to one built for the configured rules on the first hint.
+            - ``profiler`` (Optional[SessionProfiler]): Told as each hand starts, for per-hand
+              allocation diffs. Defaults to None.
+            - ``events`` (Optional[EventBus]): Lifecycle event bus, e.g. one shared by several
+              tables. Defaults to a new, untimed bus.
+            - ``output`` (Optional[OutputSink]): Where the game's messages go, passed on to the deck,
+              players, cage and database. Defaults to ``default_sink()``.
         :return: None
         """
-        self._shared_initialization()
+        self._shared_initialization(**kwargs)
 
         if not self.use_database:
             self._setup_non_database(**kwargs)
@@ -105,5 +141,6 @@ class BlackJackInitializer:
             self._setup_database(**kwargs)
 
         # initialize player chips and dealer chips
-        self.banker.pay_in(self.player)
-        self.banker.pay_in(self.dealer)
+        for seat, player in enumerate(self.players):
+            self.banker.pay_in(player, seat)
+        self.banker.pay_in(self.dealer, seat=None)
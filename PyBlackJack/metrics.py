@@ -0,0 +1,428 @@
+"""
+Metrics for long-running tables and simulations.
+
+A ``MetricsRegistry`` holds counters, gauges and histograms, optionally split by
+labels, and renders them in the Prometheus text exposition format (0.0.4). It is
+exported two ways, both from background threads so the game loop never waits on
+them:
+
+* ``MetricsHTTPServer`` serves ``GET /metrics`` on a local port for Prometheus to scrape.
+* ``MetricsFileWriter`` rewrites a file every few seconds (atomically, through a
+  temporary file), for node_exporter's textfile collector or a plain ``cat``.
+
+What feeds it:
+
+* ``GameMetrics`` subscribes to a game's ``EventBus``: hands and outcomes, hands per
+  second, decisions, shoe reshuffles, bankroll per seat and, on a timed bus, how
+  long settling takes.
+* ``DatabaseMetrics`` hooks ``PyBlackJackSQLLite.on_commit`` for commit latency per
+  operation.
+* ``track_cache`` reads a cache's hits and misses (an ``lru_cache``, or e.g. the
+  ``EVStrategy`` of a simulation run with ``--decide ev``) whenever the metrics are
+  rendered.
+
+Updating a counter or a gauge is a single dict update under the GIL. A histogram
+updates a bucket and its sum together under its own lock, which rendering takes
+to copy them, so an exporter thread never sees one without the other.
+"""
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from PyBlackJack.events import DECISION, NEW_SHOE, SETTLE, EventBus
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# seconds; from sub-millisecond settles to slow commits on a busy disk
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    TYPE = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: Sequence) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(label) for label in labels)
+
+    def _label_string(self, key: tuple, extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(suffix, label string, value) per sample."""
+        for key, value in list(self._values.items()):
+            yield '', self._label_string(key), value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.__class__.TYPE}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. hands played."""
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, labels: Sequence = ()):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, labels: Sequence = ()) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down, e.g. a bankroll. A gauge given a function is
+    computed from it each time the metrics are rendered instead.
+    """
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Callable[[], Union[float, Dict[tuple, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value: float, labels: Sequence = ()):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, labels: Sequence = ()):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, labels: Sequence = ()) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        if self.function is not None:
+            computed = self.function()
+            # a labelled gauge's function returns {label values: value}
+            self._values = dict(computed) if self.labelnames else {(): computed}
+        return super().samples()
+
+
+class Histogram(_Metric):
+    """Counts of observations per upper bound, plus their sum and count, e.g. commit latency."""
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # a bucket and the sum are updated in two steps
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Sequence = ()):
+        key = self._key(labels)
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per bucket counts (the last one is +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bucket] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '_bucket', self._label_string(key, f'le="{_format_value(float(bound))}"'), cumulative
+            yield '_sum', self._label_string(key), total
+            yield '_count', self._label_string(key), cumulative
+
+
+class MetricsRegistry:
+    """
+    The metrics of one process, by name. ``counter()``, ``gauge()`` and ``histogram()``
+    return the existing metric when the name is already registered, so independent
+    feeds can share one.
+
+    :ivar namespace: Prefixed to every metric name.
+    :type namespace: str
+    """
+    def __init__(self, namespace: str = 'pyblackjack'):
+        self.namespace = namespace
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], object]] = []
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        metric = self.metrics.get(full_name)
+        if metric is None:
+            metric = self.metrics[full_name] = metric_class(full_name, *args, **kwargs)
+        elif not isinstance(metric, metric_class):
+            raise ValueError(f"{full_name} is already registered as a {metric.TYPE}.")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function=None) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames, function=function)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], object]):
+        """Call collector before every render, to copy values in from elsewhere."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def track_cache(registry: MetricsRegistry, name: str, cached: Callable):
+    """Export the hits, misses and hit ratio of anything with an ``lru_cache``-style ``cache_info()`` as cache=name."""
+    hits = registry.counter('cache_hits_total', "Cache lookups answered from the cache.", ('cache',))
+    misses = registry.counter('cache_misses_total', "Cache lookups that had to compute the value.", ('cache',))
+    ratio = registry.gauge('cache_hit_ratio', "Hits over all lookups since the cache was created.", ('cache',))
+
+    def collect():
+        info = cached.cache_info()
+        hits._values[(name,)] = info.hits
+        misses._values[(name,)] = info.misses
+        lookups = info.hits + info.misses
+        ratio.set(info.hits / lookups if lookups else 0.0, (name,))
+    registry.add_collector(collect)
+
+
+def _trim(recent: deque, cutoff: float):
+    while recent and recent[0] < cutoff:
+        recent.popleft()
+
+
+class GameMetrics:
+    """
+    Feeds a registry from game lifecycle events. Several tables can share one
+    ``GameMetrics``; each is told apart by its ``table`` label.
+
+    :ivar window: Seconds over which ``hands_per_second`` is averaged.
+    :type window: float
+    """
+    def __init__(self, registry: MetricsRegistry, window: float = 10.0):
+        self.registry = registry
+        self.window = window
+        self.hands = registry.counter('hands_total', "Hands settled.", ('table',))
+        self.outcomes = registry.counter('hand_outcomes_total', "Settled player hands by outcome.",
+                                         ('table', 'outcome'))
+        self.decisions = registry.counter('decisions_total', "Player decisions by choice.", ('table', 'choice'))
+        self.reshuffles = registry.counter('shoe_reshuffles_total', "New shoes put in play.", ('table',))
+        self.bankroll = registry.gauge('bankroll_chips', "Chips at each seat after the last hand.",
+                                       ('table', 'seat'))
+        self.settle_seconds = registry.histogram('settle_seconds', "Time to settle a hand (timed buses only).",
+                                                 ('table',))
+        registry.gauge('hands_per_second', f"Hands settled per second over the last {window:g} s.",
+                       ('table',), function=self._hands_per_second)
+        # table -> settle times within the window, trimmed by the game and exporter threads alike
+        self._recent: Dict[str, deque] = {}
+        self._recent_lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def attach(self, bus: EventBus, table: str = 'default'):
+        """Subscribe to a game's (or a shared) event bus, reporting under table."""
+        table = str(table)
+        with self._recent_lock:
+            recent = self._recent.setdefault(table, deque())
+        hands, outcomes, decisions = self.hands, self.outcomes, self.decisions
+        bankroll, settle_seconds, reshuffles = self.bankroll, self.settle_seconds, self.reshuffles
+        window, recent_lock = self.window, self._recent_lock
+
+        def on_settle(event, payload):
+            game = payload['game']
+            hands.inc(labels=(table,))
+            now = time.monotonic()
+            with recent_lock:
+                recent.append(now)
+                _trim(recent, now - window)
+            for seat_outcomes in payload.get('outcomes') or ():
+                for outcome in seat_outcomes or ():
+                    outcomes.inc(labels=(table, outcome.value))
+            for seat, player in enumerate(game.players):
+                bankroll.set(player.chips or 0, (table, seat))
+            if 'elapsed' in payload:
+                settle_seconds.observe(payload['elapsed'], (table,))
+
+        def on_decision(event, payload):
+            decisions.inc(labels=(table, payload['choice'].name.lower()))
+
+        def on_new_shoe(event, payload):
+            reshuffles.inc(labels=(table,))
+
+        bus.subscribe(SETTLE, on_settle)
+        bus.subscribe(DECISION, on_decision)
+        bus.subscribe(NEW_SHOE, on_new_shoe)
+        return bus
+
+    def _hands_per_second(self) -> Dict[tuple, float]:
+        now = time.monotonic()
+        span = min(self.window, now - self._started) or self.window
+        rates = {}
+        with self._recent_lock:
+            for table, recent in self._recent.items():
+                _trim(recent, now - self.window)
+                rates[(table,)] = len(recent) / span
+        return rates
+
+
+class DatabaseMetrics:
+    """Feeds a registry with ``PyBlackJackSQLLite`` commit latency and counts per operation."""
+    def __init__(self, registry: MetricsRegistry):
+        self.commit_seconds = registry.histogram('db_commit_seconds', "SQLite commit latency by operation.",
+                                                 ('operation',))
+
+    def on_commit(self, operation: str, seconds: float):
+        self.commit_seconds.observe(seconds, (operation,))
+
+    def attach(self, db):
+        db.on_commit = self.on_commit
+        return db
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrapes every few seconds would flood the console
+        pass
+
+
+class MetricsHTTPServer:
+    """
+    Serves a registry at ``http://host:port/metrics`` from a daemon thread.
+
+    :ivar port: The bound port; pass port 0 to pick a free one.
+    :type port: int
+    """
+    DEFAULT_HOST = '127.0.0.1'
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = None):
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+        self._server = ThreadingHTTPServer((host or self.__class__.DEFAULT_HOST, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='pyblackjack-metrics', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class MetricsFileWriter:
+    """
+    Rewrites ``path`` with a registry's metrics every ``interval`` seconds from a
+    daemon thread, and once more on ``close()``.
+    """
+    def __init__(self, registry: MetricsRegistry, path: Union[str, Path], interval: float = 5.0):
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pyblackjack-metrics-file', daemon=True)
+        self._thread.start()
+
+    def write(self):
+        # readers never see a partly written file
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.registry.render())
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+
+class MetricsExporter:
+    """
+    The registry and feeds of a server or simulation run, plus whichever exporters
+    were asked for.
+    """
+    def __init__(self, port: Optional[int] = None, path: Union[str, Path] = None, interval: float = 5.0,
+                 host: str = None):
+        self.registry = MetricsRegistry()
+        self.games = GameMetrics(self.registry)
+        self.database = DatabaseMetrics(self.registry)
+        self.http = MetricsHTTPServer(self.registry, port, host) if port is not None else None
+        self.file = MetricsFileWriter(self.registry, path, interval) if path else None
+
+    def close(self):
+        if self.http is not None:
+            self.http.close()
+        if self.file is not None:
+            self.file.close()
+
+
+def add_metrics_arguments(parser):
+    """Add the ``--metrics-port`` and ``--metrics-file`` options to an argparse parser."""
+    group = parser.add_argument_group('metrics')
+    group.add_argument('--metrics-port', type=int, default=None,
+                       help="serve Prometheus metrics on this local port")
+    group.add_argument('--metrics-file', default=None, help="rewrite this file with the metrics periodically")
+    group.add_argument('--metrics-interval', type=float, default=5.0, help="seconds between metrics file writes")
+    return group
+
+
+def exporter_from_args(args) -> Optional[MetricsExporter]:
+    if args.metrics_port is None and not args.metrics_file:
+        return None
+    return MetricsExporter(port=args.metrics_port, path=args.metrics_file, interval=args.metrics_interval)
@@ -0,0 +1,244 @@
+"""
+Profiling for interactive sessions.
+
+``SessionProfiler`` wraps a whole game session (``--profile`` on the ``py_blackjack``
+and ``pygame_blackjack`` entry points). It runs in one of two modes:
+
+* ``cprofile`` (the default) traces every call with cProfile and, on exit, writes
+  ``<prefix>.pstats`` (load it with ``pstats`` or snakeviz) and ``<prefix>.collapsed``.
+  cProfile only keeps caller/callee pairs, so the collapsed stacks are rebuilt from
+  that graph, splitting each function's own time between its callers in proportion
+  to how often each called it.
+* ``sample`` wakes a background thread every ``interval`` seconds to record the main
+  thread's Python stack. It costs much less than tracing and the stacks are exact,
+  but there are no call counts, so only ``<prefix>.collapsed`` is written.
+
+The collapsed file has one ``frame;frame;frame count`` line per stack, the input
+format of flamegraph.pl, inferno and speedscope. Counts are microseconds of own
+time (cprofile) or samples (sample).
+
+With ``tracemalloc_every`` set, tracemalloc is started too and every that many hands
+a snapshot is compared with the previous one; the top allocation growth by source
+line is appended to ``<prefix>.tracemalloc.txt``, so memory that keeps growing over
+a long session shows up as the same lines recurring.
+"""
+import cProfile
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+MODES = ('cprofile', 'sample')
+
+
+class SessionProfiler:
+    """
+    Profiles a session from ``start()`` (or entering it as a context manager) to
+    ``stop()``, then writes its reports next to ``prefix``.
+
+    :ivar prefix: Path prefix of the report files.
+    :type prefix: Path
+    :ivar hands: Hands started so far, counted through ``hand_started()``.
+    :type hands: int
+    """
+    DEFAULT_INTERVAL = 0.005
+    TRACEMALLOC_FRAMES = 10
+    TRACEMALLOC_TOP = 15
+    MAX_STACK_DEPTH = 64
+    MIN_PATH_SHARE = 1e-5
+
+    def __init__(self, prefix: Union[str, Path] = 'pyblackjack-profile', mode: str = 'cprofile',
+                 interval: float = None, tracemalloc_every: int = 0):
+        if mode not in MODES:
+            raise ValueError(f"Profile mode must be one of {', '.join(MODES)}, not '{mode}'.")
+        self.prefix = Path(prefix)
+        self.mode = mode
+        self.interval = interval or self.__class__.DEFAULT_INTERVAL
+        self.tracemalloc_every = tracemalloc_every
+        self.hands = 0
+
+        self._profile: Optional[cProfile.Profile] = None
+        self._samples: Counter = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+        self._target_thread = None
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracemalloc = False
+
+    @property
+    def pstats_path(self) -> Path:
+        return self.prefix.with_name(self.prefix.name + '.pstats')
+
+    @property
+    def collapsed_path(self) -> Path:
+        return self.prefix.with_name(self.prefix.name + '.collapsed')
+
+    @property
+    def tracemalloc_path(self) -> Path:
+        return self.prefix.with_name(self.prefix.name + '.tracemalloc.txt')
+
+    def start(self):
+        if self.tracemalloc_every:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.__class__.TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            self._last_snapshot = self._take_snapshot()
+            self.tracemalloc_path.write_text('')
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._target_thread = threading.get_ident()
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name='SessionProfiler', daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        """Stop profiling and write the reports."""
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.pstats_path)
+            self._samples = self._collapse_pstats(pstats.Stats(self._profile))
+            self._profile = None
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        self._write_collapsed()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # SystemExit and KeyboardInterrupt end interactive sessions; report them too
+        self.stop()
+        return False
+
+    def hand_started(self):
+        """Called by the game as each hand is set up; drives the tracemalloc diffs."""
+        self.hands += 1
+        if self.tracemalloc_every and self.hands % self.tracemalloc_every == 0:
+            # keep the snapshot comparison itself out of the call profile
+            if self._profile is not None:
+                self._profile.disable()
+            self._write_tracemalloc_diff()
+            if self._profile is not None:
+                self._profile.enable()
+
+    # sampling
+
+    def _sample_loop(self):
+        samples, interval, target = self._samples, self.interval, self._target_thread
+        while not self._stop_sampling.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.__class__.MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            samples[';'.join(reversed(stack))] += 1
+
+    # cProfile call graph to collapsed stacks
+
+    @staticmethod
+    def _label(func: Tuple[str, int, str]) -> str:
+        filename, line, name = func
+        if filename == '~':
+            return name
+        return f"{name} ({Path(filename).name}:{line})"
+
+    @classmethod
+    def _collapse_pstats(cls, stats: pstats.Stats) -> Counter:
+        # func -> (primitive calls, calls, own time, cumulative time, {caller: (pc, nc, tt, ct)})
+        table: Dict[tuple, tuple] = stats.stats
+        stacks: Counter = Counter()
+        # func -> [(caller, that caller's fraction of func's calls)]
+        shares: Dict[tuple, list] = defaultdict(list)
+        for func, (_, calls, _, _, callers) in table.items():
+            total = sum(edge[1] for edge in callers.values()) or calls or 1
+            for caller, edge in callers.items():
+                shares[func].append((caller, edge[1] / total))
+
+        # the number of paths grows with every caller; stop splitting below a sliver of the run
+        min_weight = max(1e-6, sum(row[2] for row in table.values()) * cls.MIN_PATH_SHARE)
+
+        def paths(func, weight, seen, depth):
+            parents = shares.get(func)
+            if not parents or depth >= cls.MAX_STACK_DEPTH or weight < min_weight:
+                yield (func,), weight
+                return
+            for caller, share in parents:
+                if caller in seen:
+                    # recursion: end the path here rather than loop
+                    yield (func,), weight * share
+                    continue
+                for path, w in paths(caller, weight * share, seen | {caller}, depth + 1):
+                    yield path + (func,), w
+
+        for func, (_, _, own, _, _) in table.items():
+            if own <= 0:
+                continue
+            for path, seconds in paths(func, own, frozenset((func,)), 0):
+                micros = round(seconds * 1e6)
+                if micros:
+                    stacks[';'.join(cls._label(f) for f in path)] += micros
+        return stacks
+
+    def _write_collapsed(self):
+        with open(self.collapsed_path, 'w') as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+
+    # tracemalloc
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+
+    def _write_tracemalloc_diff(self):
+        snapshot = self._take_snapshot()
+        diff = snapshot.compare_to(self._last_snapshot, 'lineno')
+        self._last_snapshot = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        growth = sum(stat.size_diff for stat in diff)
+        with open(self.tracemalloc_path, 'a') as f:
+            f.write(f"== hand {self.hands} at {time.strftime('%H:%M:%S')}: {current / 1024:,.1f} KiB traced "
+                    f"(peak {peak / 1024:,.1f} KiB), {growth / 1024:+,.1f} KiB since the last diff\n")
+            for stat in diff[:self.__class__.TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+            f.write('\n')
+
+
+def add_profile_arguments(parser):
+    """Add the ``--profile`` options shared by the game entry points to an argparse parser."""
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', nargs='?', const='pyblackjack-profile', default=None, metavar='PREFIX',
+                       help="profile the session and write PREFIX.pstats and PREFIX.collapsed on exit")
+    group.add_argument('--profile-mode', choices=MODES, default='cprofile',
+                       help="trace every call, or sample the stack (collapsed stacks only)")
+    group.add_argument('--profile-interval', type=float, default=None, metavar='SECONDS',
+                       help=f"sampling interval (default {SessionProfiler.DEFAULT_INTERVAL})")
+    group.add_argument('--tracemalloc-every', type=int, default=0, metavar='HANDS',
+                       help="append a tracemalloc growth diff to PREFIX.tracemalloc.txt every HANDS hands")
+    return group
+
+
+def profiler_from_args(args) -> Optional[SessionProfiler]:
+    if args.profile is None:
+        return None
+    return SessionProfiler(args.profile, mode=args.profile_mode, interval=args.profile_interval,
+                           tracemalloc_every=args.tracemalloc_every)
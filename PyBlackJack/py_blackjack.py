@@ -1,16 +1,25 @@
 #! python3
 """
 PyBlackJack
-"""
 
+Usage:
+    python -m PyBlackJack.py_blackjack [--profile [PREFIX]] [--profile-mode sample] [--tracemalloc-every N]
+"""
+import argparse
 from os import system
 from Backend.settings import Settings
 from PyBlackJack.Deck.DeckOfCards import Deck, CardSuits
 from PyBlackJack.Players.Players import Player, Dealer, DatabasePlayer
 from PyBlackJack.Bank.Cage import Cage, DatabaseCage
 from Backend import yes_no
+from Backend.card_codes import card_code
+from Backend.enum import TurnChoices
 from Backend.PlayerCashRecordDB import PyBlackJackSQLLite
 from PyBlackJack.initializer import BlackJackInitializer
+from PyBlackJack.Strategy.BetPolicies import BetContext
+from PyBlackJack.Strategy.ExpectedValue import EVAnalyzer, Hint, unseen_counts
+from PyBlackJack.events import CARD_DEALT, DB_WRITE, DECISION, HAND_START, NEW_SHOE, SETTLE
+from PyBlackJack.profiling import add_profile_arguments, profiler_from_args
 
 
 class Game(BlackJackInitializer):
@@ -34,7 +43,17 @@ class Game(BlackJackInitializer):
     :type game_deck: Deck | None
     :ivar game_settings: The configuration and settings for the game.
     :type game_settings: Settings
+    :ivar ev_analyzer: Computes hints; built on the first one asked for.
+    :type ev_analyzer: EVAnalyzer | None
     """
+    # cards kept back per seat (and the dealer) so a hand never runs the shoe dry
+    SHOE_RESERVE_PER_HAND = 12
+
+    @property
+    def shoe_reserve(self) -> int:
+        """Cards that must be left in the shoe to start a hand; fewer and it is reshuffled first."""
+        return max(self.game_deck.shoe_runout_warning_threshold,
+                   self.__class__.SHOE_RESERVE_PER_HAND * (self.seats + 1))
 
     def play(self):
         """
@@ -51,7 +70,7 @@ class Game(BlackJackInitializer):
             self._start_screen()
             self.hand_loop()
         except KeyboardInterrupt:
-            print("Ok Quitting")
+            self.output.info("Ok Quitting")
             exit(-1)
 
 
@@ -68,16 +87,16 @@ class Game(BlackJackInitializer):
         """
         while True:
             system('cls')
-            print(self.get_welcome_message())
+            self.output.info(self.get_welcome_message())
             try:
                 if yes_no("Ready to play?"):
                     system('cls')
                     break
                 else:
-                    print("Ok, goodbye!")
+                    self.output.info("Ok, goodbye!")
                     exit(0)
             except KeyboardInterrupt:
-                print("Ok Quitting")
+                self.output.info("Ok Quitting")
                 exit(-1)
 
     def deal(self):
@@ -122,8 +141,10 @@ class Game(BlackJackInitializer):
         :return: The updated Player instance after processing the hit action.
             Includes updates to the player's hand, bust status, and last move.
         """
-        print(f"Player: {player.player_display_name} Decided to hit!")
-        player.hand.append(self.game_deck.draw())
+        self.output.info("Player: %s Decided to hit!", player.player_display_name)
+        card = self.game_deck.draw()
+        player.hand.append(card)
+        self.events.emit(CARD_DEALT, game=self, seat=self._seat_of(player), card=card)
         self.check_bust(player)
         if player.busted:
             if self.new_hand():
@@ -146,36 +167,57 @@ class Game(BlackJackInitializer):
         :return: The updated player object with 'last_move' set to 'stay'.
         :rtype: Player
         """
-        print(f"Player: {player.player_display_name} Decided to stay!")
+        player.output.info("Player: %s Decided to stay!", player.player_display_name)
         player.last_move = 'stay'
         return player
 
+    def hint(self) -> Hint:
+        """
+        The expected values of hitting and staying on seat 0's hand, against the cards the player
+        hasn't seen, and which is better.
+
+        :rtype: Hint
+        """
+        if self.ev_analyzer is None:
+            self.ev_analyzer = EVAnalyzer(self.game_settings.rules, removal_depth=EVAnalyzer.HINT_REMOVAL_DEPTH)
+        return self.ev_analyzer.hint([card_code(card) for card in self.player.hand], card_code(self.dealer.hand[1]),
+                                     unseen_counts(self), can_double=False, can_split=False, can_surrender=False)
+
     def player_turn(self):
         """
         Executes the player's turn in the game. It provides the player with two
-        choices: to either "Hit" or "Stay". Based on the player's input, it calls
-        the corresponding method to proceed with the game. Ensures that the input
-        is valid before proceeding.
+        choices: to either "Hit" or "Stay", and can show a hint of which is better
+        first. Based on the player's input, it calls the corresponding method to
+        proceed with the game. Ensures that the input is valid before proceeding.
 
         :raises ValueError: If the player's input is invalid and neither corresponds to
             "Hit" nor "Stay".
         """
         choices = {1: 'Hit',
-                   2: 'Stay'}
+                   2: 'Stay',
+                   3: 'Hint'}
 
         # TODO: redo with enum TurnChoices
         pretty_choices = [(x, y) for x, y in [x for x in choices.items()]]
-        while True:
-            c = input(f"Would you like to \n{pretty_choices[0][0]}. {pretty_choices[0][1]}"
-                      f"\n{pretty_choices[1][0]}. {pretty_choices[1][1]}\n: ").lower()
-            if c == '1' or c == 'hit':
-                self.hit(self.player)
-                break
-            elif c == '2' or c == 'stay':
-                self.stay(self.player)
-                break
-            else:
-                print("Please choose hit or stay.")
+        with self.events.phase(DECISION, game=self, seat=0) as decision:
+            while True:
+                c = input(f"Would you like to \n{pretty_choices[0][0]}. {pretty_choices[0][1]}"
+                          f"\n{pretty_choices[1][0]}. {pretty_choices[1][1]}"
+                          f"\n{pretty_choices[2][0]}. {pretty_choices[2][1]}\n: ").lower()
+                if c == '1' or c == 'hit':
+                    decision['choice'] = TurnChoices.HIT
+                    break
+                elif c == '2' or c == 'stay':
+                    decision['choice'] = TurnChoices.STAY
+                    break
+                elif c == '3' or c == 'hint':
+                    self.output.info("Hint: %s", self.hint().describe())
+                else:
+                    self.output.info("Please choose hit or stay.")
+        if decision['choice'] == TurnChoices.HIT:
+            self.hit(self.player)
+        else:
+            self.stay(self.player)
 
     def is_bust(self, player: Player):
         """
@@ -189,7 +231,7 @@ class Game(BlackJackInitializer):
         :return: The modified player object with an updated "busted" status.
         :rtype: Player
         """
-        print(f"Player {player.player_display_name} Busted! Game over.")
+        self.output.info("Player %s Busted! Game over.", player.player_display_name)
         player.busted = True
         self.end_hand()
         return player
@@ -199,8 +241,12 @@ class Game(BlackJackInitializer):
         return f"{winner} Wins!!!!!!!!"
 
     def _print_and_award_winner(self, player: Player):
-        print(self.get_winner_string(player.player_display_name))
-        self.banker.award_hand_value(player)
+        self.output.info(self.get_winner_string(player.player_display_name))
+        if isinstance(player, Dealer):
+            # the house keeps the stake rather than minting chips for the dealer
+            self.banker.collect_hand_value(self.player)
+        else:
+            self.banker.award_hand_value(player)
 
     def _calculate_winner(self):
         dealer_high = (self.player.get_hand_value() < self.dealer.get_hand_value())
@@ -253,6 +299,14 @@ class Game(BlackJackInitializer):
         :param self: The instance of the class that owns this method.
         :return: None
         """
+        if self.profiler is not None:
+            self.profiler.hand_started()
+        if self.game_deck.reshuffle_if_due(self.shoe_reserve):
+            self.output.info("The dealer shuffles a new shoe.")
+            self.events.emit(NEW_SHOE, game=self, cards=len(self.game_deck.deck))
+        self.game_deck.hand_started()
+        self.events.emit(HAND_START, game=self)
+        self.banker.begin_hand()
         if isinstance(self.player, DatabasePlayer):
             self.player.__init__(self.player.player_id)
         elif isinstance(self.player, Player):
@@ -261,6 +315,14 @@ class Game(BlackJackInitializer):
         self.dealer.__init__(chosen_card_back=self.game_deck.card_back, player_chips=self.dealer.chips)
         self.dealer.hand = self.deal()
         self.dealer.hidden_hand_setup()
+        if self.events.subscribed(CARD_DEALT):
+            # deal() draws the two cards together; report them as dealt, player first
+            for seat, hand in ((0, self.player.hand), (None, self.dealer.hand)):
+                for card in hand:
+                    self.events.emit(CARD_DEALT, game=self, seat=seat, card=card)
+
+    def _seat_of(self, player: Player):
+        return None if player is self.dealer else self.players.index(player)
 
     def hand_loop(self):
         """
@@ -289,7 +351,7 @@ class Game(BlackJackInitializer):
             if ((self.dealer.last_move == 'stay'
                  and self.player.last_move == 'stay') or
                     (self.dealer.busted or self.player.busted)):
-                print("---------------")
+                self.output.info("---------------")
                 self.end_hand()
                 new = self.new_hand()
                 if new:
@@ -297,7 +359,7 @@ class Game(BlackJackInitializer):
                     continue
                 else:
                     break
-            print("---------------")
+            self.output.info("---------------")
 
             # print(f"last moves were {self.dealer.last_move, self.player.last_move}")
             if self.dealer.should_stay():
@@ -317,12 +379,15 @@ class Game(BlackJackInitializer):
             types.
         :return: None
         """
-        print("FINAL SCORE:")
+        self.output.info("FINAL SCORE:")
         self.player.print_hand()
         self.dealer.reveal_hand()
-        self.display_winner()
+        with self.events.phase(SETTLE, game=self):
+            self.display_winner()
         if isinstance(self.banker, DatabaseCage) and isinstance(self.player, DatabasePlayer):
-            self.banker.write_new_account_balance(self.player)
+            with self.events.phase(DB_WRITE, game=self, player=self.player):
+                self.banker.write_new_account_balance(self.player)
+                self.banker.flush_ledger()
         # self.banker.write_new_account_balance(self.dealer)
 
     @staticmethod
@@ -348,10 +413,23 @@ class Game(BlackJackInitializer):
             else:
                 pass
 
+    def _policy_bet(self, player: Player):
+        previous = getattr(self, '_bankroll_before_bet', None)
+        context = BetContext(bankroll=player.chips,
+                             running_count=self.game_deck.running_count,
+                             true_count=self.game_deck.true_count,
+                             last_net=0 if previous is None else player.chips - previous,
+                             hands_played=self.banker.ledger.hand_id - 1)
+        self._bankroll_before_bet = player.chips
+        bet_amount = self.bet_policy.bet(context)
+        self.output.info("Betting $%s (%s)", format(bet_amount, ','), self.bet_policy.__class__.__name__)
+        return bet_amount
+
     def bet_question(self, player: Player):
         """
         Prompts the player to place a bet and processes the betting transaction through the banker.
         Handles edge cases where the player might be bankrupt or needs a bank pay-in.
+        If the game has a ``bet_policy`` the bet is sized by it instead of asking.
 
         :param player: The player instance who is placing the bet.
         :type player: Player
@@ -364,20 +442,35 @@ class Game(BlackJackInitializer):
                 self.banker.pay_in(player)
         else:
             pass
-        while True:
-            bet_amount = input(f"How much would you like to bet? (${player.chips:,} available): ")
-            if bet_amount.isnumeric():
-                bet_amount = int(bet_amount)
-                break
-            else:
-                print("Bet amount must be an integer.")
+        if self.bet_policy is not None:
+            bet_amount = self._policy_bet(player)
+        else:
+            while True:
+                bet_amount = input(f"How much would you like to bet? (${player.chips:,} available): ")
+                if bet_amount.isnumeric():
+                    bet_amount = int(bet_amount)
+                    break
+                else:
+                    self.output.info("Bet amount must be an integer.")
 
         player.bet_amount = bet_amount
         player = self.banker.take_bet(player)
         return player
 
 
+def main(argv=None, game_class=Game):
+    parser = argparse.ArgumentParser(description=f"Play blackjack ({game_class.__name__}).")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    profiler = profiler_from_args(args)
+    if profiler is None:
+        game_class().play()
+        return
+    with profiler:
+        game_class(profiler=profiler).play()
+
+
 if __name__ == '__main__':
-    game = Game()
-    game.play()
+    main()
 
@@ -0,0 +1,230 @@
+#! python3
+"""
+Re-execute and re-score recorded hands.
+
+Two ways to re-analyse a hand history without simulating again:
+
+* ``rescore()`` reprices every recorded hand under another rule set's payouts
+  (e.g. 6:5 blackjack) straight from the mmapped records. Nothing is dealt, so it
+  runs at hundreds of thousands of hands per second or more.
+* ``HandReplayer`` re-executes each round on a HeadlessGame: the recorded cards
+  (plus the lookahead) are loaded as the shoe, chips and bets are restored and the
+  recorded decisions are applied in order. Under the recorded rules this audits the
+  history (every net and outcome must match); under other rules it reports what the
+  same cards and decisions would have paid. A round whose decisions are no longer
+  legal, or that needs more cards than were recorded, is counted as diverged.
+
+Usage:
+    python -m PyBlackJack.replay verify hands-00000.pbjh [...]
+    python -m PyBlackJack.replay rescore hands-00000.pbjh --rule blackjack_payout=6:5
+    python -m PyBlackJack.replay replay hands-00000.pbjh --rule dealer_hits_soft_17=true
+"""
+import argparse
+import copy
+import itertools
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Tuple, Union
+
+from Backend.enum import HandOutcome, TurnChoices
+from Backend.rules import RuleSet, parse_rule_value
+from Backend.settings import Settings
+from PyBlackJack.Deck.DeckOfCards import EmptyShoeError
+from PyBlackJack.Players.Hands import HandLimitError
+from PyBlackJack.headless import HandStateError, HeadlessGame
+from PyBlackJack.history import (HAND_STRUCT, LEAVE, OUTCOME_ORDER, RECORD_STRUCT, SEAT_STRUCT, HandHistoryReader,
+                                 HandRecord)
+
+
+class RescoreResult(NamedTuple):
+    """
+    Totals of a rescored history.
+
+    :ivar wagered: Chips bet on hands, including doubles and splits.
+    :ivar original_net: What the seats won as recorded.
+    :ivar rescored_net: What they would have won under the new payouts.
+    """
+    records: int
+    hands: int
+    wagered: int
+    original_net: int
+    rescored_net: int
+
+
+class ReplayResult(NamedTuple):
+    hand_id: int
+    nets: Tuple[int, ...]
+    outcomes: Tuple[Tuple[HandOutcome, ...], ...]
+    diverged: bool
+    matches: bool
+
+
+class ReplaySummary(NamedTuple):
+    hands: int
+    matched: int
+    mismatched: int
+    diverged: int
+    original_net: int
+    replayed_net: int
+
+
+def _payout_pairs(old: RuleSet, new: RuleSet):
+    """Per outcome index, the old and new (numerator, denominator) payouts."""
+    return tuple((old.payouts[outcome], new.payouts[outcome]) for outcome in OUTCOME_ORDER)
+
+
+def rescore(paths: Iterable[Union[str, Path]], rules: RuleSet) -> RescoreResult:
+    """
+    Reprice every hand in the history files under rules' payouts.
+
+    Only payouts change: which hands won, lost, pushed or surrendered stays as
+    recorded, so rules that change play (dealer soft 17, surrender, doubling) need
+    ``HandReplayer`` instead.
+    """
+    records = hands = wagered = original = rescored = 0
+    record_size, seat_size, hand_size = RECORD_STRUCT.size, SEAT_STRUCT.size, HAND_STRUCT.size
+    unpack_record, unpack_seat = RECORD_STRUCT.unpack_from, SEAT_STRUCT.unpack_from
+    unpack_hand = HAND_STRUCT.unpack_from
+    for path in paths:
+        with HandHistoryReader(path) as reader:
+            payouts = _payout_pairs(reader.rules, rules)
+            buffer = reader.buffer
+            for offset, _ in reader.iter_offsets():
+                _, seats, _, _, _, _ = unpack_record(buffer, offset)
+                offset += record_size
+                records += 1
+                for _ in range(seats):
+                    _, _, net, _, n_hands = unpack_seat(buffer, offset)
+                    offset += seat_size
+                    original += net
+                    rescored += net
+                    for _ in range(n_hands):
+                        outcome, _, bet, n_codes = unpack_hand(buffer, offset)
+                        offset += hand_size + n_codes
+                        (old_num, old_den), (new_num, new_den) = payouts[outcome]
+                        rescored += bet * new_num // new_den - bet * old_num // old_den
+                        wagered += bet
+                        hands += 1
+    return RescoreResult(records, hands, wagered, original, rescored)
+
+
+class HandReplayer:
+    """
+    Re-executes recorded rounds on a HeadlessGame per table size.
+
+    :ivar rules: Rules to replay under, or None for each file's recorded rules.
+    :type rules: RuleSet | None
+    """
+    LEDGER_MAX_ENTRIES = 10_000
+
+    def __init__(self, rules: RuleSet = None, game_settings: Settings = None):
+        self.rules = rules
+        self.game_settings = game_settings or Settings()
+        # (seats, raw rules) -> the game replaying them and a snapshot of it between hands
+        self._games: Dict[Tuple[int, tuple], Tuple[HeadlessGame, bytes]] = {}
+
+    def _game(self, seats: int, rules: RuleSet) -> Tuple[HeadlessGame, bytes]:
+        key = (seats, rules.raw)
+        entry = self._games.get(key)
+        if entry is None:
+            settings = copy.copy(self.game_settings)
+            settings.rules = rules
+            game = HeadlessGame(game_settings=settings, seats=seats)
+            game.banker.ledger.max_entries = self.__class__.LEDGER_MAX_ENTRIES
+            # a replayed shoe is only the recorded cards; running out is a divergence, not a warning
+            game.game_deck.shoe_runout_warning_threshold = 0
+            entry = self._games[key] = (game, game.snapshot())
+        return entry
+
+    def replay(self, record: HandRecord, rules: RuleSet) -> ReplayResult:
+        game, between_hands = self._game(len(record.seats), rules)
+        shoe = record.cards + record.lookahead
+        game.shoe_source = itertools.repeat(shoe)
+        game.load_shoe(shoe)
+        for seat, (player, seat_record) in enumerate(zip(game.players, record.seats)):
+            game.banker.adjust_balance(player, seat_record.chips, seat)
+        actions = {TurnChoices.HIT.value: game._hit, TurnChoices.STAY.value: game._stay,
+                   TurnChoices.DOUBLE.value: game._double, TurnChoices.SPLIT.value: game._split,
+                   TurnChoices.SURRENDER.value: game._surrender}
+        try:
+            game.start_hand(record.bets)
+            for seat, hand, choice in record.actions:
+                if choice == LEAVE:
+                    game.leave_seat(seat)
+                elif choice == TurnChoices.INSURANCE.value:
+                    game._insure(seat, take=bool(hand))
+                else:
+                    actions[choice](seat)
+            diverged = not game.hand_over
+        except (HandStateError, HandLimitError, ValueError, KeyError, EmptyShoeError):
+            diverged = True
+        if diverged:
+            # drop the half-played round so the next record starts from a settled table
+            game.restore(between_hands)
+            return ReplayResult(record.hand_id, (), (), True, False)
+        nets = tuple(game.seat_nets)
+        outcomes = tuple(o or () for o in game.outcomes)
+        matches = (nets == tuple(seat.net for seat in record.seats)
+                   and outcomes == tuple(tuple(h.outcome for h in seat.hands) for seat in record.seats))
+        return ReplayResult(record.hand_id, nets, outcomes, False, matches)
+
+    def replay_file(self, path: Union[str, Path]) -> ReplaySummary:
+        hands = matched = mismatched = diverged = original = replayed = 0
+        with HandHistoryReader(path) as reader:
+            rules = self.rules or reader.rules
+            for record in reader:
+                result = self.replay(record, rules)
+                hands += 1
+                original += sum(seat.net for seat in record.seats)
+                if result.diverged:
+                    diverged += 1
+                    continue
+                replayed += sum(result.nets)
+                if result.matches:
+                    matched += 1
+                else:
+                    mismatched += 1
+        return ReplaySummary(hands, matched, mismatched, diverged, original, replayed)
+
+
+def _rules_from(changes, base: RuleSet) -> RuleSet:
+    return base.derive(**changes) if changes else base
+
+
+def _rule(text: str):
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{text}'")
+    return key, parse_rule_value(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit, rescore or replay hand histories.")
+    parser.add_argument('command', choices=('verify', 'rescore', 'replay'))
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--rule', type=_rule, action='append', default=[],
+                        help="key=value rule change from the recorded rules; repeatable")
+    args = parser.parse_args(argv)
+    changes = dict(args.rule)
+
+    if args.command == 'rescore':
+        with HandHistoryReader(args.paths[0]) as reader:
+            rules = _rules_from(changes, reader.rules)
+        result = rescore(args.paths, rules)
+        print(f"{result.records} rounds, {result.hands} hands, {result.wagered} chips wagered")
+        print(f"net as recorded {result.original_net:+d}, rescored {result.rescored_net:+d} "
+              f"({(result.rescored_net - result.original_net) / (result.wagered or 1):+.3%} of wagered)")
+        return
+
+    for path in args.paths:
+        replayer = HandReplayer()
+        if args.command == 'replay' and changes:
+            with HandHistoryReader(path) as reader:
+                replayer.rules = _rules_from(changes, reader.rules)
+        summary = replayer.replay_file(path)
+        print(f"{path}: {summary.hands} rounds, {summary.matched} matched, {summary.mismatched} mismatched, "
+              f"{summary.diverged} diverged; net as recorded {summary.original_net:+d}, "
+              f"replayed {summary.replayed_net:+d}")
+
+
+if __name__ == '__main__':
+    main()
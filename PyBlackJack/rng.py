@@ -0,0 +1,187 @@
+"""
+Counter-based random streams.
+
+A ``StreamRNG`` is a ``random.Random`` whose output is a pure function of a
+256-bit key and a position: 32-bit word ``n`` of a stream is read from block
+``n // 16``, the BLAKE2b hash of the block number keyed with the stream's key.
+Nothing is carried from one draw to the next but the position, so a stream can
+be jumped ahead (``advance()``) without generating what it skips, and its whole
+state is the key and position.
+
+Independent streams are split off a parent with ``child(index)`` (or several at
+once with ``spawn()``), whose keys are hashed from the parent's key and the
+index, the way NumPy's ``SeedSequence.spawn`` derives child seeds. Give each
+table, shoe bank or worker its own child and their results are reproducible from
+the one root seed however the work is divided, while no two of them share or
+overlap a sequence.
+
+Being a ``random.Random``, a stream works everywhere the shoe takes an RNG
+(``shuffle``, ``choice``, ``randrange``, ...). ``shuffle`` is its own, drawing
+one word per card, so shuffling a shoe costs about what the Mersenne Twister's does.
+"""
+import os
+import random
+import struct
+from hashlib import blake2b
+from typing import List, Union
+
+Seed = Union[int, str, bytes, bytearray, None]
+# one BLAKE2b digest as sixteen little-endian 32-bit words
+_BLOCK = struct.Struct('<16I')
+
+
+class StreamRNG(random.Random):
+    """
+    A random stream keyed by ``seed``; without one the key is read from ``os.urandom``.
+
+    :ivar position: 32-bit words drawn (or skipped) so far.
+    :type position: int
+    :ivar children_spawned: Children handed out by ``spawn()`` so far.
+    :type children_spawned: int
+    """
+    VERSION = 1
+    KEY_BYTES = 32
+    BLOCK_BYTES = 64
+    BLOCK_WORDS = BLOCK_BYTES // 4
+    _SEED_PERSON = b'pbj-seed'
+    _CHILD_PERSON = b'pbj-child'
+
+    def __init__(self, seed: Seed = None):
+        self._key = b''
+        self._block_number = -1
+        self._block = ()
+        self.position = 0
+        self.children_spawned = 0
+        super().__init__(seed)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(key={self._key.hex()[:16]}..., position={self.position})"
+
+    @property
+    def key(self) -> bytes:
+        return self._key
+
+    @classmethod
+    def from_key(cls, key: bytes, position: int = 0) -> 'StreamRNG':
+        """The stream with the given key, at position."""
+        if len(key) != cls.KEY_BYTES:
+            raise ValueError(f"A stream key is {cls.KEY_BYTES} bytes, not {len(key)}.")
+        rng = cls(0)
+        rng._set_key(bytes(key))
+        rng.position = position
+        return rng
+
+    def _set_key(self, key: bytes):
+        self._key = key
+        self._block_number = -1
+        self.position = 0
+        self.children_spawned = 0
+        self.gauss_next = None
+
+    def seed(self, a: Seed = None, version: int = 2):
+        """
+        Key the stream from a and rewind it to the start.
+
+        :raises TypeError: If a is not an int, str, bytes or None.
+        """
+        if a is None:
+            material = os.urandom(self.__class__.KEY_BYTES)
+        elif isinstance(a, int):
+            material = b'i' + a.to_bytes((a.bit_length() + 8) // 8, 'little', signed=True)
+        elif isinstance(a, str):
+            material = b's' + a.encode('utf-8')
+        elif isinstance(a, (bytes, bytearray)):
+            material = b'b' + bytes(a)
+        else:
+            raise TypeError(f"A stream is seeded with an int, str or bytes, not {type(a).__name__}.")
+        self._set_key(blake2b(material, digest_size=self.__class__.KEY_BYTES,
+                              person=self.__class__._SEED_PERSON).digest())
+
+    def getstate(self) -> tuple:
+        return self.__class__.VERSION, self._key, self.position, self.gauss_next
+
+    def setstate(self, state: tuple):
+        version, key, position, gauss_next = state
+        if version != self.__class__.VERSION:
+            raise ValueError(f"State from version {version} of {self.__class__.__name__}; "
+                             f"this is version {self.__class__.VERSION}.")
+        self._set_key(bytes(key))
+        self.position = position
+        self.gauss_next = gauss_next
+
+    def _read_block(self, number: int) -> tuple:
+        """The 16 words of block number."""
+        if number != self._block_number:
+            self._block = _BLOCK.unpack(blake2b(number.to_bytes(8, 'little'), key=self._key,
+                                                digest_size=self.__class__.BLOCK_BYTES).digest())
+            self._block_number = number
+        return self._block
+
+    def getrandbits(self, k: int) -> int:
+        """k random bits, using ``ceil(k / 32)`` words of the stream."""
+        if k <= 0:
+            if k < 0:
+                raise ValueError("number of bits must be non-negative")
+            return 0
+        words = (k + 31) // 32
+        position = self.position
+        self.position = position + words
+        if words == 1:
+            block, word = divmod(position, self.__class__.BLOCK_WORDS)
+            return self._read_block(block)[word] >> (32 - k)
+        value = 0
+        for shift in range(0, words * 32, 32):
+            block, word = divmod(position, self.__class__.BLOCK_WORDS)
+            value |= self._read_block(block)[word] << shift
+            position += 1
+        return value >> (words * 32 - k)
+
+    def shuffle(self, x: list):
+        """
+        Shuffle x in place (Fisher-Yates).
+
+        Each swap index is taken from one word by Lemire's multiply-and-reject, which
+        is unbiased and, for a shoe, costs about one word per card.
+        """
+        per_block = self.__class__.BLOCK_WORDS
+        number, offset = divmod(self.position, per_block)
+        words = self._read_block(number)
+        for i in reversed(range(1, len(x))):
+            n = i + 1
+            # 2**32 % n: the low products that would favour some indexes
+            threshold = 0x100000000 % n
+            while True:
+                if offset == per_block:
+                    number += 1
+                    offset = 0
+                    words = self._read_block(number)
+                product = words[offset] * n
+                offset += 1
+                if product & 0xFFFFFFFF >= threshold:
+                    break
+            j = product >> 32
+            x[i], x[j] = x[j], x[i]
+        self.position = number * per_block + offset
+
+    def random(self) -> float:
+        return self.getrandbits(53) * (1.0 / (1 << 53))
+
+    def advance(self, words: int):
+        """Skip the next words of the stream, as if that many 32-bit draws were made."""
+        if words < 0:
+            raise ValueError("A stream only jumps ahead.")
+        self.position += words
+
+    def child(self, index: int) -> 'StreamRNG':
+        """Independent stream number index of this one's; the same index always gives the same stream."""
+        if index < 0:
+            raise ValueError(f"Child streams are numbered from 0, not {index}.")
+        key = blake2b(index.to_bytes(8, 'little'), key=self._key, digest_size=self.__class__.KEY_BYTES,
+                      person=self.__class__._CHILD_PERSON).digest()
+        return self.__class__.from_key(key)
+
+    def spawn(self, count: int) -> List['StreamRNG']:
+        """The next count child streams not yet spawned."""
+        start = self.children_spawned
+        self.children_spawned += count
+        return [self.child(index) for index in range(start, start + count)]
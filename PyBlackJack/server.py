@@ -0,0 +1,343 @@
+#! python3
+"""
+PyBlackJack table server
+
+Hosts many HeadlessGame tables in one asyncio process. Clients connect over TCP
+or a Unix socket and speak a line-delimited protocol: one command per line, one
+compact JSON object per reply line.
+
+    JOIN <table> [<first> <last>]   take the next free seat (table created on first join)
+    BET <amount>                    bet the next hand; it is dealt once every seat has bet
+    HIT | STAY | DOUBLE | SPLIT | SURRENDER
+                                    play your seat's current hand when it is your turn
+    INSURE [no]                     take or decline insurance when the dealer shows an ace
+    STATE                           current table state
+    TABLES                          list tables
+    QUIT                            disconnect
+
+Replies are ``{"ok": true, "state": {...}}`` or ``{"ok": false, "error": "..."}``.
+When another seat's action changes the table, seated clients are also sent
+``{"event": "state", "table": ..., "state": {...}}``.
+Database work (player lookup, balance writes through PyBlackJackSQLLite) runs on a
+dedicated executor thread that owns the SQLite connection, so a slow commit only
+delays the table that is waiting on it.
+With ``--history DIR`` every table's hands are recorded to its own rotating hand
+history files in DIR (see ``PyBlackJack.history``).
+With ``--seed`` table ``i`` (in order of creation) shuffles with child stream ``i``
+of the seed's ``StreamRNG`` (see ``PyBlackJack.rng``), so a run can be dealt again.
+With ``--metrics-port`` and/or ``--metrics-file`` per-table hand, decision, reshuffle
+and bankroll metrics and SQLite commit latency are exported in the Prometheus text
+format (see ``PyBlackJack.metrics``).
+
+Usage:
+    python -m PyBlackJack.server [--host 127.0.0.1] [--port 8765] [--unix /tmp/pyblackjack.sock] [--history DIR]
+                                 [--seed N] [--metrics-port 9108] [--metrics-file metrics.prom]
+"""
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from Backend.PlayerCashRecordDB import PyBlackJackSQLLite
+from Backend.enum import TurnChoices
+from Backend.output import LoggingSink
+from Backend.settings import Settings
+from PyBlackJack.Bank.Cage import DatabaseCage
+from PyBlackJack.headless import HeadlessGame, HandStateError
+from PyBlackJack.history import HandHistoryWriter
+from PyBlackJack.metrics import MetricsExporter, add_metrics_arguments, exporter_from_args
+from PyBlackJack.rng import StreamRNG
+
+
+class ProtocolError(Exception):
+    ...
+
+
+class Table:
+    """
+    A named multi-seat HeadlessGame plus the lock that serializes commands against it.
+
+    A hand starts once every occupied seat has placed a bet; each seat then acts
+    in turn and the dealer plays once for the whole table.
+    """
+    def __init__(self, name: str, game: HeadlessGame):
+        self.name = name
+        self.game = game
+        self.lock = asyncio.Lock()
+        self.clients = [None] * game.seats
+        self.pending_bets = [0] * game.seats
+
+    @property
+    def occupied(self):
+        return sum(c is not None for c in self.clients)
+
+    def free_seat(self):
+        for seat, client in enumerate(self.clients):
+            if client is None:
+                return seat
+        return None
+
+    def ready_to_deal(self):
+        return all(bet for bet, client in zip(self.pending_bets, self.clients) if client is not None)
+
+
+class TableServer:
+    DEFAULT_HOST = '127.0.0.1'
+    DEFAULT_PORT = 8765
+    MAX_LINE_BYTES = 1024
+    TURN_COMMANDS = ('HIT', 'STAY', 'DOUBLE', 'SPLIT', 'SURRENDER')
+    # a table runs for as long as the server does; its ledger keeps running totals past this
+    LEDGER_MAX_ENTRIES = 10_000
+
+    def __init__(self, game_settings: Settings = None, use_database: bool = None, seats: int = None,
+                 history_dir: str = None, metrics: MetricsExporter = None, seed: int = None):
+        self.game_settings = game_settings or Settings()
+        # table i shuffles with child stream i, so a seeded server deals the same shoes per table
+        self.streams = StreamRNG(seed)
+        self.history_dir = history_dir
+        self.metrics = metrics
+        self.history_writers = []
+        self.use_database = self.game_settings.use_database if use_database is None else use_database
+        self.seats = seats or self.game_settings.seats
+        self.tables = {}
+        self.servers = []
+        self.db = None
+        # a single worker owns the SQLite connection (sqlite3 connections are bound to their thread)
+        self._db_executor = (ThreadPoolExecutor(max_workers=1, thread_name_prefix='pyblackjack-db',
+                                                initializer=self._open_db)
+                             if self.use_database else None)
+
+    def _open_db(self):
+        self.db = PyBlackJackSQLLite(settings=self.game_settings, output=LoggingSink())
+        if self.metrics is not None:
+            self.metrics.database.attach(self.db)
+
+    async def run_db(self, func, *args):
+        """Run blocking database work on the DB thread without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    async def open_db(self):
+        """Open the connection on the DB thread, so tables are created with a cage that has it."""
+        if self._db_executor is not None and self.db is None:
+            await self.run_db(lambda: None)
+
+    def _lookup_or_create_player(self, first_name: str, last_name: str):
+        player_id = self.db.PlayerIDLookup(player_first_name=first_name, player_last_name=last_name)
+        if player_id is None:
+            player_id = self.db.new_player_setup({PyBlackJackSQLLite.NEW_PLAYER_DICT_KEYS[0]: first_name,
+                                                  PyBlackJackSQLLite.NEW_PLAYER_DICT_KEYS[1]: last_name})
+        return self.db.PlayerInfoLookup(player_id)
+
+    def get_table(self, name: str) -> Table:
+        table = self.tables.get(name)
+        if table is None:
+            if self.use_database and self.db is None:
+                raise RuntimeError("open_db() before creating a table in database mode.")
+            # the seats play with table chips; in database mode the cage that paid them in writes balances back
+            cage = {'non_database_cage_class': partial(DatabaseCage, self.db)} if self.use_database else {}
+            game = HeadlessGame(game_settings=self.game_settings, use_database=False, seats=self.seats,
+                                rng=self.streams.child(len(self.tables)), **cage)
+            game.banker.ledger.max_entries = self.__class__.LEDGER_MAX_ENTRIES
+            if self.history_dir:
+                # table names come from clients; keep them to safe file-name characters
+                prefix = f"{len(self.tables):03d}-{re.sub(r'[^A-Za-z0-9_-]', '_', name)[:40]}"
+                writer = HandHistoryWriter(self.history_dir, game.rules, game.banker.ledger.session_id, prefix)
+                self.history_writers.append(writer)
+                game.record_history(writer)
+            if self.metrics is not None:
+                self.metrics.games.attach(game.events, name)
+            table = Table(name, game)
+            self.tables[name] = table
+        return table
+
+    async def join(self, name: str, writer, player_name=None):
+        await self.open_db()
+        table = self.get_table(name)
+        seat = table.free_seat()
+        if seat is None:
+            raise ProtocolError(f"Table '{name}' is full.")
+        table.clients[seat] = writer
+        player = table.game.players[seat]
+        # a seat's player outlives its client; clear the previous occupant's account
+        player.account_id = player.account_balance = None
+        if self.use_database and player_name:
+            first, last = (n.capitalize() for n in player_name)
+            try:
+                info = await self.run_db(self._lookup_or_create_player, first, last)
+            except Exception:
+                table.clients[seat] = None
+                raise
+            for attr, value in info.items():
+                setattr(player, attr, value)
+            table.game.banker.adjust_balance(player, info['account_balance'], seat)
+        return table, seat
+
+    async def leave(self, table: Table, seat: int):
+        async with table.lock:
+            table.clients[seat] = None
+            table.pending_bets[seat] = 0
+            table.game.leave_seat(seat)
+            await self._after_action(table, seat)
+            if table.occupied and table.game.hand_over and table.ready_to_deal():
+                self._deal(table)
+                await self._after_deal(table, None)
+
+    async def _after_action(self, table: Table, seat: int):
+        game = table.game
+        if game.hand_over and isinstance(game.banker, DatabaseCage):
+            players = [p for p, playing in zip(game.players, game.in_hand)
+                       if playing and getattr(p, 'account_id', None) is not None]
+            await self.run_db(self._record_hand, game.banker, players)
+        self._broadcast(table, seat)
+
+    @staticmethod
+    def _record_hand(banker: DatabaseCage, players):
+        for player in players:
+            banker.write_new_account_balance(player)
+        banker.flush_ledger()
+
+    def _deal(self, table: Table):
+        bets, table.pending_bets = table.pending_bets, [0] * table.game.seats
+        return table.game.start_hand(bets)
+
+    async def _after_deal(self, table: Table, seat):
+        if table.game.hand_over:
+            # settled on the deal (a blackjack); record it now rather than on some later action
+            await self._after_action(table, seat)
+        else:
+            self._broadcast(table, seat)
+
+    def _broadcast(self, table: Table, from_seat):
+        """Push the table state to every seated client except the one that acted."""
+        payload = {'event': 'state', 'table': table.name, 'state': table.game.table_state()}
+        for seat, client in enumerate(table.clients):
+            if client is not None and seat != from_seat:
+                self._reply(client, payload)
+
+    async def dispatch(self, table: Table, seat: int, cmd: str, args):
+        game = table.game
+        async with table.lock:
+            if cmd == 'BET':
+                if len(args) != 1 or not args[0].isnumeric():
+                    raise ProtocolError("usage: BET <amount>")
+                if not game.hand_over:
+                    raise HandStateError("Hand already in progress.")
+                bet = int(args[0])
+                player = game.players[seat]
+                if not 0 < bet <= (player.chips if player.chips > 0 else self.game_settings.starting_chips):
+                    raise ValueError("Bet amount cannot exceed players available chips, or be zero.")
+                table.pending_bets[seat] = bet
+                if not table.ready_to_deal():
+                    return dict(game.table_state(), waiting_for=[s for s, c in enumerate(table.clients)
+                                                                 if c is not None and not table.pending_bets[s]])
+                state = self._deal(table)
+                await self._after_deal(table, seat)
+                return state
+            elif cmd in self.__class__.TURN_COMMANDS:
+                state = game.act(TurnChoices[cmd], seat)
+            elif cmd == 'INSURE':
+                state = game.insure(seat, take=not args or args[0].lower() != 'no')
+            elif cmd == 'STATE':
+                return game.table_state()
+            else:
+                raise ProtocolError(f"Unknown command '{cmd}'.")
+            await self._after_action(table, seat)
+            return game.table_state() if game.hand_over else state
+
+    @staticmethod
+    def _reply(writer, payload: dict):
+        writer.write(json.dumps(payload, separators=(',', ':')).encode() + b'\n')
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        table, seat = None, None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                parts = line.decode(errors='replace').split()
+                if not parts:
+                    continue
+                cmd, args = parts[0].upper(), parts[1:]
+                try:
+                    if cmd == 'QUIT':
+                        self._reply(writer, {'ok': True})
+                        break
+                    elif cmd == 'TABLES':
+                        self._reply(writer, {'ok': True, 'tables': {name: t.occupied
+                                                                     for name, t in self.tables.items()}})
+                    elif cmd == 'JOIN':
+                        if table is not None:
+                            raise ProtocolError("Already seated.")
+                        if len(args) not in (1, 3):
+                            raise ProtocolError("usage: JOIN <table> [<first> <last>]")
+                        table, seat = await self.join(args[0], writer, args[1:] or None)
+                        self._reply(writer, {'ok': True, 'table': table.name, 'seat': seat,
+                                             'state': table.game.table_state()})
+                    elif table is None:
+                        raise ProtocolError("JOIN a table first.")
+                    else:
+                        self._reply(writer, {'ok': True, 'state': await self.dispatch(table, seat, cmd, args)})
+                except (ProtocolError, HandStateError, ValueError, sqlite3.Error) as e:
+                    self._reply(writer, {'ok': False, 'error': str(e)})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            if table is not None:
+                await self.leave(table, seat)
+            writer.close()
+
+    async def start(self, host: str = None, port: int = None, unix_path: str = None):
+        await self.open_db()
+        if unix_path:
+            self.servers.append(await asyncio.start_unix_server(self.handle_client, path=unix_path,
+                                                                limit=self.__class__.MAX_LINE_BYTES))
+        if port is not None or not unix_path:
+            self.servers.append(await asyncio.start_server(self.handle_client,
+                                                           host or self.__class__.DEFAULT_HOST,
+                                                           self.__class__.DEFAULT_PORT if port is None else port,
+                                                           limit=self.__class__.MAX_LINE_BYTES))
+        return self.servers
+
+    async def serve_forever(self, **kwargs):
+        await self.start(**kwargs)
+        try:
+            await asyncio.gather(*(s.serve_forever() for s in self.servers))
+        finally:
+            self.close()
+
+    def close(self):
+        for s in self.servers:
+            s.close()
+        for writer in self.history_writers:
+            writer.close()
+        if self._db_executor is not None:
+            self._db_executor.shutdown(wait=True)
+        if self.metrics is not None:
+            self.metrics.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve PyBlackJack tables over TCP or a Unix socket.")
+    parser.add_argument('--host', default=TableServer.DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--unix', dest='unix_path', default=None, help="Unix socket path")
+    parser.add_argument('--seats', type=int, default=None, help="seats per table (1-7)")
+    parser.add_argument('--history', dest='history_dir', default=None, help="directory to record hand histories to")
+    parser.add_argument('--seed', type=int, default=None, help="seed the tables' shuffles, in order of creation")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    server = TableServer(seats=args.seats, history_dir=args.history_dir, metrics=exporter_from_args(args),
+                         seed=args.seed)
+    try:
+        asyncio.run(server.serve_forever(host=args.host, port=args.port, unix_path=args.unix_path))
+    except KeyboardInterrupt:
+        print("Ok Quitting")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Binary snapshots of a HeadlessGame table.
+
+A snapshot holds everything needed to carry on from the same point: the shoe
+(remaining cards in order, the running count and hands since the shuffle), the
+shoe's RNG state, the dealer's cards, chips and last move, each seat's chips,
+bets, last move, HandTree and side-bet results, the round's progress, the cage's held stakes and
+the ledger's running totals. The ledger's entries are not included; a restored
+ledger continues from the saved totals and hand id.
+
+Fixed-size parts are packed with precompiled structs and HandTree arrays are
+copied as raw bytes, so taking or restoring a snapshot costs microseconds and a
+snapshot is a few hundred bytes plus one byte per card in the shoe.
+"""
+import random
+import struct
+from typing import TYPE_CHECKING, List
+
+from Backend.card_codes import card_code
+from Backend.enum import HandOutcome
+from PyBlackJack.Players.Hands import HandTree
+from PyBlackJack.rng import StreamRNG
+
+if TYPE_CHECKING:
+    from PyBlackJack.headless import HeadlessGame
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is malformed or was taken from a different kind of table."""
+    ...
+
+
+MAGIC = b'PBJT'
+VERSION = 5
+# magic, version, seats, max hands, max cards
+_HEADER = struct.Struct('<4sBBBB')
+# hand_over, insurance_open, active seat, active hand, hands played
+_ROUND = struct.Struct('<??bbq')
+# running count, cut card, cards left, hands since the shoe was shuffled
+_SHOE = struct.Struct('<iHHI')
+# which of the RNG structs follows
+_RNG_KIND = struct.Struct('<B')
+RNG_MERSENNE_TWISTER, RNG_STREAM = 0, 1
+# Mersenne Twister state: version, 625 words, whether a gaussian is pending, and its value
+_RNG = struct.Struct('<i625I?d')
+# StreamRNG state: key, position, whether a gaussian is pending, and its value
+_STREAM = struct.Struct(f'<{StreamRNG.KEY_BYTES}sQ?d')
+# dealer chips, last move, dealer cards
+_DEALER = struct.Struct('<qBB')
+# chips, chips at bet, net, bet amount, insurance, in hand, standing, has bet, last move, hands in use,
+# outcomes (255 for none)
+_SEAT = struct.Struct('<qqqqq???BBB')
+# side bets settled this round
+_SIDE_COUNT = struct.Struct('<B')
+# name length, outcome length, net; the name and the outcome name follow
+_SIDE_RESULT = struct.Struct('<BBq')
+# cage bet, cage insurance, ledger balance
+_SEAT_CAGE = struct.Struct('<qqq')
+# ledger hand id, stakes held, house net
+_LEDGER = struct.Struct('<qqq')
+
+OUTCOME_ORDER = tuple(HandOutcome)
+OUTCOME_INDEX = {outcome: i for i, outcome in enumerate(OUTCOME_ORDER)}
+NO_OUTCOMES = 255
+# Player.last_move values by index
+LAST_MOVES = (None, 'hit', 'stay', 'double', 'split', 'surrender')
+LAST_MOVE_INDEX = {move: i for i, move in enumerate(LAST_MOVES)}
+NO_SEAT = -1
+
+# HandTree arrays in the order they are written; their sizes are fixed by the class
+_HAND_ARRAYS = ('cards', 'counts', 'bets', 'flags', 'parents', 'hard_totals', 'aces')
+
+
+def snapshot(game: 'HeadlessGame') -> bytes:
+    """Serialize the table's full state."""
+    deck = game.game_deck
+    parts: List[bytes] = [
+        _HEADER.pack(MAGIC, VERSION, game.seats, HandTree.MAX_HANDS, HandTree.MAX_CARDS),
+        _ROUND.pack(game.hand_over, game.insurance_open,
+                    NO_SEAT if game.active_seat is None else game.active_seat,
+                    NO_SEAT if game.active_hand is None else game.active_hand,
+                    game.hands_played),
+        _SHOE.pack(deck.running_count, deck.cut_card, len(deck.deck), deck.hands_since_shuffle),
+        deck.codes(),
+    ]
+    if isinstance(deck.rng, StreamRNG):
+        _, key, position, gauss = deck.rng.getstate()
+        parts.append(_RNG_KIND.pack(RNG_STREAM))
+        parts.append(_STREAM.pack(key, position, gauss is not None, gauss or 0.0))
+    else:
+        version, words, gauss = deck.rng.getstate()
+        parts.append(_RNG_KIND.pack(RNG_MERSENNE_TWISTER))
+        parts.append(_RNG.pack(version, *words, gauss is not None, gauss or 0.0))
+
+    dealer = game.dealer
+    parts.append(_DEALER.pack(dealer.chips or 0, LAST_MOVE_INDEX[dealer.last_move], len(dealer.hand)))
+    parts.append(bytes(map(card_code, dealer.hand)))
+
+    for seat, player in enumerate(game.players):
+        hands = player.hands
+        outcomes = game.outcomes[seat]
+        parts.append(_SEAT.pack(player.chips or 0, game._chips_at_bet[seat], game.seat_nets[seat],
+                                player.bet_amount, hands.insurance, game.in_hand[seat], game.standing[seat],
+                                player.has_bet, LAST_MOVE_INDEX[player.last_move], hands.n_hands,
+                                NO_OUTCOMES if outcomes is None else len(outcomes)))
+        if outcomes:
+            parts.append(bytes(OUTCOME_INDEX[o] for o in outcomes))
+        side_results = game.side_results[seat]
+        parts.append(_SIDE_COUNT.pack(len(side_results)))
+        for name, (outcome, net) in side_results.items():
+            name_bytes, outcome_bytes = name.encode(), outcome.encode()
+            parts.append(_SIDE_RESULT.pack(len(name_bytes), len(outcome_bytes), net))
+            parts.append(name_bytes + outcome_bytes)
+        parts.extend(getattr(hands, name).tobytes() for name in _HAND_ARRAYS)
+
+    banker, ledger = game.banker, game.banker.ledger
+    for seat in range(game.seats):
+        parts.append(_SEAT_CAGE.pack(banker.seat_bets[seat], banker.seat_insurance[seat], ledger.balances[seat]))
+    parts.append(_LEDGER.pack(ledger.hand_id, ledger.stakes_held, ledger.house_net))
+    return b''.join(parts)
+
+
+def restore(game: 'HeadlessGame', data: bytes):
+    """
+    Put a table back into the state a snapshot was taken in.
+
+    The game must have the same number of seats. The shoe is reloaded in place and the
+    RNG is set to the saved state (for an unseeded shoe, that is the ``random`` module's);
+    a shoe shuffled by the other kind of RNG gets a new RNG of the saved kind.
+
+    :raises SnapshotError: If the data is not a snapshot of a table like this one.
+    """
+    view = memoryview(data)
+    try:
+        magic, version, seats, max_hands, max_cards = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"Not a version {VERSION} table snapshot.")
+        if seats != game.seats or (max_hands, max_cards) != (HandTree.MAX_HANDS, HandTree.MAX_CARDS):
+            raise SnapshotError(f"Snapshot of a {seats}-seat table can't be restored into {game.seats} seats.")
+        offset = _HEADER.size
+
+        hand_over, insurance_open, active_seat, active_hand, hands_played = _ROUND.unpack_from(view, offset)
+        offset += _ROUND.size
+
+        running_count, cut_card, cards_left, hands_since_shuffle = _SHOE.unpack_from(view, offset)
+        offset += _SHOE.size
+        deck = game.game_deck
+        deck.load_codes(view[offset:offset + cards_left])
+        deck.running_count = running_count
+        deck.cut_card = cut_card
+        deck.hands_since_shuffle = hands_since_shuffle
+        offset += cards_left
+
+        kind, = _RNG_KIND.unpack_from(view, offset)
+        offset += _RNG_KIND.size
+        if kind == RNG_STREAM:
+            key, position, has_gauss, gauss = _STREAM.unpack_from(view, offset)
+            offset += _STREAM.size
+            if not isinstance(deck.rng, StreamRNG):
+                deck.rng = StreamRNG(0)
+            deck.rng.setstate((StreamRNG.VERSION, key, position, gauss if has_gauss else None))
+        elif kind == RNG_MERSENNE_TWISTER:
+            rng = _RNG.unpack_from(view, offset)
+            offset += _RNG.size
+            if isinstance(deck.rng, StreamRNG):
+                deck.rng = random.Random()
+            deck.rng.setstate((rng[0], rng[1:626], rng[627] if rng[626] else None))
+        else:
+            raise SnapshotError(f"Unknown shoe RNG kind {kind}.")
+
+        dealer = game.dealer
+        dealer_chips, dealer_move, dealer_cards = _DEALER.unpack_from(view, offset)
+        offset += _DEALER.size
+        dealer.chips = dealer_chips
+        dealer.last_move = LAST_MOVES[dealer_move]
+        dealer.hand = deck.cards_for(view[offset:offset + dealer_cards])
+        offset += dealer_cards
+        # the dealer's hidden view is taken after the deal, before any dealer draws
+        drawn, dealer.hand = dealer.hand[2:], dealer.hand[:2]
+        if dealer.hand:
+            dealer.hidden_hand_setup()
+        else:
+            dealer.hidden_hand = []
+        dealer.hand += drawn
+        # only the dealer's bust is ever flagged, once it has drawn out; it follows from the cards
+        dealer.busted = dealer.get_hand_value() > 21
+
+        outcomes = [None] * seats
+        side_results = [{} for _ in range(seats)]
+        for seat, player in enumerate(game.players):
+            (chips, chips_at_bet, net, bet_amount, insurance, in_hand, standing, has_bet, last_move, n_hands,
+             n_outcomes) = _SEAT.unpack_from(view, offset)
+            offset += _SEAT.size
+            if n_outcomes != NO_OUTCOMES:
+                outcomes[seat] = tuple(OUTCOME_ORDER[i] for i in view[offset:offset + n_outcomes])
+                offset += n_outcomes
+            n_side, = _SIDE_COUNT.unpack_from(view, offset)
+            offset += _SIDE_COUNT.size
+            for _ in range(n_side):
+                name_length, outcome_length, side_net = _SIDE_RESULT.unpack_from(view, offset)
+                offset += _SIDE_RESULT.size
+                name = bytes(view[offset:offset + name_length]).decode()
+                offset += name_length
+                side_results[seat][name] = (bytes(view[offset:offset + outcome_length]).decode(), side_net)
+                offset += outcome_length
+            hands = player.hands
+            for name in _HAND_ARRAYS:
+                column = getattr(hands, name)
+                size = len(column) * column.itemsize
+                memoryview(column).cast('B')[:] = view[offset:offset + size]
+                offset += size
+            hands.n_hands = n_hands
+            hands.insurance = insurance
+            player.chips = chips
+            player.bet_amount = bet_amount
+            player.has_bet = has_bet
+            player.last_move = LAST_MOVES[last_move]
+            # a seat's busts are read from its HandTree; the flag is the interactive game's
+            player.busted = False
+            game._chips_at_bet[seat] = chips_at_bet
+            game.seat_nets[seat] = net
+            game.in_hand[seat] = in_hand
+            game.standing[seat] = standing
+
+        banker, ledger = game.banker, game.banker.ledger
+        for seat in range(seats):
+            banker.seat_bets[seat], banker.seat_insurance[seat], ledger.balances[seat] = \
+                _SEAT_CAGE.unpack_from(view, offset)
+            offset += _SEAT_CAGE.size
+        ledger.hand_id, ledger.stakes_held, ledger.house_net = _LEDGER.unpack_from(view, offset)
+        offset += _LEDGER.size
+    except (struct.error, ValueError, IndexError) as e:
+        raise SnapshotError(f"Truncated or corrupt table snapshot: {e}") from e
+    if offset != len(view):
+        raise SnapshotError(f"{len(view) - offset} unexpected bytes after the table snapshot.")
+
+    game.outcomes = outcomes
+    game.side_results = side_results
+    game.hand_over = hand_over
+    game.insurance_open = insurance_open
+    game.active_seat = None if active_seat == NO_SEAT else active_seat
+    game.active_hand = None if active_hand == NO_SEAT else active_hand
+    game.hands_played = hands_played
+    return game
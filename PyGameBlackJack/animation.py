@@ -0,0 +1,305 @@
+"""
+Fixed-timestep animation for the PyGame client.
+
+Tweens are advanced by an ``AnimationScheduler`` in fixed steps and drawn at a
+position interpolated between the last two steps. Animations are purely visual:
+game state changes immediately and never waits on them. ``TableAnimator`` watches
+the table (hands, dealer reveal, chips) and schedules deal, flip and chip tweens.
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pygame
+
+from PyGameBlackJack.card_renderer import load_svg_as_surface
+
+
+def _ease(p: float) -> float:
+    # smoothstep: gentle start and landing
+    return p * p * (3 - 2 * p)
+
+
+class Tween:
+    """
+    Moves a surface from start to end over duration seconds, after an optional delay.
+
+    A tween's position is a pure function of its elapsed time, so the scheduler
+    can advance it by any amount in one call.
+    """
+    def __init__(self, surface: pygame.Surface, start: Tuple[int, int], end: Tuple[int, int],
+                 duration: float, delay: float = 0.0, on_done=None):
+        self.surface = surface
+        self.start = start
+        self.end = end
+        self.duration = max(duration, 1e-6)
+        self.delay = delay
+        self.on_done = on_done
+        self.elapsed = 0.0
+        self.prev_elapsed = 0.0
+        self.last_rect: Optional[pygame.Rect] = None
+
+    @property
+    def done(self):
+        return self.elapsed >= self.delay + self.duration
+
+    def advance(self, dt: float):
+        self.prev_elapsed = self.elapsed
+        self.elapsed += dt
+
+    def progress(self, elapsed: float) -> Optional[float]:
+        """Eased 0..1 progress at elapsed, or None while still in the delay."""
+        if elapsed < self.delay:
+            return None
+        return _ease(min(1.0, (elapsed - self.delay) / self.duration))
+
+    def render(self, p: float) -> Tuple[pygame.Surface, Tuple[int, int]]:
+        x = self.start[0] + (self.end[0] - self.start[0]) * p
+        y = self.start[1] + (self.end[1] - self.start[1]) * p
+        return self.surface, (int(x), int(y))
+
+    def draw(self, screen: pygame.Surface, alpha: float) -> Optional[pygame.Rect]:
+        """Draw at the time interpolated between the last two steps; return the rect touched."""
+        p = self.progress(self.prev_elapsed + (self.elapsed - self.prev_elapsed) * alpha)
+        if p is None:
+            return None
+        surface, pos = self.render(p)
+        return screen.blit(surface, pos)
+
+
+class FlipTween(Tween):
+    """Turns a card over in place: the back narrows to nothing, then the face widens out."""
+    def __init__(self, back: pygame.Surface, face: pygame.Surface, pos: Tuple[int, int],
+                 duration: float, delay: float = 0.0, on_done=None):
+        super().__init__(face, pos, pos, duration, delay, on_done)
+        self.back = back
+
+    def render(self, p: float):
+        surface = self.back if p < 0.5 else self.surface
+        scale = abs(1 - 2 * p)
+        width = max(1, int(surface.get_width() * scale))
+        x = self.start[0] + (surface.get_width() - width) // 2
+        return pygame.transform.scale(surface, (width, surface.get_height())), (x, self.start[1])
+
+
+class ChipTween(Tween):
+    CHIP_RADIUS = 18
+    CHIP_COLOR = (200, 30, 30)
+    CHIP_EDGE_COLOR = (255, 255, 255)
+
+    @classmethod
+    def make_chip_surface(cls, amount: int, font: pygame.font.Font) -> pygame.Surface:
+        r = cls.CHIP_RADIUS
+        surf = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+        pygame.draw.circle(surf, cls.CHIP_COLOR, (r, r), r)
+        pygame.draw.circle(surf, cls.CHIP_EDGE_COLOR, (r, r), r, 3)
+        txt = font.render(str(amount), True, cls.CHIP_EDGE_COLOR)
+        surf.blit(txt, txt.get_rect(center=(r, r)))
+        return surf
+
+
+class AnimationScheduler:
+    """
+    Advances tweens in fixed steps of step_seconds and draws them interpolated.
+
+    Per frame at most max_steps_per_frame steps are simulated; if the frame took
+    longer than that (the machine is under load) the remaining whole steps are
+    applied in one jump, so animations skip frames but keep wall-clock pace and
+    never hold up the game. At most max_tweens run at once; adding more finishes
+    the oldest immediately.
+    """
+    def __init__(self, step_seconds: float = 1 / 120, max_steps_per_frame: int = 4, max_tweens: int = 16):
+        self.step_seconds = step_seconds
+        self.max_steps_per_frame = max_steps_per_frame
+        self.max_tweens = max_tweens
+        self.tweens: List[Tween] = []
+        self.skipped_steps = 0
+        # set when a tween finished during the last update; the static scene needs redrawing
+        self.completed = False
+        self._accumulator = 0.0
+
+    @property
+    def busy(self):
+        return bool(self.tweens)
+
+    @property
+    def alpha(self):
+        return self._accumulator / self.step_seconds
+
+    def add(self, tween: Tween):
+        if len(self.tweens) >= self.max_tweens:
+            oldest = self.tweens[0]
+            oldest.advance(oldest.delay + oldest.duration)
+            self._retire()
+        self.tweens.append(tween)
+        return tween
+
+    def _step(self, dt: float):
+        for t in self.tweens:
+            t.advance(dt)
+        self._retire()
+
+    def _retire(self):
+        done = [t for t in self.tweens if t.done]
+        if done:
+            self.tweens = [t for t in self.tweens if not t.done]
+            self.completed = True
+            for t in done:
+                if t.on_done:
+                    t.on_done()
+
+    def update(self, frame_seconds: float):
+        self.completed = False
+        if not self.tweens:
+            self._accumulator = 0.0
+            return
+        self._accumulator += frame_seconds
+        steps = 0
+        while self._accumulator >= self.step_seconds and steps < self.max_steps_per_frame:
+            self._step(self.step_seconds)
+            self._accumulator -= self.step_seconds
+            steps += 1
+        if self._accumulator >= self.step_seconds:
+            behind = int(self._accumulator // self.step_seconds)
+            self._step(behind * self.step_seconds)
+            self._accumulator -= behind * self.step_seconds
+            self.skipped_steps += behind
+
+    def finish_all(self):
+        for t in self.tweens:
+            t.advance(t.delay + t.duration)
+        self._retire()
+        self._accumulator = 0.0
+
+    def clear(self):
+        self.tweens = []
+        self._accumulator = 0.0
+
+    def draw(self, screen: pygame.Surface, background: pygame.Surface) -> List[pygame.Rect]:
+        """
+        Restore background under each tween's previous rect and draw the tweens.
+
+        :return: Dirty rects for pygame.display.update().
+        """
+        dirty = []
+        for t in self.tweens:
+            if t.last_rect:
+                screen.blit(background, t.last_rect, t.last_rect)
+                dirty.append(t.last_rect)
+        alpha = self.alpha
+        for t in self.tweens:
+            t.last_rect = t.draw(screen, alpha)
+            if t.last_rect:
+                dirty.append(t.last_rect)
+        return dirty
+
+
+class TableAnimator:
+    """
+    Watches a GameScreen's table and schedules tweens for what changed.
+
+    New cards in either hand are dealt from the shoe, the dealer's hole card
+    flips when revealed, and chip changes fly between the player and the pot.
+    While a card is in flight its slot is hidden from GameScreen's static draw.
+    """
+    SIDES = ('player', 'dealer')
+
+    def __init__(self, game_screen, scheduler: AnimationScheduler, deal_seconds: float = 0.3,
+                 flip_seconds: float = 0.3, chip_seconds: float = 0.4, stagger_seconds: float = 0.15):
+        self.game_screen = game_screen
+        self.scheduler = scheduler
+        self.deal_seconds = deal_seconds
+        self.flip_seconds = flip_seconds
+        self.chip_seconds = chip_seconds
+        self.stagger_seconds = stagger_seconds
+        self._seen = {side: 0 for side in self.__class__.SIDES}
+        self._hands = {side: None for side in self.__class__.SIDES}
+        self._revealed = False
+        self._chips = None
+        self._chip_font = None
+
+    def _player_for(self, side):
+        return self.game_screen.player if side == 'player' else self.game_screen.dealer
+
+    def _card_surface(self, path: Path) -> pygame.Surface:
+        return load_svg_as_surface(Path(path), self.game_screen.card_target_height)
+
+    def _land(self, side: str, index: int):
+        def _on_done():
+            self.game_screen.animating_cards[side].discard(index)
+        return _on_done
+
+    def reset(self):
+        self.scheduler.clear()
+        for side in self.__class__.SIDES:
+            self.game_screen.animating_cards[side].clear()
+            self._seen[side] = 0
+        self._revealed = False
+
+    def sync(self) -> bool:
+        """
+        Schedule tweens for anything that changed since the last call.
+
+        :return: True if the static scene changed and needs a full redraw.
+        """
+        changed = False
+        hands = {side: self._player_for(side).hand for side in self.__class__.SIDES}
+        if any(hands[side] is not self._hands[side] for side in self.__class__.SIDES):
+            # a new hand was dealt (setup_new_hand replaces the hand lists)
+            self.reset()
+            self._hands = hands
+            changed = True
+        counts = {side: len(hand) for side, hand in hands.items()}
+
+        revealed = bool(self.game_screen.dealer_revealed)
+        chips = self.game_screen.player.chips
+        try:
+            queued = 0
+            for order in range(max(counts.values(), default=0)):
+                for side in self.__class__.SIDES:
+                    if self._seen[side] <= order < counts[side]:
+                        self._deal(side, order, delay=queued * self.stagger_seconds)
+                        queued += 1
+            changed = changed or bool(queued)
+
+            if revealed != self._revealed:
+                if revealed and counts['dealer']:
+                    self._flip_hole_card()
+                changed = True
+
+            if self._chips is not None and chips is not None and chips != self._chips:
+                self._move_chips(chips - self._chips)
+        except Exception:
+            # Fail-safe like print_hand: without animations the cards simply appear
+            self.scheduler.finish_all()
+            changed = True
+        for side in self.__class__.SIDES:
+            self._seen[side] = counts[side]
+        self._revealed = revealed
+        self._chips = chips
+        return changed
+
+    def _deal(self, side: str, index: int, delay: float):
+        paths = self.game_screen.hand_card_paths(side)
+        rects = self.game_screen.hand_card_rects(side)
+        self.game_screen.animating_cards[side].add(index)
+        self.scheduler.add(Tween(self._card_surface(paths[index]), self.game_screen.shoe_xy(),
+                                 rects[index].topleft, self.deal_seconds, delay=delay,
+                                 on_done=self._land(side, index)))
+
+    def _flip_hole_card(self):
+        back = self._card_surface(self.game_screen.card_back_svg)
+        face = self._card_surface(self.game_screen.hand_card_paths('dealer', reveal_all=True)[0])
+        pos = self.game_screen.hand_card_rects('dealer')[0].topleft
+        self.game_screen.animating_cards['dealer'].add(0)
+        self.scheduler.add(FlipTween(back, face, pos, self.flip_seconds, on_done=self._land('dealer', 0)))
+
+    def _move_chips(self, delta: int):
+        if self._chip_font is None:
+            self._chip_font = pygame.font.Font(None, 18)
+        screen_rect = self.game_screen.screen.get_rect()
+        player_xy = (self.game_screen.edge_buffer_pixels,
+                     screen_rect.height - self.game_screen.card_bottom_margin)
+        pot_xy = (screen_rect.centerx, screen_rect.centery)
+        start, end = (player_xy, pot_xy) if delta < 0 else (pot_xy, player_xy)
+        surface = ChipTween.make_chip_surface(abs(delta), self._chip_font)
+        self.scheduler.add(ChipTween(surface, start, end, self.chip_seconds))
@@ -0,0 +1,137 @@
+#! python3
+"""
+Offline card asset build.
+
+Rasterizes (SVG, when cairosvg is installed) or rescales (PNG) the card set to a
+handful of fixed heights, spread across worker processes, and writes a manifest
+that card_renderer uses at runtime to blit pre-sized surfaces without scaling.
+
+Usage:
+    python -m PyGameBlackJack.build_card_assets [--heights 90 120 180 240] [--workers N]
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from Backend.settings import PyBlackJackConfig
+
+# quiet the pygame banner in every worker process
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import pygame  # noqa: E402
+
+DEFAULT_HEIGHTS = (90, 120, 180, 240)
+DEFAULT_SOURCE_DIR = PyBlackJackConfig.CARD_PNG_DEFAULT_PATH
+DEFAULT_SVG_SOURCE_DIR = PyBlackJackConfig.CARD_SVG_DEFAULT_PATH
+DEFAULT_BUILD_DIR = PyBlackJackConfig.CARD_BUILD_DEFAULT_PATH
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _svg_rasterizer_available() -> bool:
+    try:
+        import cairosvg  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def collect_sources(png_dir: Path = DEFAULT_SOURCE_DIR, svg_dir: Path = DEFAULT_SVG_SOURCE_DIR) -> Dict[str, Path]:
+    """
+    Gather one source file per card name (keyed by PNG file name).
+
+    SVG sources win when cairosvg is available since they rasterize sharper at
+    every height; otherwise the pre-rendered PNGs are rescaled.
+    """
+    sources = {}
+    if png_dir.is_dir():
+        sources.update({p.name: p for p in png_dir.iterdir() if p.suffix.lower() == '.png'})
+    if _svg_rasterizer_available():
+        svg_files = list(svg_dir.iterdir()) if svg_dir.is_dir() else []
+        svg_files.append(PyBlackJackConfig.CARD_BACK_SVG_DEFAULT_PATH)
+        sources.update({p.with_suffix('.png').name: p
+                        for p in svg_files if p.suffix.lower() == '.svg' and p.is_file()})
+    return sources
+
+
+def _load_source(src: Path, height: int) -> pygame.Surface:
+    if src.suffix.lower() == '.svg':
+        import cairosvg
+        png_bytes = cairosvg.svg2png(url=str(src), output_height=height)
+        return pygame.image.load(BytesIO(png_bytes), src.with_suffix('.png').name)
+    return pygame.image.load(str(src))
+
+
+def build_card(src: Path, name: str, heights: Iterable[int], out_dir: Path) -> Tuple[str, Dict[int, List[int]]]:
+    """
+    Write ``name`` at every requested height into ``out_dir/<height>/``.
+
+    Runs inside a worker process. PNG sources are decoded once and
+    smooth-scaled per height; SVG sources are rasterized per height.
+
+    :return: The card name and a mapping of height -> [width, height] actually written.
+    """
+    sizes = {}
+    base = None if src.suffix.lower() == '.svg' else _load_source(src, 0)
+    for h in heights:
+        surf = _load_source(src, h) if base is None else base
+        if surf.get_height() != h:
+            ratio = h / max(1, surf.get_height())
+            surf = pygame.transform.smoothscale(surf, (max(1, int(surf.get_width() * ratio)), h))
+        dest = out_dir / str(h) / name
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        pygame.image.save(surf, str(dest))
+        sizes[h] = list(surf.get_size())
+    return name, sizes
+
+
+def build_all(heights: Iterable[int] = DEFAULT_HEIGHTS, out_dir: Path = DEFAULT_BUILD_DIR,
+              png_dir: Path = DEFAULT_SOURCE_DIR, svg_dir: Path = DEFAULT_SVG_SOURCE_DIR,
+              workers: int = None) -> Path:
+    """
+    Build every card at every height in parallel and write the manifest.
+
+    :raises FileNotFoundError: If no source card images could be found.
+    :return: Path to the written manifest.
+    """
+    heights = sorted({int(h) for h in heights})
+    sources = collect_sources(png_dir, svg_dir)
+    if not sources:
+        raise FileNotFoundError(f"No card sources found in {png_dir} or {svg_dir}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    cards = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_card, src, name, heights, out_dir) for name, src in sources.items()]
+        for fut in futures:
+            name, sizes = fut.result()
+            cards[name] = sizes
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'heights': heights,
+        'cards': {name: {str(h): size for h, size in sizes.items()} for name, sizes in sorted(cards.items())},
+    }
+    manifest_path = out_dir / MANIFEST_NAME
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    print(f"Built {len(cards)} cards at heights {heights} -> {out_dir}")
+    return manifest_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-build card images at fixed heights.")
+    parser.add_argument('--heights', type=int, nargs='+', default=list(DEFAULT_HEIGHTS))
+    parser.add_argument('--out', type=Path, default=DEFAULT_BUILD_DIR)
+    parser.add_argument('--png-source', type=Path, default=DEFAULT_SOURCE_DIR)
+    parser.add_argument('--svg-source', type=Path, default=DEFAULT_SVG_SOURCE_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    build_all(args.heights, args.out, args.png_source, args.svg_source, args.workers)
+
+
+if __name__ == '__main__':
+    main()
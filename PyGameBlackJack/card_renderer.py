@@ -1,11 +1,17 @@
+import json
 from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Tuple, Optional
+from typing import Iterable, Tuple, Optional, Dict, Collection, List
 
 import pygame
 
+from Backend.output import default_sink
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PNG_CARDS_DIR = PROJECT_ROOT / "MiscProjectFiles" / "PlayingCards" / "PNG-cards"
+# Output of `python -m PyGameBlackJack.build_card_assets`
+BUILT_CARDS_DIR = PNG_CARDS_DIR.parent / "PNG-cards-built"
+BUILT_MANIFEST_PATH = BUILT_CARDS_DIR / "manifest.json"
 
 # Diagnostics flags
 _PLACEHOLDER_USED = False
@@ -15,6 +21,24 @@ _RENDER_BACKEND = "placeholder"
 CARD_AR = 63 / 88  # ~0.716
 
 
+@lru_cache(maxsize=1)
+def _load_built_manifest() -> Dict[str, Dict[str, list]]:
+    """Return the pre-built card manifest's card table, or {} if nothing has been built."""
+    try:
+        with open(BUILT_MANIFEST_PATH) as f:
+            return json.load(f).get('cards', {})
+    except Exception:
+        return {}
+
+
+def closest_built_height(png_name: str, target_height: int) -> Optional[int]:
+    """Pick the pre-built height closest to target_height for png_name, or None if it wasn't built."""
+    heights = _load_built_manifest().get(png_name)
+    if not heights:
+        return None
+    return min((int(h) for h in heights), key=lambda h: (abs(h - target_height), -h))
+
+
 @lru_cache(maxsize=512)
 def load_svg_as_surface(svg_path: Path, target_height: int = 180) -> pygame.Surface:
     """
@@ -23,6 +47,9 @@ def load_svg_as_surface(svg_path: Path, target_height: int = 180) -> pygame.Surf
     Accepts incoming Paths that may point to SVG files; those are mapped to the
     corresponding PNG file in MiscProjectFiles/PlayingCards/PNG-cards.
 
+    When the card set has been pre-built (see build_card_assets), the closest
+    pre-built height is loaded as-is and no runtime scaling happens.
+
     If loading fails, returns a placeholder surface with the card name.
 
     Caches by (input path, target_height).
@@ -70,12 +97,20 @@ def load_svg_as_surface(svg_path: Path, target_height: int = 180) -> pygame.Surf
 
     png_path = _map_to_png_path(in_path)
 
+    built_height = closest_built_height(png_path.name, target_height)
+    if built_height is not None:
+        built_path = BUILT_CARDS_DIR / str(built_height) / png_path.name
+        try:
+            surf = pygame.image.load(str(built_path)).convert_alpha()
+            global _RENDER_BACKEND
+            _RENDER_BACKEND = "prebuilt"
+            return surf
+        except Exception as e:
+            default_sink().warning("[card_renderer] Failed to load pre-built card '%s': %s", built_path, e)
+
     # Missing asset handling
     if not png_path.exists() or not png_path.is_file():
-        try:
-            print(f"[card_renderer] Missing PNG card asset: {png_path} (from {in_path})")
-        except Exception:
-            pass
+        default_sink().warning("[card_renderer] Missing PNG card asset: %s (from %s)", png_path, in_path)
         return _placeholder(color=(160, 0, 0, 255), text=(in_path.name or "missing"))
 
     try:
@@ -85,14 +120,10 @@ def load_svg_as_surface(svg_path: Path, target_height: int = 180) -> pygame.Surf
             scale_ratio = target_height / max(1, surf.get_height())
             new_size = (int(max(1, surf.get_width()) * scale_ratio), target_height)
             surf = pygame.transform.smoothscale(surf, new_size)
-        global _RENDER_BACKEND
         _RENDER_BACKEND = "png"
         return surf
     except Exception as e:
-        try:
-            print(f"[card_renderer] Failed to load PNG '{png_path}': {e}")
-        except Exception:
-            pass
+        default_sink().warning("[card_renderer] Failed to load PNG '%s': %s", png_path, e)
         return _placeholder(text=in_path.stem)
 
 
@@ -102,19 +133,44 @@ def draw_hand(
     start_xy: Tuple[int, int],
     target_height: int = 180,
     x_spacing: int = 24,
+    skip_cards: Collection[int] = (),
 ):
-    """Draw a horizontal row of card images given SVG Paths."""
+    """Draw a horizontal row of card images given SVG Paths.
+
+    Cards whose index is in skip_cards keep their slot but are not drawn
+    (e.g. while an animation is carrying them into place).
+    """
     x, y = start_xy
-    for p in card_paths:
+    for i, p in enumerate(card_paths):
         card_surf = load_svg_as_surface(Path(p), target_height)
-        screen.blit(card_surf, (x, y))
+        if i not in skip_cards:
+            screen.blit(card_surf, (x, y))
         x += card_surf.get_width() - x_spacing  # slight overlap for a fanned look
 
 
+def card_slot_rects(
+    card_paths: Iterable[Path],
+    start_xy: Tuple[int, int],
+    target_height: int = 180,
+    x_spacing: int = 24,
+) -> List[pygame.Rect]:
+    """Return the screen rect each card of a hand occupies when drawn by draw_hand."""
+    x, y = start_xy
+    rects = []
+    for p in card_paths:
+        card_surf = load_svg_as_surface(Path(p), target_height)
+        rects.append(pygame.Rect((x, y), card_surf.get_size()))
+        x += card_surf.get_width() - x_spacing
+    return rects
+
 
 def get_renderer_status():
     """Return renderer diagnostics for the image renderer."""
     return {
         'placeholder_used': _PLACEHOLDER_USED,
         'backend': globals().get('_RENDER_BACKEND', 'unknown'),
+        'available_backends': {
+            'prebuilt': bool(_load_built_manifest()),
+            'png': PNG_CARDS_DIR.is_dir(),
+        },
     }
@@ -0,0 +1,94 @@
+import csv
+from collections import deque
+from time import perf_counter
+from typing import Dict, List, Optional
+
+
+class FrameStats:
+    """
+    Rolling frame-time instrumentation for the PyGame client.
+
+    The game loop calls ``start_frame()`` once per frame and ``mark(phase)`` after
+    each phase (events, draw, flip). Frame time is measured start-to-start so it
+    includes the frame limiter's sleep, which makes FPS and the percentiles match
+    what the player actually sees. Only the last ``window`` frames are kept.
+
+    :ivar csv_path: Optional CSV file receiving one row per frame.
+    :type csv_path: str | None
+    """
+    PHASES = ('events', 'draw', 'flip')
+    CSV_HEADER = ['frame', 'frame_ms'] + [f'{p}_ms' for p in PHASES]
+
+    def __init__(self, window: int = 240, bin_ms: float = 4.0, bins: int = 16, csv_path: Optional[str] = None):
+        self.window = window
+        self.bin_ms = bin_ms
+        self.bins = bins
+        self.frame_times = deque(maxlen=window)
+        self.phase_times: Dict[str, deque] = {p: deque(maxlen=window) for p in self.__class__.PHASES}
+        self.frame_count = 0
+
+        self._frame_start = None
+        self._last_mark = None
+        self._current = {}
+
+        self.csv_path = csv_path
+        self._csv_file = None
+        self._csv_writer = None
+        if csv_path:
+            self._csv_file = open(csv_path, 'w', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(self.__class__.CSV_HEADER)
+
+    def start_frame(self):
+        now = perf_counter()
+        if self._frame_start is not None:
+            self._finish_frame(now - self._frame_start)
+        self._frame_start = now
+        self._last_mark = now
+        self._current = {}
+
+    def mark(self, phase: str):
+        """Record the time since the previous mark (or frame start) against phase."""
+        now = perf_counter()
+        self._current[phase] = self._current.get(phase, 0.0) + (now - self._last_mark)
+        self._last_mark = now
+
+    def _finish_frame(self, frame_seconds: float):
+        self.frame_count += 1
+        self.frame_times.append(frame_seconds)
+        for p, times in self.phase_times.items():
+            times.append(self._current.get(p, 0.0))
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([self.frame_count, f"{frame_seconds * 1000:.3f}"]
+                                      + [f"{self._current.get(p, 0.0) * 1000:.3f}"
+                                         for p in self.__class__.PHASES])
+
+    @property
+    def fps(self) -> float:
+        total = sum(self.frame_times)
+        return len(self.frame_times) / total if total else 0.0
+
+    def phase_averages_ms(self) -> Dict[str, float]:
+        return {p: (sum(t) / len(t) * 1000 if t else 0.0) for p, t in self.phase_times.items()}
+
+    def percentiles_ms(self, percentiles=(50, 95, 99)) -> Dict[int, float]:
+        """Nearest-rank percentiles of the frame times in the window, in milliseconds."""
+        ordered = sorted(self.frame_times)
+        if not ordered:
+            return {p: 0.0 for p in percentiles}
+        last = len(ordered) - 1
+        return {p: ordered[min(last, int(round(p / 100 * last)))] * 1000 for p in percentiles}
+
+    def histogram(self) -> List[int]:
+        """Counts of frame times per ``bin_ms`` bucket; the last bucket collects everything slower."""
+        counts = [0] * self.bins
+        last = self.bins - 1
+        for t in self.frame_times:
+            counts[min(last, int(t * 1000 / self.bin_ms))] += 1
+        return counts
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
@@ -1,12 +1,15 @@
 from pathlib import Path
-from PyGameBlackJack.card_renderer import get_renderer_status
+
+import pygame
+
+from PyGameBlackJack.card_renderer import get_renderer_status, card_slot_rects, CARD_AR
 from PyBlackJack.initializer import BlackJackInitializer
 
 class StartScreen:
     WELCOME_MSG = "Welcome to PyBlackJack!"
     GAME_OVER_MSG = "Game Over! Press any key to exit."
     START_SCREEN_INSTRUCTIONS = "Press any key to start"
-    GAME_SCREEN_INSTRUCTIONS = "H=Hit  S=Stay  R=Reveal  N=New Hand  Esc=Quit"
+    GAME_SCREEN_INSTRUCTIONS = "H=Hit  S=Stay  E=Hint  R=Reveal  N=New Hand  F3=Stats  Esc=Quit"
 
     def __init__(self, game_settings, screen):
         self.screen = screen
@@ -45,8 +48,8 @@ class GameOverScreen(StartScreen):
 
 class GameScreen(StartScreen):
     PLACEHOLDER_WARN_LINES = warn_lines = [
-            "No SVG rasterizer found. Install ANY ONE of:",
-            " - pip install cairosvg  OR  rsvg-convert  OR  ImageMagick (magick)  OR  Inkscape",
+            "Card images not found. Build them with:",
+            " - python -m PyGameBlackJack.build_card_assets  (pip install cairosvg for SVG sources)",
         ]
     def __init__(self, game_settings, screen, player, dealer):
         super().__init__(game_settings, screen)
@@ -69,6 +72,18 @@ class GameScreen(StartScreen):
         self.card_top_margin = 50
         self.card_bottom_margin = 60
 
+        # set by the game loop; drawn by draw_dx_overlay when show_frame_stats is on
+        self.frame_stats = None
+        self.show_frame_stats = getattr(self.game_settings, 'show_frame_stats', False)
+        self.histogram_size = (160, 40)
+        self._dx_small_font = None
+
+        # set when the player asks for a hint, cleared with each new hand
+        self.hint_text = None
+
+        # card indices currently carried by an animation; their slots are left empty
+        self.animating_cards = {'player': set(), 'dealer': set()}
+
     def _title_label_placement(self, screen):
 
         # Titles/labels
@@ -92,29 +107,63 @@ class GameScreen(StartScreen):
         screen.blit(self.player_text_surface, player_text_placement_dest)
         screen.blit(self.dealer_text_surface, dealer_text_placement_dest)
         screen.blit(self.instructions_surface, instruction_placement_dest)
+        if self.hint_text:
+            self.draw_hint(screen, instruction_placement_dest)
 
         # Dealer hand via class method
         if hasattr(self.dealer, 'print_hand'):
             self.dealer.print_hand(
                 screen=screen,
-                start_xy=(self.edge_buffer_pixels, self.card_top_margin),
+                start_xy=self.hand_start_xy('dealer', screen),
                 target_height=self.card_target_height,
                 x_spacing=self.card_x_spacing,
                 reveal_all=getattr(self, 'dealer_revealed', False),
                 card_back_path=self.card_back_svg,
+                skip_cards=self.animating_cards['dealer'],
             )
 
         # Player hand via class method
         if hasattr(self.player, 'print_hand'):
-            player_start_y = screen.get_height() - self.card_bottom_margin - self.card_target_height
             self.player.print_hand(
                 screen=screen,
-                start_xy=(self.edge_buffer_pixels, player_start_y),
+                start_xy=self.hand_start_xy('player', screen),
                 target_height=self.card_target_height,
                 x_spacing=self.card_x_spacing,
+                skip_cards=self.animating_cards['player'],
             )
         self.draw_dx_overlay(screen, bottom_margin=self.card_bottom_margin)
 
+    def draw_hint(self, screen, instruction_placement_dest):
+        """Draw the hint centred under the instructions."""
+        hint_surface = self.game_settings.font.render(f"Hint: {self.hint_text}", True,
+                                                      self.game_settings.game_font_color)
+        hint_x = screen.get_width() // 2 - hint_surface.get_width() // 2
+        hint_y = instruction_placement_dest[1] + self.instructions_surface.get_height() + 4
+        screen.blit(hint_surface, (hint_x, hint_y))
+
+    def hand_start_xy(self, side: str, screen=None):
+        screen = screen or self.screen
+        if side == 'dealer':
+            return self.edge_buffer_pixels, self.card_top_margin
+        return self.edge_buffer_pixels, screen.get_height() - self.card_bottom_margin - self.card_target_height
+
+    def hand_card_paths(self, side: str, reveal_all: bool = None):
+        if side == 'dealer':
+            if reveal_all is None:
+                reveal_all = self.dealer_revealed
+            return self.dealer.get_hand_card_paths(reveal_all, self.card_back_svg)
+        return self.player.get_translated_hand()
+
+    def hand_card_rects(self, side: str):
+        """Screen rects of every card slot of side ('player' or 'dealer'), as laid out by draw()."""
+        return card_slot_rects(self.hand_card_paths(side), self.hand_start_xy(side),
+                               target_height=self.card_target_height, x_spacing=self.card_x_spacing)
+
+    def shoe_xy(self):
+        """Where dealt cards fly in from: the top-right corner of the table."""
+        card_width = int(self.card_target_height * CARD_AR)
+        return self.screen.get_width() - self.edge_buffer_pixels - card_width, self.card_top_margin
+
     def _get_dx_info(self, screen, **kwargs):
         status = get_renderer_status()
         bottom_margin = kwargs.get('bottom_margin', self.card_bottom_margin)
@@ -137,9 +186,47 @@ class GameScreen(StartScreen):
 
             if backend == "placeholder":
                 self.placeholder_fallback(screen, base_y=base_y, avail=avail)
+
+            if self.show_frame_stats and self.frame_stats is not None:
+                self.draw_frame_stats(screen)
         except Exception:
             pass
 
+    def _get_frame_stats_lines(self):
+        stats = self.frame_stats
+        phases = stats.phase_averages_ms()
+        pct = stats.percentiles_ms()
+        return [
+            f"FPS: {stats.fps:5.1f}",
+            '  '.join(f"{name}: {ms:4.1f}ms" for name, ms in phases.items()),
+            f"p50: {pct[50]:4.1f}  p95: {pct[95]:4.1f}  p99: {pct[99]:4.1f} ms",
+        ]
+
+    def draw_frame_stats(self, screen):
+        """Draw FPS, per-phase timings, frame-time percentiles and a histogram in the top-right corner."""
+        if self._dx_small_font is None:
+            self._dx_small_font = pygame.font.Font(None, 20)
+        lines = self._get_frame_stats_lines()
+        surfaces = [self._dx_small_font.render(line, True, self.game_settings.dx_font_color) for line in lines]
+        width = max(max(s.get_width() for s in surfaces), self.histogram_size[0])
+        x = screen.get_width() - self.edge_buffer_pixels - width
+        y = self.card_top_margin
+        for surf in surfaces:
+            screen.blit(surf, (x, y))
+            y += surf.get_height()
+
+        counts = self.frame_stats.histogram()
+        hist_w, hist_h = self.histogram_size
+        peak = max(counts) or 1
+        bar_w = max(1, hist_w // len(counts))
+        base = y + 4 + hist_h
+        for i, count in enumerate(counts):
+            bar_h = int(hist_h * count / peak)
+            if bar_h:
+                color = (self.game_settings.dx_font_error_color if i == len(counts) - 1
+                         else self.game_settings.dx_font_color)
+                pygame.draw.rect(screen, color, (x + i * bar_w, base - bar_h, bar_w - 1, bar_h))
+
     def placeholder_fallback(self, screen, avail=None, **kwargs):
         base_y = kwargs.get('base_y', self.card_bottom_margin)
         # No working rasterizer found; provide guidance
@@ -0,0 +1,221 @@
+#! python3
+"""
+Headless replay-to-frames renderer.
+
+Drives GameScreen on SDL's dummy video driver and renders a recorded sequence of
+hands to numbered PNG frames or to a raw RGB frame stream, with no display and no
+frame limiter. Timing is simulated: frame ``i`` shows the table as it is ``i / fps``
+seconds into the replay, so the output is identical however fast the box renders.
+
+Recorded hands are a JSON list of ``{"player": [[value, suit], ...], "dealer": [...]}``
+where suit is a CardSuits symbol, name (e.g. ``"SPADE"``) or file name (``"spades"``).
+
+Usage:
+    python -m PyGameBlackJack.headless_renderer hands.json --out frames/ [--fps 30]
+    python -m PyGameBlackJack.headless_renderer hands.json --format raw --out - | ffmpeg -f rawvideo ...
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+from typing import List, Tuple
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import pygame  # noqa: E402
+
+from Backend.card_codes import SUIT_INDEX, SUIT_ORDER  # noqa: E402
+from Backend.settings import PyGameSettings  # noqa: E402
+from PyBlackJack.Players.Players import PyGamePlayer, PyGameDealer  # noqa: E402
+from PyGameBlackJack.game_screens import GameScreen  # noqa: E402
+
+_to_bytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+_from_bytes = getattr(pygame.image, 'frombytes', None) or pygame.image.fromstring
+
+
+class FrameWriter(threading.Thread):
+    """
+    Writes batches of frames on a worker thread so encoding and disk I/O overlap rendering.
+
+    Frames are queued as raw RGB bytes in batches; ``close()`` flushes the last
+    partial batch and waits for the worker to finish.
+    """
+    RAW = 'raw'
+    PNG = 'png'
+
+    def __init__(self, out: str, size: Tuple[int, int], fmt: str = PNG, batch_size: int = 32, max_batches: int = 8):
+        super().__init__(daemon=True)
+        self.out = out
+        self.size = size
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._batch = []
+        self.frames_written = 0
+        self.error = None
+
+        if self.fmt == FrameWriter.RAW:
+            self._stream = sys.stdout.buffer if out == '-' else open(out, 'wb')
+        else:
+            Path(out).mkdir(parents=True, exist_ok=True)
+            self._stream = None
+
+    def add(self, index: int, frame: bytes):
+        self._batch.append((index, frame))
+        if len(self._batch) >= self.batch_size:
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def close(self):
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+        self._queue.put(None)
+        self.join()
+        if self._stream is not None and self._stream is not sys.stdout.buffer:
+            self._stream.close()
+        if self.error:
+            raise self.error
+
+    def _write_batch(self, batch):
+        if self.fmt == FrameWriter.RAW:
+            self._stream.write(b''.join(frame for _, frame in batch))
+        else:
+            for index, frame in batch:
+                surf = _from_bytes(frame, self.size, 'RGB')
+                pygame.image.save(surf, str(Path(self.out, f"frame_{index:06d}.png")))
+        self.frames_written += len(batch)
+
+    def run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            if self.error is None:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self.error = e
+
+
+class ReplayRenderer:
+    """
+    Renders recorded hands through GameScreen at a fixed simulated frame rate.
+
+    Each hand is played out as a timeline of steps ``step_seconds`` apart: the
+    initial two-card deal (alternating player/dealer), further player hits, the
+    dealer reveal, further dealer hits, then a hold on the final table.
+    """
+    def __init__(self, hands: List[dict], fps: int = 30, step_seconds: float = 0.5,
+                 hold_seconds: float = 1.5, game_settings: PyGameSettings = None):
+        pygame.init()
+        self.game_settings = game_settings or PyGameSettings()
+        self.screen = pygame.display.set_mode(self.game_settings.screen_size)
+        self.fps = fps
+        self.step_seconds = step_seconds
+        self.hold_seconds = hold_seconds
+        self.hands = [self._parse_hand(h) for h in hands]
+
+        self.player = PyGamePlayer(settings=self.game_settings)
+        self.dealer = PyGameDealer(chosen_card_back=None)
+        self.dealer.settings = self.game_settings
+        self.game_screen = GameScreen(self.game_settings, screen=self.screen, player=self.player, dealer=self.dealer)
+
+    @staticmethod
+    def _parse_hand(hand: dict):
+        def _card(c):
+            value, suit = c
+            return int(value), SUIT_ORDER[SUIT_INDEX[suit]].value
+        return [_card(c) for c in hand['player']], [_card(c) for c in hand['dealer']]
+
+    @staticmethod
+    def hand_steps(player_cards: list, dealer_cards: list):
+        """Yield the (player card count, dealer card count, dealer revealed) table state for each step."""
+        p, d = 0, 0
+        for _ in range(2):
+            p += 1
+            yield p, d, False
+            d += 1
+            yield p, d, False
+        while p < len(player_cards):
+            p += 1
+            yield p, d, False
+        yield p, d, True
+        while d < len(dealer_cards):
+            d += 1
+            yield p, d, True
+
+    def timeline(self):
+        """Yield (seconds, player hand, dealer hand, revealed) for every state change in the replay."""
+        t = 0.0
+        for player_cards, dealer_cards in self.hands:
+            for p, d, revealed in self.hand_steps(player_cards, dealer_cards):
+                yield t, player_cards[:p], dealer_cards[:d], revealed
+                t += self.step_seconds
+            t += self.hold_seconds - self.step_seconds
+        yield t, None, None, None
+
+    def render(self, writer: FrameWriter) -> int:
+        """
+        Render every frame of the replay into ``writer``.
+
+        The table is only redrawn when the timeline state changes; frames in
+        between reuse the last encoded bytes.
+
+        :return: Number of frames produced.
+        """
+        frame_index = 0
+        frame = None
+        events = self.timeline()
+        state = next(events)
+        upcoming = next(events)
+        while upcoming[1] is not None or frame_index / self.fps < upcoming[0]:
+            now = frame_index / self.fps
+            changed = frame is None
+            while upcoming[1] is not None and upcoming[0] <= now:
+                state, upcoming = upcoming, next(events)
+                changed = True
+            if changed:
+                _, self.player.hand, self.dealer.hand, self.game_screen.dealer_revealed = state
+                self.game_screen.draw(self.screen)
+                frame = _to_bytes(self.screen, 'RGB')
+            writer.add(frame_index, frame)
+            frame_index += 1
+            # drain SDL's queue so the dummy driver doesn't accumulate events
+            pygame.event.pump()
+        return frame_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render recorded hands to frames without a display.")
+    parser.add_argument('hands', type=Path, help="JSON file with a list of recorded hands")
+    parser.add_argument('--out', default='frames', help="output directory (png) or file, '-' for stdout (raw)")
+    parser.add_argument('--format', choices=[FrameWriter.PNG, FrameWriter.RAW], default=FrameWriter.PNG)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--step-seconds', type=float, default=0.5)
+    parser.add_argument('--hold-seconds', type=float, default=1.5)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args(argv)
+
+    with open(args.hands) as f:
+        hands = json.load(f)
+    renderer = ReplayRenderer(hands, fps=args.fps, step_seconds=args.step_seconds, hold_seconds=args.hold_seconds)
+    writer = FrameWriter(args.out, renderer.screen.get_size(), fmt=args.format, batch_size=args.batch_size)
+    width, height = renderer.screen.get_size()
+    writer.start()
+    # the writer already holds stdout's buffer; keep stray prints (e.g. missing assets) out of the stream
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            frames = renderer.render(writer)
+    finally:
+        writer.close()
+        pygame.quit()
+    print(f"Rendered {frames} frames ({width}x{height})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
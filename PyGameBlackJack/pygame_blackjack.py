@@ -3,10 +3,12 @@ import pygame
 from Backend.enum import GameStates
 from Backend.settings import PyGameSettings
 from PyBlackJack.Bank.Cage import Cage
-from PyBlackJack.py_blackjack import Game
+from PyBlackJack.py_blackjack import Game, main as game_main
 from PyBlackJack.Players.Players import PyGamePlayer, PyGameDatabasePlayer, PyGameDealer
 from PyBlackJack.Bank.Cage import DatabaseCage
 from PyGameBlackJack.game_screens import StartScreen, GameOverScreen, GameScreen
+from PyGameBlackJack.frame_stats import FrameStats
+from PyGameBlackJack.animation import AnimationScheduler, TableAnimator
 
 
 class PyGameBlackJack(Game):
@@ -38,6 +40,15 @@ class PyGameBlackJack(Game):
         self.game_screen.player = self.player
         self.game_screen.dealer = self.dealer
         self.game_screen.dealer_revealed = False
+        self.frame_stats = FrameStats(csv_path=self.game_settings.frame_stats_csv_path)
+        self.game_screen.frame_stats = self.frame_stats
+
+        self.animations = AnimationScheduler()
+        self.table_animator = (TableAnimator(self.game_screen, self.animations)
+                               if self.game_settings.enable_animations else None)
+        self._background = None
+        self._scene_dirty = True
+        self._frame_seconds = 0.0
         self.player.print_hand()
 
 
@@ -53,26 +64,33 @@ class PyGameBlackJack(Game):
             raise ValueError(f"Invalid game state: {value}")
 
     def _keydown_events(self, event):
-        if event.key == pygame.K_SPACE:
-            # Reserved for future use (e.g., animations)
-            pass
+        if event.key == pygame.K_SPACE:  # Skip running animations
+            self.animations.finish_all()
         elif event.key == pygame.K_ESCAPE:
             self.state = GameStates.GAME_OVER
+        elif event.key == pygame.K_F3:  # Frame stats overlay toggle
+            self.game_screen.show_frame_stats = not self.game_screen.show_frame_stats
         elif event.key == pygame.K_h:  # Player hits
             self.hit(self.player)
         elif event.key == pygame.K_s:  # Player stays
             self.stay(self.player)
+        elif event.key == pygame.K_e:  # Hint: the expected value of hitting and staying
+            if self.player.hand and self.dealer.hand:
+                self.game_screen.hint_text = self.hint().describe()
         # TODO: finish/dont use this?
         elif event.key == pygame.K_r:  # Reveal dealer hand toggle
             if hasattr(self.game_screen, 'dealer_revealed'):
                 self.game_screen.dealer_revealed = not self.game_screen.dealer_revealed
         elif event.key == pygame.K_n:  # New hand
             self.setup_new_hand()
+            self.game_screen.hint_text = None
             if hasattr(self.game_screen, 'dealer_revealed'):
                 self.game_screen.dealer_revealed = False
 
     def check_events(self):
         for event in pygame.event.get():
+            # anything may have changed the table (or uncovered the window)
+            self._scene_dirty = True
             if event.type == pygame.QUIT:
                 self.running = False
                 self.state = GameStates.GAME_OVER
@@ -127,8 +145,10 @@ class PyGameBlackJack(Game):
         The main game-playing loop.
         """
         while self.state == GameStates.PLAYING:
+            self.frame_stats.start_frame()
             # Event handling
             self.check_events()
+            self.frame_stats.mark('events')
 
             # TODO: Update game logic
             #  Add functionality such as checking for a bust, dealer actions, etc.
@@ -136,14 +156,40 @@ class PyGameBlackJack(Game):
             self._render_game_screen()
 
             # Limit frame rate to 60 FPS
-            self.clock.tick(60)
+            self._frame_seconds = self.clock.tick(60) / 1000
 
     def _render_game_screen(self):
         """
         Render the main game playing screen.
+
+        With animations on, the static table is only redrawn (and cached as the
+        background) when something changed; frames where only tweens move
+        restore and update just their dirty rects.
         """
-        self.game_screen.draw(self.screen)
-        pygame.display.flip()  # Update the display
+        if self.table_animator is None:
+            self.game_screen.draw(self.screen)
+            self.frame_stats.mark('draw')
+            pygame.display.flip()  # Update the display
+            self.frame_stats.mark('flip')
+            return
+
+        full_redraw = self.table_animator.sync() or self._scene_dirty or self.game_screen.show_frame_stats
+        self.animations.update(self._frame_seconds)
+        full_redraw = full_redraw or self.animations.completed or self._background is None
+        self._scene_dirty = False
+
+        if full_redraw:
+            self.game_screen.draw(self.screen)
+            self._background = self.screen.copy()
+            self.animations.draw(self.screen, self._background)
+            self.frame_stats.mark('draw')
+            pygame.display.flip()
+            self.frame_stats.mark('flip')
+        elif self.animations.busy:
+            dirty = self.animations.draw(self.screen, self._background)
+            self.frame_stats.mark('draw')
+            pygame.display.update(dirty)
+            self.frame_stats.mark('flip')
 
     def _game_over_screen(self):
         """
@@ -159,10 +205,14 @@ class PyGameBlackJack(Game):
         """
         Properly shut down the game.
         """
+        self.frame_stats.close()
         pygame.quit()
         exit()
 
 
+def main(argv=None):
+    game_main(argv, game_class=PyGameBlackJack)
+
+
 if __name__ == '__main__':
-    game = PyGameBlackJack()
-    game.play()
\ No newline at end of file
+    main()
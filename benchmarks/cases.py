@@ -0,0 +1,169 @@
+"""
+Benchmark cases for the engine's hot paths.
+
+Each case is registered with ``@benchmark`` on a setup function that returns a
+``Bench``: the zero-argument callable to time, how many operations one call
+performs (results are reported per operation), and an optional teardown.
+Setup and teardown are never timed.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from Backend.settings import Settings  # noqa: E402
+
+
+class Bench(NamedTuple):
+    fn: Callable[[], object]
+    ops: int = 1
+    teardown: Optional[Callable[[], object]] = None
+
+
+class Case(NamedTuple):
+    name: str
+    group: str
+    setup: Callable[[Settings], Bench]
+
+
+CASES: Dict[str, Case] = {}
+
+
+def benchmark(name: str, group: str):
+    def register(setup: Callable[[Settings], Bench]):
+        CASES[name] = Case(name, group, setup)
+        return setup
+    return register
+
+
+SHOE_SIZES = (1, 6, 8)
+
+
+def _deck_cases():
+    from PyBlackJack.Deck.DeckOfCards import Deck
+
+    for decks in SHOE_SIZES:
+        def init(settings, decks=decks):
+            return Bench(lambda: Deck(settings=settings, decks=decks))
+
+        def shuffle(settings, decks=decks):
+            deck = Deck(settings=settings, decks=decks, seed=0)
+            return Bench(deck.shuffle_deck)
+
+        def draw(settings, decks=decks):
+            deck = Deck(settings=settings, decks=decks, seed=0)
+            deck.shuffle_deck()
+            # no low-shoe warnings while the whole shoe is drawn
+            deck.shoe_runout_warning_threshold = 0
+            full = list(deck.deck)
+
+            def draw_shoe():
+                deck.deck = list(full)
+                for _ in range(len(full)):
+                    deck.draw()
+            return Bench(draw_shoe, ops=len(full))
+
+        benchmark(f"deck.init[{decks}]", 'deck')(init)
+        benchmark(f"deck.shuffle[{decks}]", 'deck')(shuffle)
+        benchmark(f"deck.draw[{decks}]", 'deck')(draw)
+
+
+_deck_cases()
+
+
+@benchmark('player.get_hand_value', 'player')
+def _get_hand_value(settings):
+    from Backend.enum import CardSuits
+    from PyBlackJack.Players.Players import Player
+
+    player = Player(100, settings=settings)
+    suit = next(iter(CardSuits)).value
+    # an ace that has to count as 1, so both ace branches run
+    player.hand = [(1, suit), (7, suit), (12, suit), (3, suit)]
+    return Bench(player.get_hand_value)
+
+
+@benchmark('player.get_print_hand', 'player')
+def _get_print_hand(settings):
+    from Backend.enum import CardSuits
+    from PyBlackJack.Players.Players import Player
+
+    player = Player(100, settings=settings)
+    suit = next(iter(CardSuits)).value
+    player.hand = [(1, suit), (7, suit), (12, suit), (3, suit)]
+    return Bench(lambda: player.get_print_hand(player.hand))
+
+
+@benchmark('headless.hand', 'headless')
+def _headless_hand(settings):
+    from PyBlackJack.Simulation.BatchRunner import hit_below_17, simulation_game, top_up
+
+    game = simulation_game(settings, seed=0)
+
+    def play():
+        top_up(game)
+        game.play_hand(10, hit_below_17)
+    return Bench(play)
+
+
+@benchmark('cage.write_new_account_balance', 'database')
+def _write_new_account_balance(settings):
+    from Backend.PlayerCashRecordDB import PyBlackJackSQLLite
+    from PyBlackJack.Bank.Cage import DatabaseCage
+    from PyBlackJack.Players.Players import Player
+
+    tmp = tempfile.mkdtemp(prefix='pyblackjack-bench-')
+    db = PyBlackJackSQLLite(db_file_path=Path(tmp, 'bench.db'), settings=settings)
+    # the SQLite helper warns that every UPDATE "returned no results"; don't time the logging
+    db._logger.setLevel(logging.ERROR)
+    db.initialize_new_db()
+    db.new_player_setup({PyBlackJackSQLLite.NEW_PLAYER_DICT_KEYS[0]: 'Bench',
+                         PyBlackJackSQLLite.NEW_PLAYER_DICT_KEYS[1]: 'Mark'})
+    info = db.PlayerInfoLookup(db.PlayerIDLookup('Bench', 'Mark'))
+    cage = DatabaseCage(db, settings=settings)
+    player = Player(info['account_balance'] or 0, settings=settings)
+    player.account_id = info['account_id']
+    player.account_balance = player.chips
+
+    def write():
+        # a changed balance every call, so every call commits
+        player.chips += 1
+        cage.write_new_account_balance(player)
+
+    def teardown():
+        db._connection.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return Bench(write, teardown=teardown)
+
+
+def _renderer_setup():
+    import pygame
+    from PyGameBlackJack import card_renderer
+
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        # convert_alpha() needs a display mode, even a dummy one
+        pygame.display.set_mode((1, 1))
+    return card_renderer, card_renderer.PNG_CARDS_DIR / 'ace_of_spades.png'
+
+
+@benchmark('card_renderer.load_svg_as_surface[cold]', 'render')
+def _load_svg_cold(settings):
+    card_renderer, path = _renderer_setup()
+
+    def cold():
+        card_renderer.load_svg_as_surface.cache_clear()
+        card_renderer.load_svg_as_surface(path, 180)
+    return Bench(cold)
+
+
+@benchmark('card_renderer.load_svg_as_surface[warm]', 'render')
+def _load_svg_warm(settings):
+    card_renderer, path = _renderer_setup()
+    card_renderer.load_svg_as_surface(path, 180)
+    return Bench(lambda: card_renderer.load_svg_as_surface(path, 180))
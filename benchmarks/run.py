@@ -0,0 +1,173 @@
+#! python3
+"""
+Run the engine benchmarks and compare them with a stored baseline.
+
+Every case is timed in ``--repeat`` rounds of as many loops as fill about
+``--min-time`` seconds, and reported per operation in nanoseconds (best, median,
+mean and stdev across rounds). Anything the code under test prints is discarded
+while it is timed.
+
+With ``--compare`` each case's best time is set against the baseline's, and a case
+slower by more than ``--threshold`` is flagged as a regression; the exit status is 1
+if any case regressed.
+
+Usage:
+    python -m benchmarks.run [--filter deck] [--output bench.json]
+    python -m benchmarks.run --compare baseline.json [--threshold 0.10]
+    python -m benchmarks.run --compare baseline.json --current bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from typing import Dict, List, NamedTuple
+
+from benchmarks.cases import CASES, Case
+
+FORMAT_VERSION = 1
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline_ns: float
+    current_ns: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_ns / self.baseline_ns if self.baseline_ns else float('inf')
+
+
+def select(filters: List[str]) -> List[Case]:
+    """Cases whose name or group contains any of filters; every case without filters."""
+    if not filters:
+        return list(CASES.values())
+    return [case for case in CASES.values() if any(f in case.name or f == case.group for f in filters)]
+
+
+def time_case(case: Case, settings, repeat: int, min_time: float) -> Dict[str, float]:
+    bench = case.setup(settings)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), \
+                contextlib.redirect_stderr(devnull):
+            timer = timeit.Timer(bench.fn)
+            # calibrate the loop count so one round lasts about min_time
+            loops, elapsed = timer.autorange()
+            loops = max(1, int(loops * min_time / max(elapsed, 1e-9)))
+            rounds = [timer.timeit(loops) for _ in range(repeat)]
+    finally:
+        if bench.teardown is not None:
+            bench.teardown()
+    per_op = [seconds / loops / bench.ops * 1e9 for seconds in rounds]
+    return {
+        'group': case.group,
+        'ops_per_call': bench.ops,
+        'loops': loops,
+        'repeat': repeat,
+        'best_ns': min(per_op),
+        'median_ns': statistics.median(per_op),
+        'mean_ns': statistics.fmean(per_op),
+        'stdev_ns': statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+    }
+
+
+def run(cases: List[Case], repeat: int = 5, min_time: float = 0.2, progress=sys.stderr) -> dict:
+    from Backend.settings import Settings
+
+    settings = Settings()
+    results = {}
+    for case in cases:
+        results[case.name] = time_case(case, settings, repeat, min_time)
+        if progress is not None:
+            print(f"{case.name:<45} {format_ns(results[case.name]['best_ns']):>12}", file=progress)
+    return {
+        'version': FORMAT_VERSION,
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> List[Comparison]:
+    """Best times of the cases present in both result sets, in the current order."""
+    base = baseline['results']
+    return [Comparison(name, base[name]['best_ns'], result['best_ns'])
+            for name, result in current['results'].items() if name in base]
+
+
+def format_ns(ns: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.1f} ns"
+
+
+def format_comparison(comparisons: List[Comparison], threshold: float) -> str:
+    lines = [f"{'benchmark':<45} {'baseline':>12} {'current':>12} {'change':>8}"]
+    for c in comparisons:
+        flag = ''
+        if c.ratio > 1 + threshold:
+            flag = '  REGRESSION'
+        elif c.ratio < 1 - threshold:
+            flag = '  faster'
+        lines.append(f"{c.name:<45} {format_ns(c.baseline_ns):>12} {format_ns(c.current_ns):>12} "
+                     f"{c.ratio - 1:>+8.1%}{flag}")
+    return '\n'.join(lines)
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != FORMAT_VERSION:
+        raise SystemExit(f"{path} is not a version {FORMAT_VERSION} benchmark result.")
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine's hot paths.")
+    parser.add_argument('--filter', action='append', default=[],
+                        help="only cases whose name contains this, or in this group; repeatable")
+    parser.add_argument('--repeat', type=int, default=5, help="timed rounds per case")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds per round")
+    parser.add_argument('--output', default=None, help="write results as JSON here (default: stdout)")
+    parser.add_argument('--compare', default=None, help="baseline results to compare with")
+    parser.add_argument('--current', default=None, help="compare these stored results instead of running")
+    parser.add_argument('--threshold', type=float, default=0.10, help="slowdown flagged as a regression")
+    parser.add_argument('--list', action='store_true', help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    cases = select(args.filter)
+    if args.list:
+        for case in cases:
+            print(f"{case.group:<10} {case.name}")
+        return 0
+
+    if args.current:
+        current = _load(args.current)
+    else:
+        current = run(cases, repeat=args.repeat, min_time=args.min_time)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+        elif not args.compare:
+            json.dump(current, sys.stdout, indent=2)
+            print()
+
+    if args.compare:
+        comparisons = compare(_load(args.compare), current)
+        print(format_comparison(comparisons, args.threshold))
+        if any(c.ratio > 1 + args.threshold for c in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())